@@ -0,0 +1,98 @@
+"""Benchmark the pooled/cached contributions client against a local stand-in API server.
+
+The stand-in serves synthetic yearly payloads with a fixed latency and honours If-None-Match,
+so cold, cached and revalidated fetches can be compared offline.
+
+    uv run python benchmarks/bench_api_client.py --years 10 --latency 0.05
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from api_client import ContributionsClient  # noqa: E402
+from bench_api_parse import synthetic_response  # noqa: E402
+
+
+def start_stand_in(latency: float):
+    stats = {"200": 0, "304": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            year = parse_qs(urlparse(self.path).query).get("y", ["last"])[0]
+            etag = f'"{year}"'
+            if self.headers.get("If-None-Match") == etag:
+                stats["304"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            stats["200"] += 1
+            body = json.dumps(synthetic_response(1, seed=hash(year) % 1000)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in server latency in seconds")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    server, stats = start_stand_in(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_port}/v4"
+    years = [str(2025 - i) for i in range(args.years)]
+
+    def timed(fn):
+        start = time.perf_counter()
+        result = fn()
+        return (time.perf_counter() - start) * 1000, result
+
+    serial, _ = timed(lambda: [requests.get(f"{base_url}/octocat?y={y}", timeout=30).json() for y in years])
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        client = ContributionsClient(base_url=base_url, cache_dir=cache_dir, max_workers=args.workers)
+        cold, results = timed(lambda: client.fetch_years("octocat", years))
+        assert all(results[y]["contributions"] for y in years)
+        cached, _ = timed(lambda: client.fetch_years("octocat", years))
+
+        stats.update({"200": 0, "304": 0})
+        revalidating = ContributionsClient(base_url=base_url, cache_dir=cache_dir, ttl=0, max_workers=args.workers)
+        revalidated, _ = timed(lambda: revalidating.fetch_years("octocat", years))
+        assert stats == {"200": 0, "304": args.years}, stats
+
+    server.shutdown()
+    print(f"{args.years} years at {args.latency * 1000:.0f} ms latency")
+    print(f"serial requests.get:        {serial:8.1f} ms")
+    print(f"pooled fan-out (cold):      {cold:8.1f} ms")
+    print(f"in-memory cache hit:        {cached:8.1f} ms")
+    print(f"disk cache + 304 revalidate:{revalidated:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
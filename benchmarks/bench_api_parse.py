@@ -0,0 +1,75 @@
+"""Benchmark contributions API parsing: legacy DataFrame.iterrows vs vectorized dict/array and streaming parsers.
+
+    uv run python benchmarks/bench_api_parse.py
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dates import (  # noqa: E402
+    contributions_to_array,
+    contributions_to_dict,
+    convert_api_response_to_dict,
+    current_window,
+    iter_api_contributions,
+)
+
+
+def synthetic_response(years: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    end = date.today()
+    days = 365 * years
+    counts = rng.poisson(2, size=days).tolist()
+    return {
+        "total": {"lastYear": sum(counts[-365:])},
+        "contributions": [
+            {"date": (end - timedelta(days=days - i)).isoformat(), "count": c, "level": min(c, 4)}
+            for i, c in enumerate(counts)
+        ],
+    }
+
+
+def legacy_convert(resp: dict) -> dict:
+    df = pd.DataFrame(resp["contributions"])
+    return {row["date"]: row["count"] for _, row in df.iterrows()}
+
+
+def timed(fn, payloads) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        fn(payload)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    window = current_window()
+    scenarios = {
+        "1 year": [synthetic_response(1)],
+        "10 years": [synthetic_response(10)],
+        f"{args.users} users": [synthetic_response(1, seed) for seed in range(args.users)],
+    }
+    print(f"{'payload':<12} {'iterrows (ms)':>14} {'dict (ms)':>10} {'array (ms)':>11} {'stream (ms)':>12}")
+    for name, payloads in scenarios.items():
+        bodies = [json.dumps(payload).encode("utf-8") for payload in payloads]
+        legacy = timed(legacy_convert, payloads)
+        as_dict = timed(convert_api_response_to_dict, payloads)
+        as_array = timed(lambda p: contributions_to_array(p["contributions"], window), payloads)
+        streamed = timed(lambda body: contributions_to_dict(iter_api_contributions(io.BytesIO(body))), bodies)
+        print(f"{name:<12} {legacy:>14.1f} {as_dict:>10.1f} {as_array:>11.1f} {streamed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark github_upload_commits bulk (git fast-import) vs per-commit GitPython mode.
+
+Runs end to end against a throwaway local bare repository, so no network or token is needed.
+
+    uv run python benchmarks/bench_bulk_commits.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from github_interaction import github_upload_commits  # noqa: E402
+from repo_cache import RepoCache  # noqa: E402
+
+
+def synthetic_plan(total_commits: int, days: int = 364) -> dict:
+    # spread total_commits evenly over the last `days` days
+    start = date.today() - timedelta(days=days)
+    base, extra = divmod(total_commits, days)
+    return {
+        (start + timedelta(days=i)).strftime("%Y-%m-%d"): base + (1 if i < extra else 0)
+        for i in range(days)
+    }
+
+
+def time_upload(total_commits: int, bulk: bool) -> float:
+    with tempfile.TemporaryDirectory() as remote, tempfile.TemporaryDirectory() as cache_dir:
+        subprocess.run(["git", "init", "--bare", "-q", remote], check=True)
+        start = time.perf_counter()
+        github_upload_commits(
+            REPO_URL=f"file://{remote}",
+            GIT_USERNAME="bench",
+            GIT_EMAIL="bench@example.com",
+            GITHUB_TOKEN="",
+            commit_date_counts=synthetic_plan(total_commits),
+            bulk=bulk,
+            cache=RepoCache(root=cache_dir),
+        )
+        elapsed = time.perf_counter() - start
+        pushed = subprocess.run(
+            ["git", "rev-list", "--count", "Automation"], cwd=remote, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        assert int(pushed) == total_commits + 1, f"expected {total_commits + 1} commits, found {pushed}"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--slow-max", type=int, default=10000,
+                        help="largest size to run through the per-commit GitPython path (it scales poorly)")
+    args = parser.parse_args()
+
+    print(f"{'commits':>8} {'per-commit (s)':>15} {'fast-import (s)':>16} {'speedup':>8}")
+    for size in args.sizes:
+        bulk = time_upload(size, bulk=True)
+        if size <= args.slow_max:
+            slow = time_upload(size, bulk=False)
+            print(f"{size:>8} {slow:>15.2f} {bulk:>16.2f} {slow / bulk:>7.1f}x")
+        else:
+            print(f"{size:>8} {'skipped':>15} {bulk:>16.2f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Microbenchmark the per-rerun calendar conversions: legacy per-day pandas loops vs CalendarWindow.
+
+    uv run python benchmarks/bench_calendar.py --repeat 200
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dates import current_window, year_dict  # noqa: E402
+from grid import dict_to_matrix, matrix_to_dict  # noqa: E402
+
+
+def _legacy_window():
+    end_date = pd.Timestamp.today().normalize()
+    end_date -= pd.Timedelta(days=(end_date.weekday() + 1) % 7)
+    return end_date - pd.Timedelta(weeks=52) + pd.Timedelta(days=1)
+
+
+def legacy_year_dict():
+    start_date = _legacy_window()
+    return {(start_date + pd.Timedelta(days=i)).date().strftime("%Y-%m-%d"): 0 for i in range(364)}
+
+
+def legacy_dict_to_matrix(date_dict):
+    start_date = _legacy_window()
+    matrix = np.zeros((7, 52), dtype=int)
+    for d in pd.date_range(start_date, start_date + pd.Timedelta(days=363), freq="D"):
+        matrix[(d.weekday() + 1) % 7, (d - start_date).days // 7] = date_dict.get(d.date().strftime("%Y-%m-%d"), 0)
+    return matrix
+
+
+def legacy_matrix_to_dict(matrix):
+    start_date = _legacy_window()
+    return {
+        (start_date + pd.Timedelta(days=week * 7 + weekday)).date().strftime("%Y-%m-%d"): int(matrix[weekday, week])
+        for week in range(52)
+        for weekday in range(7)
+    }
+
+
+def per_call_ms(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    matrix = np.random.default_rng(0).integers(0, 5, size=(7, 52))
+    date_dict = legacy_matrix_to_dict(matrix)
+    window = current_window()
+
+    cases = [
+        ("year_dict", legacy_year_dict, lambda: year_dict(window)),
+        ("dict_to_matrix", lambda: legacy_dict_to_matrix(date_dict), lambda: dict_to_matrix(date_dict, window)),
+        ("matrix_to_dict", lambda: legacy_matrix_to_dict(matrix), lambda: matrix_to_dict(matrix, window)),
+    ]
+    print(f"{'conversion':<16} {'before (ms)':>12} {'after (ms)':>11} {'speedup':>8}")
+    for name, before, after in cases:
+        b, a = per_call_ms(before, args.repeat), per_call_ms(after, args.repeat)
+        print(f"{name:<16} {b:>12.3f} {a:>11.3f} {b / a:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Benchmark ContributionCanvas cost against canvas length: diff, commit plan and tiled rendering.
+
+    uv run python benchmarks/bench_canvas.py --years 1 2 5 10
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import numpy as np  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import writer  # noqa: E402
+from canvas import ContributionCanvas  # noqa: E402
+from dates import window_years_back  # noqa: E402
+
+
+def timed_ms(fn, repeat: int = 5) -> float:
+    samples = []
+    for _ in range(repeat):
+        writer._render_cache.clear()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 2, 5, 10])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'years':>5} {'bytes':>7} {'diff (ms)':>10} {'plan (ms)':>10} {'render (ms)':>12}")
+    for years in args.years:
+        window = window_years_back(years)
+        design = ContributionCanvas(window, rng.integers(0, 5, len(window)))
+        baseline = ContributionCanvas(window, rng.integers(0, 3, len(window)))
+        diff = timed_ms(lambda: design.diff(baseline))
+        plan = timed_ms(lambda: design.commit_plan(baseline))
+        render = timed_ms(design.render_tiles)
+        print(f"{years:>5} {design.values.nbytes:>7} {diff:>10.3f} {plan:>10.3f} {render:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Design storage: the bit-packed design file and SQLite library against JSON files and PNGs.
+
+    uv run python benchmarks/bench_design_library.py --designs 5000
+
+Sizes are per one-year design. Timings are for listing every saved design's name and dates, and
+for loading one design back into a level array: from a directory of JSON date:level files (what
+a library without an index has to parse) and from the SQLite library.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dates import current_window  # noqa: E402
+from design_file import Design, encode_design  # noqa: E402
+from design_library import DesignLibrary  # noqa: E402
+from writer import render_commit_graph  # noqa: E402
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--designs", type=int, default=5000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    window = current_window()
+    designs = [Design(window, rng.integers(0, 5, len(window)).astype(np.uint8)) for _ in range(args.designs)]
+
+    sample = designs[0]
+    json_bytes = len(json.dumps(window.array_to_dict(sample.levels)).encode("utf-8"))
+    png_bytes = len(render_commit_graph(sample.matrix, backend="raster")[1])
+    print(f"one year: design file {len(encode_design(sample))} B, JSON {json_bytes} B, PNG {png_bytes} B")
+
+    with tempfile.TemporaryDirectory() as root:
+        json_dir = os.path.join(root, "json")
+        os.makedirs(json_dir)
+        library = DesignLibrary(os.path.join(root, "designs.sqlite3"))
+        start = time.perf_counter()
+        for n, design in enumerate(designs):
+            with open(os.path.join(json_dir, f"design-{n:05d}.json"), "w") as f:
+                json.dump(window.array_to_dict(design.levels), f)
+        json_save = time.perf_counter() - start
+        start = time.perf_counter()
+        for n, design in enumerate(designs):
+            library.save(f"design-{n:05d}", design, tags=["bench", f"group-{n % 10}"])
+        library_save = time.perf_counter() - start
+
+        def list_json():
+            # names are cheap, but the date range of each design means opening it
+            for name in sorted(os.listdir(json_dir)):
+                with open(os.path.join(json_dir, name)) as f:
+                    keys = list(json.load(f))
+                (name, keys[0], keys[-1])
+
+        def load_json():
+            with open(os.path.join(json_dir, f"design-{args.designs // 2:05d}.json")) as f:
+                window.dict_to_array(json.load(f))
+
+        middle = library.search(name=f"design-{args.designs // 2:05d}")[0].id
+        print(f"{args.designs} designs          {'JSON files':>12} {'library':>12}")
+        print(f"  save all (s)        {json_save:12.2f} {library_save:12.2f}")
+        print(f"  list all (ms)       {timed(list_json, 3):12.2f} "
+              f"{timed(lambda: library.search(limit=args.designs)):12.2f}")
+        print(f"  list one tag (ms)   {'':>12} {timed(lambda: library.search(tag='group-3', limit=args.designs)):12.2f}")
+        print(f"  load one (ms)       {timed(load_json, 50):12.3f} {timed(lambda: library.load(middle), 50):12.3f}")
+        print(f"  database size       {'':>12} {os.path.getsize(library.path) // 1024:>9} KB")
+        library.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark the undo/redo history: memory of sparse deltas vs full DataFrame snapshots, and jump times.
+
+    uv run python benchmarks/bench_history.py --edits 500 --years 1 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dates import window_years_back  # noqa: E402
+from history import EditHistory  # noqa: E402
+
+
+def edit_session(size: int, edits: int, rng) -> list:
+    # mostly single-cell edits, with an occasional fill of the whole design like "Random Fill"
+    states, values = [], np.zeros(size, dtype=np.uint16)
+    for _ in range(edits):
+        values = values.copy()
+        if rng.random() < 0.05:
+            values[:] = rng.integers(0, 5, size)
+        else:
+            values[rng.integers(size)] = rng.integers(0, 5)
+        states.append(values)
+    return states
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edits", type=int, default=500)
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'years':>5} {'snapshots (KB)':>15} {'deltas (KB)':>12} {'undo (us)':>10} {'jump to 0 (us)':>15}")
+    for years in args.years:
+        window = window_years_back(years)
+        states = edit_session(len(window), args.edits, rng)
+        snapshots = sum(pd.DataFrame(window.to_matrix(s)).memory_usage(deep=True).sum() for s in states)
+
+        history = EditHistory(len(window), max_bytes=1 << 40)
+        values = np.zeros(len(window), dtype=np.uint16)
+        for state in states:
+            changed = np.flatnonzero(state != values)
+            old = values[changed]
+            values[changed] = state[changed]
+            history.record(changed, old, state[changed], values)
+
+        start = time.perf_counter()
+        for _ in range(100):
+            history.undo(values)
+            history.redo(values)
+        undo_us = (time.perf_counter() - start) / 200 * 1e6
+        start = time.perf_counter()
+        history.restore(values, 0)
+        jump_us = (time.perf_counter() - start) * 1e6
+        assert not values.any()
+        print(f"{years:>5} {snapshots / 1024:>15.1f} {history.nbytes / 1024:>12.1f} {undo_us:>10.1f} {jump_us:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark image_to_grid on multi-megapixel images, against a full resolution float conversion.
+
+    uv run python benchmarks/bench_image_import.py --megapixels 2 12 24
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from importer import image_to_grid  # noqa: E402
+
+
+def synthetic_image(megapixels: float) -> Image.Image:
+    # a wide logo-like image: a dark disc and a grey bar on white
+    width = int((megapixels * 1e6 * 4) ** 0.5)
+    height = width // 4
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((height // 10, height // 10, height * 9 // 10, height * 9 // 10), fill="black")
+    draw.rectangle((width // 3, height // 5, width * 9 // 10, height * 4 // 5), fill=(120, 120, 120))
+    return image
+
+
+def full_resolution(data: bytes) -> np.ndarray:
+    # what a naive importer does: the whole image as floats, then box means
+    pixels = np.asarray(Image.open(BytesIO(data)).convert("L"), dtype=np.float64)
+    rows, cols = 7, 52
+    h, w = pixels.shape[0] // rows * rows, pixels.shape[1] // cols * cols
+    return pixels[:h, :w].reshape(rows, h // rows, cols, w // cols).mean(axis=(1, 3))
+
+
+def timed_ms(fn, repeat: int = 5) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[2, 12, 24])
+    args = parser.parse_args()
+
+    print(f"{'MP':>5} {'format':>6} {'full res (ms)':>14} {'importer (ms)':>14} {'dithered (ms)':>14}")
+    for megapixels in args.megapixels:
+        image = synthetic_image(megapixels)
+        for fmt in ("JPEG", "PNG"):
+            buf = BytesIO()
+            image.save(buf, format=fmt)
+            data = buf.getvalue()
+            full = timed_ms(lambda: full_resolution(data))
+            plain = timed_ms(lambda: image_to_grid(BytesIO(data), keep_aspect=False))
+            dithered = timed_ms(lambda: image_to_grid(BytesIO(data), keep_aspect=False, dither=True))
+            print(f"{megapixels:>5.0f} {fmt:>6} {full:>14.1f} {plain:>14.1f} {dithered:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Cold import time of each module under `python -X importtime`, and which heavy packages it drags in.
+
+    uv run python benchmarks/bench_importtime.py
+    uv run python benchmarks/bench_importtime.py --modules dates grid app --repeat 5
+
+Every sample is a fresh interpreter, so nothing is shared between runs. The cumulative time is the
+one importtime reports for the module itself, i.e. everything it imported transitively.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+CORE_MODULES = ("dates", "grid", "planner", "canvas", "writer", "raster", "pipeline", "importer", "upload_jobs")
+HEAVY_PACKAGES = ("pandas", "matplotlib", "git", "requests", "streamlit")
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_profile(module: str) -> tuple:
+    """Import one module in a fresh interpreter.
+
+    Returns:
+        tuple: (cumulative import time of the module in ms, heavy packages that got imported)
+    """
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC), MPLBACKEND="Agg")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env, check=True)
+    cumulative, loaded = 0.0, set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        name = match.group(4)
+        if name == module:
+            cumulative = int(match.group(2)) / 1000
+        top = name.split(".")[0]
+        if top in HEAVY_PACKAGES:
+            loaded.add(top)
+    return cumulative, sorted(loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=[*CORE_MODULES, "app"])
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per module; the best is kept")
+    args = parser.parse_args()
+
+    print(f"{'module':<12} {'import (ms)':>12}  heavy packages loaded")
+    for module in args.modules:
+        samples = [import_profile(module) for _ in range(args.repeat)]
+        best = min(ms for ms, _ in samples)
+        print(f"{module:<12} {best:>12.1f}  {', '.join(samples[0][1]) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Pattern generators: a batch of candidates per call against one candidate at a time, cell by cell.
+
+    uv run python benchmarks/bench_patterns.py --count 24 --years 1 10
+
+For every pattern and window the batched generator makes --count candidates in one call. The
+per-cell reference fills the same number of grids with a Python loop over the cells, as a sine
+wave would be drawn without numpy; it shows what the vectorized layout saves.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dates import window_years_back  # noqa: E402
+from patterns import PATTERNS, generate  # noqa: E402
+
+
+def best_ms(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def wave_per_cell(window, count: int, rng) -> list:
+    grids = []
+    for _ in range(count):
+        period, phase = rng.uniform(6, 26), rng.random()
+        grid = np.zeros((7, window.weeks), dtype=np.uint8)
+        for row in range(7):
+            for week in range(window.weeks):
+                grid[row, week] = round((math.sin(2 * math.pi * (week / period + phase)) + 1) * 2)
+        grids.append(grid)
+    return grids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=24, help="candidates per batch")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'years':>5} {'pattern':<10} {'batch (ms)':>11} {'per candidate (ms)':>19}")
+    for years in args.years:
+        window = window_years_back(years)
+        history = rng.poisson(np.tile([0.3, 3, 4, 4, 3, 2, 0.3], window.weeks))
+        for name in PATTERNS:
+            params = {"history": history} if name == "activity" else {}
+            ms = best_ms(lambda: generate(name, window, count=args.count, seed=1, **params))
+            print(f"{years:>5} {name:<10} {ms:>11.2f} {ms / args.count:>19.3f}")
+        ms = best_ms(lambda: wave_per_cell(window, args.count, rng), repeat=2)
+        print(f"{years:>5} {'wave/cell':<10} {ms:>11.2f} {ms / args.count:>19.3f}   (per-cell Python loop)")
+
+
+if __name__ == "__main__":
+    main()
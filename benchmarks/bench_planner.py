@@ -0,0 +1,58 @@
+"""Compare the level planner against treating levels as raw commit counts: commits pushed and
+target days that end up with the wrong shade.
+
+    uv run python benchmarks/bench_planner.py --years 1 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dates import window_years_back  # noqa: E402
+from planner import count_levels, plan_commits, year_slices  # noqa: E402
+
+EDITED = 0.15  # share of days the design changes
+HISTORIES = {"empty": 0.0, "light": 0.5, "regular": 5.0, "busy": 60.0}  # mean commits per day
+
+
+def yearly_levels(counts):
+    # shade each displayed year on its own, as GitHub and the planner do
+    levels = np.zeros(len(counts), dtype=np.int64)
+    for year in year_slices(len(counts)):
+        levels[year] = count_levels(counts[year])
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'years':>5} {'history':>8} {'raw commits':>12} {'raw wrong':>10} {'planned':>8} {'plan wrong':>11} "
+          f"{'plan (ms)':>10}")
+    for years in args.years:
+        window = window_years_back(years)
+        for name, mean in HISTORIES.items():
+            history = rng.poisson(mean, len(window))
+            # the fetched history as merged into the editor, with a share of the days redrawn
+            target = yearly_levels(history)
+            edited = rng.random(len(window)) < EDITED
+            target[edited] = rng.integers(0, 5, np.count_nonzero(edited))
+            # the old upload: design values minus history, taken as commit counts
+            raw = np.clip(target - history, 0, None)
+            wanted = target > 0
+            raw_wrong = int(np.count_nonzero(yearly_levels(history + raw)[wanted] != target[wanted]))
+            start = time.perf_counter()
+            plan = plan_commits(window, target, history)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{years:>5} {name:>8} {raw.sum():>12} {raw_wrong:>10} {plan.commits:>8} {plan.unreachable:>11} "
+                  f"{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
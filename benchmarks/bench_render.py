@@ -0,0 +1,66 @@
+"""Benchmark commit graph rendering: legacy per-patch figure + savefig vs the reused QuadMesh renderer.
+
+    uv run python benchmarks/bench_render.py --repeat 20
+"""
+import argparse
+import os
+import sys
+import timeit
+from io import BytesIO
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+from matplotlib.patches import Rectangle  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import raster  # noqa: E402
+from writer import COLORS, plot_commit_graph, render_commit_graph  # noqa: E402
+
+
+def legacy_render(grid) -> bytes:
+    # the original implementation: one Rectangle patch per cell on a fresh, never closed figure
+    fig, ax = plt.subplots(figsize=(13, 3))
+    for y in range(grid.shape[0] + 1):
+        for x in range(grid.shape[1]):
+            idx = min(max(int(grid[y - 1, x]), 0), len(COLORS) - 1)
+            ax.add_patch(Rectangle((x, -y), 1, 1, ec="white", lw=2, color=COLORS[idx]))
+    for i, color in enumerate(COLORS):
+        ax.add_patch(Rectangle((47 + i, -8), 1, 1, ec="white", lw=2, color=color))
+    ax.set_xlim(0, 55)
+    ax.set_ylim(-9, 0)
+    ax.set_aspect("equal")
+    buf = BytesIO()
+    fig.savefig(buf, format="png")
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    fixed = rng.integers(0, 5, size=(7, 52))
+    render_commit_graph(fixed, backend="matplotlib")
+    raster.render_png(fixed)
+    raster.render_svg(fixed)
+
+    def timed(fn):
+        return min(timeit.repeat(fn, number=1, repeat=args.repeat)) * 1000
+
+    print(f"legacy figure + savefig:   {timed(lambda: legacy_render(fixed)):8.2f} ms")
+    print(f"reused figure, draw only:  {timed(lambda: plot_commit_graph(fixed)):8.2f} ms")
+    print(f"changed grid + savefig:    {timed(lambda: render_commit_graph(rng.integers(0, 5, size=(7, 52)), backend='matplotlib')):8.2f} ms")
+    print(f"unchanged grid (cache hit):{timed(lambda: render_commit_graph(fixed)):8.3f} ms")
+    print(f"raster paint only:         {timed(lambda: raster.paint(fixed)):8.3f} ms")
+    print(f"raster PNG:                {timed(lambda: raster.render_png(fixed)):8.3f} ms")
+    print(f"SVG document:              {timed(lambda: raster.render_svg(fixed)):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
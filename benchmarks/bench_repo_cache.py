@@ -0,0 +1,56 @@
+"""Benchmark cold (first clone) vs warm (incremental fetch) uploads through RepoCache.
+
+The remote is a local bare repository that already holds `--history` generated commits,
+mirroring a repo with a year of contribution history behind it.
+
+    uv run python benchmarks/bench_repo_cache.py --history 50000 --uploads 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from github_interaction import github_upload_commits  # noqa: E402
+from repo_cache import RepoCache  # noqa: E402
+from bench_bulk_commits import synthetic_plan  # noqa: E402
+
+
+def upload(remote: str, cache: RepoCache, total_commits: int) -> float:
+    start = time.perf_counter()
+    github_upload_commits(
+        REPO_URL=f"file://{remote}",
+        GIT_USERNAME="bench",
+        GIT_EMAIL="bench@example.com",
+        GITHUB_TOKEN="",
+        commit_date_counts=synthetic_plan(total_commits),
+        cache=cache,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=50000, help="commits already on the remote branch")
+    parser.add_argument("--uploads", type=int, default=5, help="follow-up uploads of 364 commits each")
+    parser.add_argument("--depth", type=int, default=None, help="shallow clone depth for the cache")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as remote, tempfile.TemporaryDirectory() as cache_dir, \
+            tempfile.TemporaryDirectory() as seed_dir:
+        subprocess.run(["git", "init", "--bare", "-q", remote], check=True)
+        cache = RepoCache(root=cache_dir, depth=args.depth)
+        seed = upload(remote, RepoCache(root=seed_dir), args.history)
+        print(f"seeded remote with {args.history} commits in {seed:.2f}s")
+
+        cold = upload(remote, cache, 364)
+        warm = [upload(remote, cache, 364) for _ in range(args.uploads)]
+        print(f"cold upload (clone): {cold:.2f}s")
+        print(f"warm upload (fetch): {min(warm):.2f}s best, {sum(warm) / len(warm):.2f}s mean")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Measure rerun latency p50/p95 per interaction type.
+
+Part one times the post-editor stages (matrix -> dict -> graph -> diff -> totals) for the legacy
+full recompute vs the incremental GridPipeline. Part two drives the real app headless through
+streamlit's AppTest.
+
+    uv run python benchmarks/bench_rerun.py --samples 50
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC)
+
+from dates import current_window, subtract_date_dicts  # noqa: E402
+from grid import matrix_to_dict  # noqa: E402
+from pipeline import GridPipeline, RerunTimer  # noqa: E402
+import writer  # noqa: E402
+from writer import render_commit_graph  # noqa: E402
+
+
+def legacy_stages(matrix, api_dict, window):
+    counts = matrix_to_dict(matrix, window)
+    render_commit_graph(matrix)
+    submit = subtract_date_dicts(counts, api_dict)
+    return sum(counts.values()), sum(submit.values()), sum(counts.values()) > 0
+
+
+def pipeline_stages(pipeline, matrix, state):
+    pipeline.update(matrix)
+    if state.get("version") != pipeline.version:
+        render_commit_graph(pipeline.matrix)
+        state["version"] = pipeline.version
+    # the upload diff is the compiled plan now: design levels and fetched counts are different units
+    return pipeline.total, pipeline.plan.commits, pipeline.total > 0
+
+
+def print_summary(title, timer):
+    print(title)
+    for interaction, stats in timer.summary().items():
+        print(f"  {interaction:<12} n={stats['n']:<4} p50={stats['p50']:8.3f} ms  p95={stats['p95']:8.3f} ms")
+
+
+def bench_stages(samples: int):
+    rng = np.random.default_rng(0)
+    window = current_window()
+    api_dict = window.array_to_dict(rng.integers(0, 3, len(window)))
+    pipeline = GridPipeline(window)
+    pipeline.set_baseline(api_dict)
+    state = {}
+    matrix = rng.integers(0, 5, size=(7, 52))
+
+    legacy, incremental = RerunTimer(), RerunTimer()
+    for _ in range(samples):
+        edits = {
+            "no_change": matrix,
+            "cell_edit": matrix.copy(),
+            "random_fill": rng.integers(0, 5, size=(7, 52)),
+        }
+        edits["cell_edit"][rng.integers(7), rng.integers(52)] = rng.integers(5)
+        for interaction, edited in edits.items():
+            # neither side may profit from PNGs the other one rendered
+            writer._render_cache.clear()
+            legacy.start()
+            legacy_stages(edited, api_dict, window)
+            legacy.stop(interaction)
+            writer._render_cache.clear()
+            incremental.start()
+            pipeline_stages(pipeline, edited, state)
+            incremental.stop(interaction)
+            matrix = edited
+    print_summary("legacy full recompute", legacy)
+    print_summary("incremental pipeline", incremental)
+
+
+def bench_app(samples: int):
+    from streamlit.testing.v1 import AppTest
+
+    cwd = os.getcwd()
+    os.chdir(SRC)
+    try:
+        at = AppTest.from_file(os.path.abspath("app.py"), default_timeout=60).run()
+        timer = RerunTimer()
+        actions = {
+            "rerun": lambda: at.run(),
+            "random_fill": lambda: next(b for b in at.button if b.label == "Random Fill Contributions").click().run(),
+            "reset": lambda: next(b for b in at.button if b.label == "Reset Contributions").click().run(),
+        }
+        for _ in range(samples):
+            for interaction, action in actions.items():
+                timer.start()
+                action()
+                timer.stop(interaction)
+        print_summary("app reruns (AppTest)", timer)
+    finally:
+        os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--skip-app", action="store_true", help="only time the pipeline stages")
+    args = parser.parse_args()
+
+    bench_stages(args.samples)
+    if not args.skip_app:
+        bench_app(args.samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Memory load test: many concurrent app sessions in one process, and what each one costs.
+
+    uv run python benchmarks/bench_sessions.py --sessions 100
+    uv run python benchmarks/bench_sessions.py --sessions 50 --range "Last 10 years" --users 5
+
+Every session runs the app through streamlit's AppTest, fetches the history of one of a few users
+(served offline from the shared API client cache) and randomizes or stamps its design, the way
+real tabs diverge. Two numbers are reported per session:
+
+- state: bytes reachable from the session's state that no other session shares, i.e. what one
+  more session adds on top of the process-wide caches;
+- RSS: resident memory growth divided by the number of sessions, which also includes AppTest's
+  own bookkeeping (element trees of every run), so it is an upper bound.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import types
+
+import numpy as np
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC)
+
+from api_client import CachedResponse, default_client  # noqa: E402
+from dates import window_years_back  # noqa: E402
+
+SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def seed_histories(users: int, years: int) -> list:
+    # synthetic API responses in the client cache, so sessions "fetch" without the network
+    client = default_client()
+    rng = np.random.default_rng(0)
+    window = window_years_back(years)
+    names = [f"user{n}" for n in range(users)]
+    for name in names:
+        counts = rng.poisson(2, len(window))
+        contributions = [{"date": key, "count": int(c), "level": min(int(c), 4)} for key, c in zip(window.keys, counts)]
+        by_year = {}
+        for entry in contributions:
+            by_year.setdefault(entry["date"][:4], []).append(entry)
+        client._remember(client.url_for(name), CachedResponse(time.time(), {"contributions": contributions}),
+                         persist=False)
+        for year, entries in by_year.items():
+            client._remember(client.url_for(name, year), CachedResponse(time.time(), {"contributions": entries}),
+                             persist=False)
+    return names
+
+
+def session_state(at) -> dict:
+    state = at.session_state._state
+    return {key: state[key] for key in state.filtered_state}
+
+
+def reachable(roots, seen: set) -> int:
+    """Bytes of every object reachable from roots that is not in seen; adds what it visits to seen."""
+    total, stack = 0, list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SKIPPED_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource  # peak rather than current RSS, but still grows with the sessions
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_session(path: str, n: int, username: str, range_label: str):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(path, default_timeout=60).run()
+    if range_label != "Last year":
+        at.selectbox[0].set_value(range_label).run()
+    at.text_input(key="github_username").input(username)
+    next(b for b in at.button if b.label == "Submit").click().run()
+    if n % 2:
+        next(b for b in at.button if b.label == "Random Fill Contributions").click().run()
+    else:
+        at.text_input[1].input(f"hi {n}")
+        next(b for b in at.button if b.label == "Stamp Text").click().run()
+    return at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--users", type=int, default=5, help="distinct GitHub users the sessions look at")
+    parser.add_argument("--range", default="Last year", choices=["Last year", "Last 2 years", "Last 5 years", "Last 10 years"])
+    args = parser.parse_args()
+
+    years = 1 if args.range == "Last year" else int(args.range.split()[1])
+    names = seed_histories(args.users, years)
+    path = os.path.abspath(os.path.join(SRC, "app.py"))
+    cwd = os.getcwd()
+    os.chdir(SRC)
+    try:
+        reference = run_session(path, 0, names[0], args.range)  # warms every process-wide cache
+        gc.collect()
+        before = rss_bytes()
+        sessions = [run_session(path, n, names[n % len(names)], args.range) for n in range(1, args.sessions + 1)]
+        gc.collect()
+        after = rss_bytes()
+    finally:
+        os.chdir(cwd)
+
+    # objects the reference session can reach are shared by construction; count the rest per session
+    shared = set()
+    reachable(session_state(reference).values(), shared)
+    unique = [reachable(session_state(at).values(), set(shared)) for at in sessions]
+    keys = session_state(sessions[-1])
+    print(f"{args.sessions} sessions, {args.range}, {args.users} users")
+    print(f"  state per session:  mean {np.mean(unique) / 1024:8.1f} KB   max {max(unique) / 1024:8.1f} KB")
+    print(f"  RSS per session:    {(after - before) / args.sessions / 1024:8.1f} KB (includes AppTest harness)")
+    print(f"  session state keys: {', '.join(sorted(keys))}")
+    for key, value in sorted(keys.items()):
+        size = reachable([value], set(shared))
+        if size >= 1024:
+            print(f"    {key:<24} {size / 1024:8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
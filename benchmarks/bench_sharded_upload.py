@@ -0,0 +1,89 @@
+"""Sharded upload end to end against local bare repositories, against one serial upload.
+
+    uv run python benchmarks/bench_sharded_upload.py --years 5 --density 10 --repos 4
+    uv run python benchmarks/bench_sharded_upload.py --push-latency 1.0   # a slow remote, like GitHub
+    uv run python benchmarks/bench_sharded_upload.py --repos 3 --by date --broken   # shows the retry report
+
+Every repository is checked afterwards: the automated commits per day, summed over all targets,
+must equal the plan exactly. --broken adds a target whose remote doesn't exist, so its shard
+fails every attempt and the report lists the retries. --push-latency installs a pre-receive hook
+that holds every push for that many seconds, standing in for the network and server side of a
+real remote.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from dates import window_years_back  # noqa: E402
+from github_interaction import UPLOAD_BRANCH, branch_commit_counts, github_upload_commits  # noqa: E402
+from repo_cache import RepoCache  # noqa: E402
+from sharded_upload import SHARD_MODES, UploadTarget, retry_report, sharded_upload  # noqa: E402
+
+
+def bare_repo(root: str, name: str, push_latency: float = 0.0) -> str:
+    path = os.path.join(root, f"{name}.git")
+    subprocess.run(["git", "init", "--bare", "-q", path], check=True)
+    if push_latency:
+        hook = os.path.join(path, "hooks", "pre-receive")
+        with open(hook, "w") as f:
+            f.write(f"#!/bin/sh\ncat > /dev/null\nsleep {push_latency}\n")
+        os.chmod(hook, 0o755)
+    return path
+
+
+def pushed_counts(paths: list) -> Counter:
+    total = Counter()
+    for path in paths:
+        total.update(branch_commit_counts(path, UPLOAD_BRANCH))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--density", type=int, default=10, help="commits per day")
+    parser.add_argument("--repos", type=int, default=4)
+    parser.add_argument("--by", choices=SHARD_MODES, default="volume")
+    parser.add_argument("--max-pushes", type=int, default=2)
+    parser.add_argument("--broken", action="store_true", help="add a target that always fails")
+    parser.add_argument("--push-latency", type=float, default=0.0, help="seconds every push is held by the remote")
+    args = parser.parse_args()
+
+    plan = dict.fromkeys(window_years_back(args.years).keys, args.density)
+    total = sum(plan.values())
+    with tempfile.TemporaryDirectory() as root:
+        serial_repo = bare_repo(root, "serial", args.push_latency)
+        start = time.perf_counter()
+        github_upload_commits(f"file://{serial_repo}", "bench", "bench@example.com", "", plan,
+                              cache=RepoCache(root=os.path.join(root, "cache-serial")))
+        serial = time.perf_counter() - start
+        assert pushed_counts([serial_repo]) == Counter(plan), "serial upload doesn't match the plan"
+
+        repos = [bare_repo(root, f"shard-{n}", args.push_latency) for n in range(args.repos)]
+        targets = [UploadTarget(f"file://{path}") for path in repos]
+        if args.broken:
+            targets.append(UploadTarget(f"file://{os.path.join(root, 'missing.git')}"))
+        start = time.perf_counter()
+        results = sharded_upload(targets, "bench", "bench@example.com", "", plan, by=args.by,
+                                 max_pushes=args.max_pushes, retry_delay=0.1,
+                                 cache_root=os.path.join(root, "cache-sharded"))
+        sharded = time.perf_counter() - start
+
+        pushed = pushed_counts(repos)
+        if not args.broken:
+            assert pushed == Counter(plan), "sharded upload doesn't match the plan"
+
+    print(f"{total} commits over {len(plan)} days, {args.repos} repos, sharded by {args.by}")
+    print(f"  serial, one repo:      {serial:8.2f} s")
+    print(f"  sharded, {args.repos} repos:     {sharded:8.2f} s   ({sum(pushed.values())} commits verified)")
+    print(retry_report(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark text rasterization: legacy per-pixel overlay loop vs compiled glyph slice stamping.
+
+    uv run python benchmarks/bench_text.py --lengths 10 100 1000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from map import get_letter_map  # noqa: E402
+from writer import stamp_text  # noqa: E402
+
+
+def legacy_overlay(grid, text):
+    # the original apply_letter_overlay, generalised to the canvas width
+    letter_map = get_letter_map()
+    start_x, start_y = 2, 2
+    for letter in text.upper():
+        if letter in letter_map:
+            letter_grid = letter_map[letter]
+            for row in range(len(letter_grid)):
+                for col in range(len(letter_grid[row])):
+                    if letter_grid[row][col] == "#":
+                        x, y = start_x + col, start_y + row
+                        if 0 <= x < grid.shape[1] and 0 <= y < grid.shape[0]:
+                            grid[y, x] = max(0, grid[y, x] + 2)
+            start_x += 6
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ 0123456789"
+    print(f"{'chars':>6} {'weeks':>6} {'legacy (ms)':>12} {'stamped (ms)':>13} {'speedup':>8}")
+    for length in args.lengths:
+        text = (alphabet * (length // len(alphabet) + 1))[:length]
+        weeks = 6 * length + 4
+        grid = np.zeros((7, weeks), dtype=int)
+        assert (legacy_overlay(grid.copy(), text) == stamp_text(grid.copy(), text, x=2, y=2, level=2, add=True)).all()
+
+        legacy = min(timeit.repeat(lambda: legacy_overlay(grid.copy(), text), number=1, repeat=args.repeat)) * 1000
+        stamped = min(timeit.repeat(lambda: stamp_text(grid.copy(), text, x=2, y=2, level=2, add=True),
+                                    number=1, repeat=args.repeat)) * 1000
+        print(f"{length:>6} {weeks:>6} {legacy:>12.3f} {stamped:>13.3f} {legacy / stamped:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Offline benchmark suite for every hot path, with JSON baselines and regression gating.
+
+    uv run python benchmarks/suite.py                          # run and print timings
+    uv run python benchmarks/suite.py --save-baseline          # record .benchmarks/baseline.json
+    uv run python benchmarks/suite.py --compare --max-regression 0.25
+    uv run python benchmarks/suite.py -k upload --threshold upload_3640=0.5
+
+Timings are the median of `repeat` runs. --compare exits with status 1 when a case is slower than
+its baseline median by more than the allowed fraction.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Callable
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import numpy as np  # noqa: E402
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, SRC)
+
+import writer  # noqa: E402
+from bench_importtime import CORE_MODULES  # noqa: E402
+from dates import (  # noqa: E402
+    convert_api_response_to_dict,
+    current_window,
+    safe_date_dict_merge,
+    subtract_date_dicts,
+    year_dict,
+)
+from design_file import Design, decode_design, encode_design  # noqa: E402
+from github_interaction import github_upload_commits  # noqa: E402
+from grid import dict_to_matrix, matrix_to_dict  # noqa: E402
+from patterns import PATTERNS, generate  # noqa: E402
+from planner import plan_commits  # noqa: E402
+from repo_cache import RepoCache  # noqa: E402
+from timing import span  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "..", ".benchmarks", "baseline.json")
+UPLOAD_DENSITIES = (1, 10, 50)  # commits per day over the 364 day window
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable
+    repeat: int = 20
+    number: int = 1  # calls per sample; raise for sub-millisecond cases to beat timer noise
+    setup: Callable | None = None  # called before every run, outside the timed region
+
+
+def build_cases() -> list:
+    rng = np.random.default_rng(0)
+    import_env = dict(os.environ, PYTHONPATH=SRC, MPLBACKEND="Agg")
+    window = current_window()
+    matrix = rng.integers(0, 5, size=(7, 52))
+    date_dict = matrix_to_dict(matrix, window)
+    api_dict = window.array_to_dict(rng.integers(0, 3, len(window)))
+    history = window.dict_to_array(api_dict)
+    design = Design(window, window.from_matrix(matrix))
+    design_bytes = encode_design(design)
+    response = {"contributions": [{"date": k, "count": v, "level": min(v, 4)} for k, v in api_dict.items()]}
+
+    def render_fresh():
+        # a grid never rendered before, so the PNG cache can't help
+        writer._render_cache.clear()
+        writer.render_commit_graph(rng.integers(0, 5, size=(7, 52)), backend="matplotlib")
+
+    def raster_fresh():
+        writer._render_cache.clear()
+        writer.render_commit_graph(rng.integers(0, 5, size=(7, 52)), backend="raster")
+
+    def svg_fresh():
+        writer._render_cache.clear()
+        writer.render_commit_graph(rng.integers(0, 5, size=(7, 52)), backend="svg")
+
+    def pattern_gallery():
+        # one gallery's worth of candidates of every pattern
+        for pattern in PATTERNS:
+            generate(pattern, window, count=6, seed=0)
+
+    def disabled_spans():
+        # instrumentation cost with recording off, per 1000 spans
+        for _ in range(1000):
+            with span("bench"):
+                pass
+
+    def cold_import():
+        # a fresh interpreter importing every core module, as an app container does on start
+        subprocess.run([sys.executable, "-c", f"import {', '.join(CORE_MODULES)}"], check=True, env=import_env)
+
+    def plot_and_savefig():
+        fig = writer.plot_commit_graph(matrix)
+        fig.savefig(BytesIO(), format="png")
+
+    cases = [
+        Case("year_dict", lambda: year_dict(window), number=100),
+        Case("dict_to_matrix", lambda: dict_to_matrix(date_dict, window), number=100),
+        Case("matrix_to_dict", lambda: matrix_to_dict(matrix, window), number=100),
+        Case("convert_api_response_to_dict", lambda: convert_api_response_to_dict(response), number=100),
+        Case("safe_date_dict_merge", lambda: safe_date_dict_merge(dict(date_dict), api_dict), number=100),
+        Case("subtract_date_dicts", lambda: subtract_date_dicts(date_dict, api_dict), number=100),
+        Case("plan_commits", lambda: plan_commits(window, window.from_matrix(matrix), history), number=20),
+        Case("design_encode", lambda: encode_design(design), number=100),
+        Case("design_decode", lambda: decode_design(design_bytes), number=100),
+        Case("pattern_gallery", pattern_gallery, number=10),
+        Case("span_disabled_x1000", disabled_spans, number=10),
+        Case("import_core_cold", cold_import, repeat=5),
+        Case("plot_commit_graph_savefig", plot_and_savefig, repeat=10),
+        Case("render_commit_graph_miss", render_fresh, repeat=10),
+        Case("render_commit_graph_hit", lambda: writer.render_commit_graph(matrix), number=100),
+        Case("render_raster_miss", raster_fresh, number=20),
+        Case("render_svg_miss", svg_fresh, number=20),
+    ]
+
+    for density in UPLOAD_DENSITIES:
+        cases.append(upload_case(density, window))
+    cases.append(upload_case(UPLOAD_DENSITIES[-1], window, repeat_upload=True))
+    return cases
+
+
+def upload_case(density: int, window, repeat_upload: bool = False) -> Case:
+    """github_upload_commits end to end against a fresh local bare repository per run.
+
+    With repeat_upload the plan is already on the branch, so the run measures the scan that finds
+    nothing is missing.
+    """
+    plan = dict.fromkeys(window.keys, density)
+    state = {}
+
+    def upload():
+        github_upload_commits(
+            REPO_URL=f"file://{state['remote'].name}",
+            GIT_USERNAME="bench",
+            GIT_EMAIL="bench@example.com",
+            GITHUB_TOKEN="",
+            commit_date_counts=plan,
+            cache=RepoCache(root=state["cache"].name),
+        )
+
+    def setup():
+        state["remote"] = tempfile.TemporaryDirectory()
+        state["cache"] = tempfile.TemporaryDirectory()
+        subprocess.run(["git", "init", "--bare", "-q", state["remote"].name], check=True)
+        if repeat_upload:
+            upload()
+
+    def run():
+        try:
+            upload()
+        finally:
+            state["remote"].cleanup()
+            state["cache"].cleanup()
+
+    name = f"upload_{density * len(window)}" + ("_repeat" if repeat_upload else "")
+    return Case(name, run, repeat=3, setup=setup)
+
+
+def time_case(case: Case) -> dict:
+    samples = []
+    for _ in range(case.repeat):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        for _ in range(case.number):
+            case.run()
+        samples.append((time.perf_counter() - start) * 1000 / case.number)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples), "repeat": case.repeat,
+            "number": case.number}
+
+
+def compare(results: dict, baseline: dict, max_regression: float, thresholds: dict) -> list:
+    """Return (name, baseline ms, current ms, change) for every case slower than its threshold."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["median_ms"], result["median_ms"]
+        change = after / before - 1 if before else 0.0
+        if change > thresholds.get(name, max_regression):
+            regressions.append((name, before, after, change))
+    return regressions
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="keyword", help="only run cases whose name contains this substring")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="fail on regressions against the baseline")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline median (default 0.25)")
+    parser.add_argument("--threshold", action="append", default=[], metavar="CASE=FRACTION",
+                        help="per-case override of --max-regression, repeatable")
+    parser.add_argument("--output", help="also write the results JSON here")
+    args = parser.parse_args(argv)
+
+    thresholds = {name: float(value) for name, value in (item.split("=", 1) for item in args.threshold)}
+    cases = [case for case in build_cases() if not args.keyword or args.keyword in case.name]
+
+    results = {}
+    print(f"{'case':<30} {'median (ms)':>12} {'min (ms)':>10}")
+    for case in cases:
+        results[case.name] = time_case(case)
+        print(f"{case.name:<30} {results[case.name]['median_ms']:>12.3f} {results[case.name]['min_ms']:>10.3f}")
+
+    document = {"machine": platform.platform(), "python": platform.python_version(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+
+    status = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.max_regression, thresholds)
+        for name, before, after, change in regressions:
+            print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms (+{change:.0%})")
+        status = 1 if regressions else 0
+
+    if args.save_baseline:
+        if args.keyword and os.path.exists(args.baseline):
+            # a filtered run only refreshes the cases it ran
+            with open(args.baseline) as f:
+                document["results"] = {**json.load(f)["results"], **results}
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
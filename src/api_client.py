@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable
+
+from timing import span
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://github-contributions-api.jogruber.de/v4"
+DEFAULT_TTL = 15 * 60  # seconds a response is served without revalidation
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_WORKERS = 4
+
+
+@dataclass
+class CachedResponse:
+    fetched_at: float
+    body: dict
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class ContributionsClient:
+    """Client for the GitHub Contributions API with a pooled session and a TTL + LRU response cache.
+
+    Stale entries are revalidated with ETag / Last-Modified, so an unchanged response costs a 304.
+
+    Args:
+        base_url (str, optional): API root. Defaults to the public github-contributions-api.
+        ttl (float, optional): Seconds a cached response is served without revalidation.
+        max_entries (int, optional): In-memory cache size; least recently used entries are dropped.
+        cache_dir (str, optional): Directory for an on-disk copy of the cache. Disabled when None.
+        max_workers (int, optional): Upper bound on concurrent requests in fetch_many.
+        timeout (float, optional): Per-request timeout in seconds.
+    """
+
+    def __init__(self, base_url: str = API_URL, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 cache_dir: str | None = None, max_workers: int = DEFAULT_MAX_WORKERS, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self._session = None
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def session(self):
+        # requests is only imported, and the pool built, on the first request that misses the cache
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def url_for(self, username: str, year: str = "last") -> str:
+        return f"{self.base_url}/{username}?y={year}"
+
+    def _disk_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _lookup(self, url: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is not None:
+                self._cache.move_to_end(url)
+                return entry
+        if self.cache_dir and os.path.exists(self._disk_path(url)):
+            try:
+                with open(self._disk_path(url)) as f:
+                    entry = CachedResponse(**json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                logger.debug(f"Ignoring unreadable cache file for {url}: {e}")
+                return None
+            self._remember(url, entry, persist=False)
+            return entry
+        return None
+
+    def _remember(self, url: str, entry: CachedResponse, persist: bool = True) -> None:
+        with self._lock:
+            self._cache[url] = entry
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        if persist and self.cache_dir:
+            tmp_path = self._disk_path(url) + f".{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry.__dict__, f)
+            os.replace(tmp_path, self._disk_path(url))
+
+    def fetch(self, username: str, year: str = "last") -> dict:
+        """Fetch one year of contributions for username, served from cache while fresh.
+
+        Returns:
+            dict: Decoded API response. When the request fails this is the stale cached response
+                if there is one, else {}.
+        """
+        url = self.url_for(username, year)
+        entry = self._lookup(url)
+        if entry is not None and time.time() - entry.fetched_at < self.ttl:
+            return entry.body
+
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        import requests
+
+        try:
+            with span("api.fetch", year=year):
+                resp = self.session.get(url, headers=headers, timeout=self.timeout)
+            if resp.status_code == 304 and entry is not None:
+                entry = CachedResponse(time.time(), entry.body, entry.etag, entry.last_modified)
+                self._remember(url, entry)
+                return entry.body
+            body = resp.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            if entry is not None:
+                age = time.time() - entry.fetched_at
+                logger.warning(f"Error fetching data from GitHub Contributions API, "
+                               f"serving the response cached {age:.0f}s ago: {e}")
+                return entry.body
+            logger.error(f"Error fetching data from GitHub Contributions API: {e}")
+            return {}
+
+        # error bodies (unknown user, rate limits) are returned but never cached
+        if resp.ok:
+            self._remember(url, CachedResponse(time.time(), body, resp.headers.get("ETag"),
+                                               resp.headers.get("Last-Modified")))
+        return body
+
+    def fetch_many(self, jobs: Iterable[tuple]) -> dict:
+        """Fetch several (username, year) pairs concurrently on a bounded thread pool.
+
+        Returns:
+            dict: (username, year) : decoded API response
+        """
+        jobs = list(dict.fromkeys(jobs))
+        if not jobs:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            results = pool.map(lambda job: self.fetch(*job), jobs)
+            return dict(zip(jobs, results))
+
+    def fetch_years(self, username: str, years: Iterable) -> dict:
+        """Fetch several years for one user concurrently; returns year : decoded API response."""
+        results = self.fetch_many((username, str(year)) for year in years)
+        return {year: body for (_, year), body in results.items()}
+
+
+_default_client = None
+
+
+def default_client() -> ContributionsClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = ContributionsClient(cache_dir=os.environ.get("GITHUB_GRAPH_API_CACHE_DIR"))
+    return _default_client
@@ -3,18 +3,28 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import logging
-import matplotlib.pyplot as plt
-from io import BytesIO
+import os
+import time
 
-from writer import plot_commit_graph
-from grid import dict_to_matrix, matrix_to_dict, df_to_matrix
-from dates import year_dict, github_contribution_api, convert_api_response_to_dict, safe_date_dict_merge, subtract_date_dicts
-from github_interaction import github_upload_commits
+from writer import stamp_text
+from grid import df_to_matrix
+from importer import image_to_grid
+from design_file import FILE_EXTENSION, Design, decode_design, encode_design
+from design_library import default_design_library, render_thumbnail
+from patterns import PATTERNS, generate
+from canvas import history_canvas
+from dates import current_window, window_for_year, window_years_back
+from upload_jobs import default_upload_manager
+from sharded_upload import retry_report
+from pipeline import GridPipeline, default_rerun_timer
+from timing import SpanCollector, summarize
 
-# logging.basicConfig(
-#     level=logging.DEBUG,
-#     format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-# )
+# GITHUB_GRAPH_LOG_LEVEL=DEBUG also logs every timing span as a JSON record
+logging.basicConfig(
+    level=os.environ.get("GITHUB_GRAPH_LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+)
+logger = logging.getLogger("app")
 
 # # Streamlit app
 #st.sidebar.image("docs/contribution_icon.PNG", width='stretch')
@@ -26,11 +36,55 @@ st.set_page_config(layout="wide")
 ## Data Structure : Dict of Dates to Counts
 DAYS = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
 
-if "commit_date_counts" not in st.session_state:
-    print('Initializing blank year of commits')
-    st.session_state.commit_date_counts = year_dict()
-    st.session_state.commit_matrix = dict_to_matrix(st.session_state.commit_date_counts)
-    st.session_state.commit_df = pd.DataFrame(st.session_state.commit_matrix[:,:], index=DAYS)  # exclude empty top row
+# rerun latency, bucketed by what triggered the rerun and pooled across sessions
+rerun_started = time.perf_counter()
+interaction = "rerun"
+
+# stage timings are only recorded for the sessions whose performance panel asks for them (and for
+# every session with GITHUB_GRAPH_TIMING=1); the flag lives on this rerun's collector, not the process
+record_timings = bool(st.session_state.get("record_timings"))
+rerun_spans = SpanCollector(enabled=record_timings).start()
+
+# Per-session state is kept to the pipeline (design levels plus a reference to the shared, read-only
+# history) and the editor's starting grid as one uint8 matrix. Everything immutable -- calendar
+# windows, glyphs, API responses, histories, rendered images -- lives in process-wide caches.
+def set_editor(matrix) -> None:
+    # the data editor restarts from this grid; its DataFrame is rebuilt from it on every rerun.
+    # Streamlit keeps a keyed editor's pending cell edits for as long as its identity holds and
+    # replays them onto new data, so a new grid also gets a new editor key.
+    st.session_state.editor_levels = np.clip(np.asarray(matrix), 0, 4).astype(np.uint8)
+    st.session_state.editor_version = st.session_state.get("editor_version", 0) + 1
+
+
+## Date Range: the last year, several years back, or a calendar year
+this_year = datetime.now().year
+range_label = st.sidebar.selectbox(
+    "Date range",
+    ["Last year", "Last 2 years", "Last 5 years", "Last 10 years"] + [str(y) for y in range(this_year, this_year - 5, -1)],
+)
+
+# resolve the calendar window once per rerun so every conversion agrees on the dates
+if range_label == "Last year":
+    window = current_window()
+elif range_label.startswith("Last"):
+    window = window_years_back(int(range_label.split()[1]))
+else:
+    window = window_for_year(int(range_label))
+
+# the pipeline holds the design and keeps its upload diff and totals up to date incrementally
+if "pipeline" not in st.session_state:
+    logger.info('Initializing blank year of commits')
+    st.session_state.pipeline = GridPipeline(window)
+    set_editor(st.session_state.pipeline.matrix)
+elif (st.session_state.pipeline.window.start, st.session_state.pipeline.window.end) != (window.start, window.end):
+    # range changed (or a new week started): carry over the overlapping part of the design
+    interaction = "range_change"
+    previous = st.session_state.pipeline
+    st.session_state.pipeline = GridPipeline(window)
+    st.session_state.pipeline.set_baseline(previous.baseline.to_dict())
+    st.session_state.pipeline.load(previous.canvas.to_dict())
+    set_editor(st.session_state.pipeline.matrix)
+pipeline = st.session_state.pipeline
 
 ## User Input Variables
 # Github Username
@@ -38,20 +92,18 @@ with st.sidebar.form("github_username_form", clear_on_submit=False):
     username = st.text_input(label="Your GitHub Username",key="github_username", on_change=None)
     submitted = st.form_submit_button("Submit")
 
-if "api_date_dict" not in st.session_state:
-    st.session_state.api_date_dict = {}
 if submitted and st.session_state.github_username:
     with st.spinner("Pulling commit history..."):
-        response = github_contribution_api(st.session_state.github_username)
-        if 'error' in response:
+        # one read-only history per user and range, shared by every session that asks for it
+        history = history_canvas(st.session_state.github_username, window)
+        if history is None:
             st.toast(f"Failed to fetch data for user: {st.session_state.github_username}. Please check the username and try again.", icon="❌")
-        elif response != {}:
-            st.session_state.api_date_dict = convert_api_response_to_dict(response) 
-            st.toast(f"Successfully pulled {sum(st.session_state.api_date_dict.values())} for user: {st.session_state.github_username}", icon="✅")
-            st.session_state.commit_date_counts = safe_date_dict_merge(st.session_state.commit_date_counts, st.session_state.api_date_dict)
-            st.session_state.commit_matrix = dict_to_matrix(st.session_state.commit_date_counts)
-            st.session_state.commit_df = pd.DataFrame(st.session_state.commit_matrix[:,:], index=DAYS)  # exclude empty top row
-            print(f'API Pulled Commits: {sum(st.session_state.api_date_dict.values())}')
+        else:
+            interaction = "api_fetch"
+            st.toast(f"Successfully pulled {history.total} for user: {st.session_state.github_username}", icon="✅")
+            pipeline.merge_history(history)
+            set_editor(pipeline.matrix)
+            logger.info(f'API Pulled Commits: {history.total}')
 
 with st.sidebar.container(border=False):
 
@@ -59,28 +111,129 @@ with st.sidebar.container(border=False):
     v1, v2 = st.columns(2,gap='small')
     with v1:
         if st.button("Random Fill Contributions"):
-            print('Generating random contributions')
-            st.session_state.commit_df = pd.DataFrame(
-                np.random.randint(0, 4, size=(7, 52))
-            )
+            interaction = "random_fill"
+            logger.info('Generating random contributions')
+            set_editor(window.to_matrix(generate("random", window)[0]))
 
     # reset commit graph data
     with v2:
         if st.button("Reset Contributions"):
-            print('Resetting contribution graph to zero')
-            st.session_state.commit_df = pd.DataFrame([
-                [0]*52 for _ in range(7)
-            ])
-            st.session_state.commit_date_counts = year_dict()
-            st.session_state.api_date_dict = {}
+            interaction = "reset"
+            logger.info('Resetting contribution graph to zero')
+            set_editor(np.zeros((7, window.weeks)))
+            pipeline.set_baseline({})
+
+    # step through every design change (edits, fills, stamps, imports, fetched history), also from the keyboard
+    # set_editor starts a fresh editor, so the cell edit just undone isn't replayed from the widget
+    h1, h2 = st.columns(2, gap='small')
+    with h1:
+        if st.button("Undo", shortcut="Mod+Z") and pipeline.undo():
+            interaction = "undo"
+            set_editor(pipeline.matrix)
+    with h2:
+        if st.button("Redo", shortcut="Mod+Shift+Z") and pipeline.redo():
+            interaction = "redo"
+            set_editor(pipeline.matrix)
+
+## Type Text
+with st.sidebar.form("type_text_form", clear_on_submit=False):
+    text = st.text_input(label="Type text onto the graph", max_chars=64)
+    t1, t2 = st.columns(2, gap='small')
+    text_level = t1.slider("Intensity", min_value=1, max_value=4, value=4)
+    text_week = t2.number_input("Start week", min_value=0, max_value=window.weeks - 1, value=1, step=1)
+    if st.form_submit_button("Stamp Text") and text:
+        interaction = "type_text"
+        logger.info(f'Stamping text: {text}')
+        set_editor(stamp_text(pipeline.matrix, text, x=int(text_week), y=1, level=text_level))
+
+## Pattern Gallery
+# candidates are regenerated from (pattern, seed) in one batch on every rerun, so only the widget
+# values live in session state, never the candidates or their thumbnails
+GALLERY_SIZE = 6
+with st.sidebar.expander("Pattern gallery"):
+    g1, g2 = st.columns(2, gap='small')
+    gallery_pattern = g1.selectbox("Pattern", list(PATTERNS), key="gallery_pattern")
+    st.session_state.setdefault("gallery_seed", 0)  # "Shuffle" steps it, so it starts in session state
+    gallery_seed = g2.number_input("Seed", min_value=0, step=1, key="gallery_seed")
+    g3, g4 = st.columns(2, gap='small')
+    show_gallery = g3.toggle("Show previews", key="gallery_open")
+    g4.button("Shuffle", on_click=lambda: st.session_state.update(gallery_seed=st.session_state.gallery_seed + 1))
+    if show_gallery:
+        # "activity" samples the weekday odds of the fetched history
+        params = {"history": pipeline.baseline.values} if gallery_pattern == "activity" else {}
+        candidates = generate(gallery_pattern, window, count=GALLERY_SIZE, seed=int(gallery_seed), **params)
+        gallery = st.columns(2, gap='small')
+        for n, levels in enumerate(candidates):
+            with gallery[n % 2]:
+                st.image(render_thumbnail(Design(window, levels)), width="stretch")
+                if st.button("Use", key=f"gallery_use_{n}"):
+                    interaction = "pattern"
+                    logger.info(f'Using {gallery_pattern} pattern {n} of seed {gallery_seed}')
+                    set_editor(window.to_matrix(levels))
+
+## Import Image
+with st.sidebar.form("image_import_form", clear_on_submit=False):
+    image_file = st.file_uploader("Import an image onto the graph", type=["png", "jpg", "jpeg", "gif", "bmp", "webp"])
+    i1, i2 = st.columns(2, gap='small')
+    image_dither = i1.checkbox("Dither")
+    image_invert = i2.checkbox("Invert")
+    if st.form_submit_button("Import Image") and image_file is not None:
+        interaction = "image_import"
+        logger.info(f'Importing image: {image_file.name}')
+        try:
+            set_editor(image_to_grid(image_file, window.weeks, dither=image_dither, invert=image_invert))
+        except (OSError, ValueError) as e:
+            st.toast(f"Could not read image {image_file.name}: {e}", icon="❌")
+
+## Design Library
+# saved designs live in a local SQLite library shared by every session; loading is an undoable edit
+library = default_design_library()
+with st.sidebar.expander("Design library"):
+    with st.form("save_design_form", clear_on_submit=False):
+        design_name = st.text_input("Design name", max_chars=80)
+        design_tags = st.text_input("Tags", placeholder="comma separated")
+        if st.form_submit_button("Save Design") and design_name.strip():
+            interaction = "design_save"
+            library.save(design_name, Design(window, pipeline.values), tags=design_tags.split(","))
+            st.toast(f"Saved design {design_name.strip()}", icon="✅")
+
+    s1, s2 = st.columns(2, gap='small')
+    design_search = s1.text_input("Find by name")
+    design_tag = s2.selectbox("Tag", [""] + library.tags(), format_func=lambda tag: tag or "Any tag")
+    in_range = st.checkbox("Only designs overlapping this date range")
+    entries = library.search(name=design_search or None, tag=design_tag or None,
+                             start=window.start if in_range else None, end=window.end if in_range else None)
+    entry = st.selectbox(f"Saved designs ({len(entries)} shown)", entries, index=None, format_func=str,
+                         placeholder="Choose a design")
+    if entry is not None:
+        st.image(library.thumbnail(entry.id), caption=", ".join(entry.tags) or None)
+        b1, b2, b3 = st.columns(3, gap='small')
+        if b1.button("Load"):
+            interaction = "design_load"
+            logger.info(f'Loading design: {entry.name}')
+            set_editor(window.to_matrix(library.load(entry.id).levels_on(window)))
+        b2.download_button("File", data=library.data(entry.id), file_name=f"{entry.name}{FILE_EXTENSION}",
+                           mime="application/octet-stream")
+        if b3.button("Delete"):
+            library.delete(entry.id)
+            st.rerun()
+
+    design_upload = st.file_uploader("Open a design file", type=[FILE_EXTENSION.lstrip(".")])
+    if design_upload is not None and st.button("Open Design File"):
+        interaction = "design_load"
+        try:
+            set_editor(window.to_matrix(decode_design(design_upload.getvalue()).levels_on(window)))
+        except ValueError as e:
+            st.toast(f"Could not read design {design_upload.name}: {e}", icon="❌")
 
 ## Editable DataFrame
-st.write("Manually add contributions (0-4) for each day in the grid below")
+st.write("Manually set the contribution level (0-4) for each day in the grid below")
 
-## display editable dataframe
-st.session_state.interactive_commit_df = st.data_editor(
-    st.session_state.commit_df,
-    key="contribution_grid",
+## display editable dataframe; identical bytes and key every rerun keep the editor's identity and its edits
+editor_df = pd.DataFrame(st.session_state.editor_levels, index=DAYS)
+edited_df = st.data_editor(
+    editor_df,
+    key=f"contribution_grid_{st.session_state.get('editor_version', 0)}",
     hide_index=True,
     column_config={
         col: st.column_config.NumberColumn(
@@ -89,81 +242,145 @@ st.session_state.interactive_commit_df = st.data_editor(
             step=1,
             width="small",
             disabled=False
-        ) for col in st.session_state.commit_df.columns
+        ) for col in editor_df.columns
     }
 )
 
 ## Display Commit Graph
 
-# convert df to np array expected in plot_commit_graph
-st.session_state.commit_matrix = df_to_matrix(st.session_state.interactive_commit_df)
-
-# convert df back to dict of date: counts
-st.session_state.commit_date_counts = matrix_to_dict(st.session_state.commit_matrix)
+# convert df to np array and patch only the cells that changed into the pipeline
+if pipeline.update(df_to_matrix(edited_df)) and interaction == "rerun":
+    interaction = "cell_edit"
 
-# plot the committed data
-fig = plot_commit_graph(st.session_state.commit_matrix)
-st.pyplot(fig)
+# plot the committed data one year-sized tile at a time; images come from the process-wide render
+# caches, so an unchanged graph costs a hash lookup and no session keeps its own copy of the bytes
+graph_tiles = pipeline.canvas.render_tiles()
+for tile, tile_png in reversed(graph_tiles):
+    caption = f"{tile.start:%b %d, %Y} – {tile.end:%b %d, %Y}" if len(graph_tiles) > 1 else None
+    st.image(tile_png, caption=caption, width="stretch")
 
 ## Download Plot
-# convert fig to png for download
-buf = BytesIO()
-fig.savefig(buf, format='png')
-
-st.sidebar.download_button(
+d1, d2 = st.sidebar.columns(2, gap='small')
+d1.download_button(
     label="Download Graph",
-    data=buf.getvalue(),
+    data=pipeline.canvas.render_png(),
     file_name="contribution_graph.png",
     mime="image/png"
 )
-
-## Prepare Commits
-st.session_state.submit_commit_date_count = subtract_date_dicts(dict1=st.session_state.commit_date_counts, 
-                                                                dict2=st.session_state.api_date_dict)
+d2.download_button(
+    label="Download SVG",
+    data=pipeline.canvas.render_svg(),
+    file_name="contribution_graph.svg",
+    mime="image/svg+xml"
+)
+st.sidebar.download_button(
+    label="Download Design File",
+    data=encode_design(Design(window, pipeline.values)),
+    file_name=f"contribution_graph{FILE_EXTENSION}",
+    mime="application/octet-stream"
+)
 
 ## Metrics Display
 with st.sidebar.container(border=False):
 
     # random fill toggle
     l1, l2 = st.sidebar.columns(2,gap='small')
-    l1.metric(label="Total Contributions", value=sum(st.session_state.commit_date_counts.values()))
-    l2.metric(label="Manually Added", value=sum(st.session_state.submit_commit_date_count.values()))
+    l1.metric(label="Total Contributions", value=pipeline.baseline_total + pipeline.plan.commits)
+    l2.metric(label="Manually Added", value=pipeline.plan.commits)
+
+    # what the upload will push: levels compiled into the fewest commits against the fetched history
+    plan = pipeline.plan
+    st.sidebar.caption(f"Upload plan: {plan.commits} commits over {plan.days} days, {plan.objects} git objects pushed")
+    if plan.unreachable:
+        st.sidebar.caption(f"⚠️ {plan.unreachable} days can't show their chosen shade given the existing history")
+    edits = pipeline.history
+    st.sidebar.caption(f"Edit history: step {edits.step - edits.first} of {edits.last - edits.first} ({edits.nbytes / 1024:.1f} KB)")
 
 ## Upload to Gitlab
 #st.sidebar.subheader("Upload to GitHub Repository")
 
-if sum(st.session_state.commit_date_counts.values()) > 0:
+# uploads run as background jobs; only the job id lives in session state, so reruns never block
+uploads = default_upload_manager()
+upload_job = uploads.get(st.session_state.get("upload_job_id"))
+upload_running = upload_job is not None and not upload_job.finished
+
+if pipeline.plan.commits > 0:
     # check to see if streamlit secrets are set
     try:
-        if "GITHUB_USERNAME" in st.secrets and "GITHUB_EMAIL" in st.secrets and "GITHUB_TOKEN" in st.secrets and "REPO_URL" in st.secrets:
+        if "GITHUB_USERNAME" in st.secrets and "GITHUB_EMAIL" in st.secrets and "GITHUB_TOKEN" in st.secrets and ("REPO_URL" in st.secrets or "REPO_URLS" in st.secrets):
             
-            # upload button and trigger github upload push
-            if st.sidebar.button("Upload to Github Repository"):
-                with st.spinner("Generating commits..."):
-
-                    # Calculate the commits to submit: user modifications (current - api)
-                    st.session_state.submit_commit_date_count = subtract_date_dicts(
-                        dict1=st.session_state.commit_date_counts, 
-                        dict2=st.session_state.api_date_dict
-                    )
-
-                    # Pull secrets from expected streamlit secrets under .streamlit/secrets.toml
-                    GIT_USERNAME = st.secrets["GITHUB_USERNAME"]
-                    GIT_EMAIL = st.secrets["GITHUB_EMAIL"]
-                    GITHUB_TOKEN = st.secrets["GITHUB_TOKEN"]
-                    github_upload_commits(GITHUB_TOKEN=GITHUB_TOKEN,
-                                        GIT_USERNAME=GIT_USERNAME,
-                                        GIT_EMAIL=GIT_EMAIL,
-                                        REPO_URL=st.secrets["REPO_URL"],
-                                        commit_date_counts=st.session_state.submit_commit_date_count)
-                    st.sidebar.success("Commits uploaded successfully!", icon="✅")
+            # upload button queues a github upload job; resubmitting the same plan resumes from its checkpoint
+            if st.sidebar.button("Upload to Github Repository", disabled=upload_running):
+                interaction = "upload"
+
+                # Pull secrets from expected streamlit secrets under .streamlit/secrets.toml
+                GIT_USERNAME = st.secrets["GITHUB_USERNAME"]
+                GIT_EMAIL = st.secrets["GITHUB_EMAIL"]
+                GITHUB_TOKEN = st.secrets["GITHUB_TOKEN"]
+                if st.secrets.get("REPO_URLS"):
+                    # several "url#branch" targets: the plan is sharded and pushed to all of them in parallel
+                    st.session_state.upload_job_id = uploads.submit_sharded(list(st.secrets["REPO_URLS"]),
+                                                                            GIT_USERNAME=GIT_USERNAME,
+                                                                            GIT_EMAIL=GIT_EMAIL,
+                                                                            GITHUB_TOKEN=GITHUB_TOKEN,
+                                                                            commit_date_counts=pipeline.submit_commit_date_count,
+                                                                            baseline=pipeline.upload_baseline,
+                                                                            record_timings=record_timings)
+                else:
+                    st.session_state.upload_job_id = uploads.submit(GITHUB_TOKEN=GITHUB_TOKEN,
+                                                                    GIT_USERNAME=GIT_USERNAME,
+                                                                    GIT_EMAIL=GIT_EMAIL,
+                                                                    REPO_URL=st.secrets["REPO_URL"],
+                                                                    commit_date_counts=pipeline.submit_commit_date_count,
+                                                                    baseline=pipeline.upload_baseline,
+                                                                    record_timings=record_timings)
+                upload_running = True
         else:
-            st.sidebar.warning("GitHub credentials not found in Streamlit secrets. Please add GITHUB_USERNAME, GITHUB_EMAIL, GITHUB_TOKEN, and REPO_URL to .streamlit/secrets.toml", icon="⚠️")
+            st.sidebar.warning("GitHub credentials not found in Streamlit secrets. Please add GITHUB_USERNAME, GITHUB_EMAIL, GITHUB_TOKEN, and REPO_URL (or REPO_URLS) to .streamlit/secrets.toml", icon="⚠️")
     except:
         st.sidebar.warning("Please ensure Github credentials are properly configured in .streamlit/secrets.toml", icon="⚠️")
 else:
     st.sidebar.info("Add at least one contribution required to enable upload to Github Repository.", icon="ℹ️")
 
 
+# poll the running job once a second without rerunning the whole script
+@st.fragment(run_every=1.0 if upload_running else None)
+def upload_progress():
+    job = uploads.get(st.session_state.get("upload_job_id"))
+    if job is None:
+        return
+    if not job.finished:
+        st.progress(job.fraction, text=f"Upload {job.phase}: {job.committed}/{job.total} commits")
+        if st.button("Cancel Upload"):
+            uploads.cancel(job.id)
+            st.caption("Cancelling after the current batch...")
+    elif upload_running:
+        # finished since the last full run: rerun once to stop polling and show the result
+        st.rerun()
+    elif job.status == "done":
+        st.success(f"Uploaded {job.total} commits successfully!", icon="✅")
+    elif job.status == "cancelled":
+        st.warning(f"Upload cancelled after {job.committed}/{job.total} commits. Upload again to resume.", icon="⚠️")
+    else:
+        st.error(f"Upload failed after {job.committed}/{job.total} commits: {job.error}. Upload again to resume.", icon="❌")
+    if job.finished and job.shards:
+        with st.expander("Shard report"):
+            st.code(retry_report(job.shards), language=None)
+
 
+with st.sidebar:
+    upload_progress()
 
+## Rerun latency per interaction type and stage timings of this rerun and the last upload
+timer = default_rerun_timer()
+timer.record(interaction, (time.perf_counter() - rerun_started) * 1000)
+rerun_spans.stop()
+with st.sidebar.expander("Performance"):
+    st.caption("Rerun latency across sessions (ms)")
+    st.dataframe(pd.DataFrame(timer.summary()).T.round(2), width="stretch")
+    if st.checkbox("Record stage timings", key="record_timings"):
+        st.caption(f"This rerun ({interaction})")
+        st.dataframe(pd.DataFrame(rerun_spans.summary()).T.round(2), width="stretch")
+        if upload_job is not None:
+            st.caption(f"Upload {upload_job.id} ({upload_job.status})")
+            st.dataframe(pd.DataFrame(summarize(list(upload_job.spans.records))).T.round(2), width="stretch")
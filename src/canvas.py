@@ -0,0 +1,199 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from io import BytesIO
+from typing import Iterator
+
+import numpy as np
+from PIL import Image
+
+from dates import (
+    WEEKS,
+    CalendarWindow,
+    calendar_window,
+    contributions_to_array,
+    github_contribution_api,
+    github_contribution_years,
+    last_saturday,
+)
+from raster import graph_layout
+from writer import render_commit_graph
+
+logger = logging.getLogger(__name__)
+
+COUNT_DTYPE = np.uint16  # per-day contribution counts; editor levels 0-4 fit as well
+MAX_COUNT = np.iinfo(COUNT_DTYPE).max
+HISTORY_CACHE_SIZE = 128  # fetched histories kept process-wide, shared by every session
+SHEET_CACHE_SIZE = 32  # stacked multi-year images kept process-wide
+
+_history_cache: OrderedDict = OrderedDict()
+_sheet_cache: OrderedDict = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class ContributionCanvas:
+    """Contribution counts over any whole-week date range, one compact array entry per day.
+
+    Values are indexed by day offset from window.start; string date keys are only produced at
+    the API/upload boundary (`from_dict`, `to_dict`, `commit_plan`). Diffing is one vectorized pass
+    and rendering works on 52-week tiles, so a 10-year canvas costs about ten times one year.
+
+    Args:
+        window (CalendarWindow): Date range of the canvas.
+        values (np.ndarray, optional): Per-day counts, one per window day. Defaults to zeros.
+            A read-only COUNT_DTYPE array is kept as is rather than copied, so shared histories
+            stay one copy per process.
+    """
+
+    def __init__(self, window: CalendarWindow, values: np.ndarray | None = None):
+        self.window = window
+        if values is None:
+            self.values = np.zeros(len(window), dtype=COUNT_DTYPE)
+        else:
+            assert len(values) == len(window), f"canvas needs {len(window)} values, got {len(values)}"
+            values = np.asarray(values)
+            if values.dtype == COUNT_DTYPE and not values.flags.writeable:
+                self.values = values
+            else:
+                self.values = np.clip(values, 0, MAX_COUNT).astype(COUNT_DTYPE)
+
+    @classmethod
+    def from_dict(cls, date_dict: dict, window: CalendarWindow) -> "ContributionCanvas":
+        return cls(window, window.dict_to_array(date_dict))
+
+    def to_dict(self) -> dict:
+        return self.window.array_to_dict(self.values)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self.window.to_matrix(self.values)
+
+    @property
+    def total(self) -> int:
+        return int(self.values.sum(dtype=np.int64))
+
+    def diff(self, baseline: "ContributionCanvas") -> np.ndarray:
+        # signed per-day difference; the compact unsigned arrays must not wrap
+        return self.values.astype(np.int32) - baseline.values.astype(np.int32)
+
+    def commit_plan(self, baseline: "ContributionCanvas") -> dict:
+        """date : commits to add (or negative where the design is below the baseline), non-zero days only"""
+        diff = self.diff(baseline)
+        keys = self.window.keys
+        return {keys[i]: int(diff[i]) for i in np.flatnonzero(diff)}
+
+    def tiles(self, weeks: int = WEEKS) -> Iterator[tuple]:
+        """Yield (tile window, tile values) 52-week tiles, oldest first, ending on the canvas end.
+
+        The oldest tile is zero-padded at its start when the canvas is not a whole number of tiles.
+        """
+        count = -(-self.window.weeks // weeks)
+        for n in range(count - 1, -1, -1):
+            tile = calendar_window(self.window.end - timedelta(weeks=n * weeks), weeks)
+            stop = len(self.values) - n * weeks * 7
+            start = stop - len(tile)
+            if start >= 0:
+                yield tile, self.values[start:stop]
+            else:
+                padded = np.zeros(len(tile), dtype=COUNT_DTYPE)
+                padded[-stop:] = self.values[:stop]
+                yield tile, padded
+
+    def render_tiles(self, backend: str | None = None) -> list:
+        """Render every tile through the cached commit graph renderer; returns [(tile window, image bytes)]."""
+        return [
+            (tile, render_commit_graph(tile.to_matrix(values), first_month=tile.start.month, backend=backend)[1])
+            for tile, values in self.tiles()
+        ]
+
+    def _sheet_key(self, kind: str) -> str:
+        return hashlib.blake2b(self.values.tobytes() + repr((self.window.end, kind)).encode("utf-8"),
+                               digest_size=16).hexdigest()
+
+    def render_svg(self) -> str:
+        # all tiles in one SVG document, stacked like render_png
+        if self.window.weeks > WEEKS:
+            return _cached_sheet(self._sheet_key("svg"), self._render_svg)
+        return self._render_svg()
+
+    def _render_svg(self) -> str:
+        svgs = [svg.decode("utf-8") for _, svg in reversed(self.render_tiles(backend="svg"))]
+        if len(svgs) == 1:
+            return svgs[0]
+        width, height = graph_layout().width, graph_layout().height
+        body = "".join(f'<g transform="translate(0 {i * height})">{svg}</g>' for i, svg in enumerate(svgs))
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height * len(svgs)}" '
+                f'viewBox="0 0 {width} {height * len(svgs)}">{body}</svg>')
+
+    def render_png(self, backend: str | None = None) -> bytes:
+        # all tiles stacked vertically, newest at the top like GitHub's year list
+        if self.window.weeks > WEEKS:
+            return _cached_sheet(self._sheet_key(f"png:{backend}"), lambda: self._render_png(backend))
+        return self._render_png(backend)
+
+    def _render_png(self, backend: str | None = None) -> bytes:
+        pngs = [png for _, png in reversed(self.render_tiles(backend=backend))]
+        if len(pngs) == 1:
+            return pngs[0]
+        images = [Image.open(BytesIO(png)) for png in pngs]
+        sheet = Image.new("RGBA", (max(i.width for i in images), sum(i.height for i in images)), "white")
+        y = 0
+        for image in images:
+            sheet.paste(image, (0, y))
+            y += image.height
+        buf = BytesIO()
+        sheet.save(buf, format="png", compress_level=1)
+        return buf.getvalue()
+
+
+def _cached_sheet(key: str, render):
+    # multi-year sheets are composed once per distinct canvas and shared by every session showing it
+    with _cache_lock:
+        sheet = _sheet_cache.get(key)
+        if sheet is not None:
+            _sheet_cache.move_to_end(key)
+            return sheet
+    sheet = render()
+    with _cache_lock:
+        _sheet_cache[key] = sheet
+        while len(_sheet_cache) > SHEET_CACHE_SIZE:
+            _sheet_cache.popitem(last=False)
+    return sheet
+
+
+def history_canvas(username: str, window: CalendarWindow) -> ContributionCanvas | None:
+    """Fetched contribution history of username over the window, shared read-only across sessions.
+
+    Responses come from the shared API client. The canvas built from them is kept in a bounded
+    process-wide cache for as long as the client serves the same response objects, so every session
+    looking at the same user and range holds one copy instead of its own dict.
+
+    Returns:
+        ContributionCanvas | None: Read-only history, or None when any request failed.
+    """
+    if window.weeks == WEEKS and window.end == last_saturday():
+        responses = (github_contribution_api(username),)
+    else:
+        responses = tuple(github_contribution_years(username, range(window.start.year, window.end.year + 1)))
+    if any(not response or "error" in response for response in responses):
+        return None
+
+    key = (username, window.end, window.weeks)
+    with _cache_lock:
+        cached = _history_cache.get(key)
+        if cached is not None and all(old is new for old, new in zip(cached[0], responses)):
+            _history_cache.move_to_end(key)
+            return cached[1]
+
+    # calendar years never overlap, so each response fills its own days
+    counts = sum(contributions_to_array(response.get("contributions") or [], window) for response in responses)
+    history = ContributionCanvas(window, counts)
+    history.values.setflags(write=False)
+    with _cache_lock:
+        _history_cache[key] = (responses, history)
+        while len(_history_cache) > HISTORY_CACHE_SIZE:
+            _history_cache.popitem(last=False)
+    logger.debug(f"Built shared history for {username}: {history.total} contributions over {len(window)} days")
+    return history
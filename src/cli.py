@@ -0,0 +1,140 @@
+"""Headless batch rendering of contribution graph designs.
+
+Each design is a date:level dict or a 7x52 matrix of levels 0-4. Inputs are a directory of *.json
+files, or a JSONL file ("-" for stdin) with one {"name": ..., "design": ...} object per line. For
+every design the graph PNG and the commit plan (the fewest commits per day that show each level on
+top of an optional baseline history) are written to the output directory.
+
+    contribution-graph designs/ -o out/ -j 8
+    cat designs.jsonl | contribution-graph - -o out/ --baseline api_response.json
+"""
+import os
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+from typing import Iterator
+
+import numpy as np
+
+from dates import calendar_window, convert_api_response_to_dict, current_window
+from grid import dict_to_matrix
+from planner import plan_commits
+from writer import RENDER_BACKENDS, render_commit_graph
+
+TASKS_PER_CHILD = 500  # recycle workers so long batches keep a flat memory profile
+
+
+def iter_designs(source: str) -> Iterator[tuple]:
+    """Yield (name, design) pairs lazily from a directory of JSON files or a JSONL stream."""
+    if os.path.isdir(source):
+        for file_name in sorted(os.listdir(source)):
+            if file_name.endswith(".json"):
+                with open(os.path.join(source, file_name)) as f:
+                    yield os.path.splitext(file_name)[0], json.load(f)
+        return
+
+    stream = sys.stdin if source == "-" else open(source)
+    try:
+        for i, line in enumerate(stream):
+            if line.strip():
+                record = json.loads(line)
+                if isinstance(record, dict) and "design" in record:
+                    yield str(record.get("name", f"design-{i:05d}")), record["design"]
+                else:
+                    yield f"design-{i:05d}", record
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def load_baseline(path: str | None) -> dict:
+    # a saved contributions API response, or a plain date:count dict
+    if not path:
+        return {}
+    with open(path) as f:
+        data = json.load(f)
+    return convert_api_response_to_dict(data) if "contributions" in data else data
+
+
+def design_to_matrix(design, window) -> np.ndarray:
+    if isinstance(design, dict):
+        return dict_to_matrix(design, window)
+    matrix = np.asarray(design, dtype=int)
+    assert matrix.shape == (7, 52), f"design matrix should have shape (7, 52), got {matrix.shape}"
+    return matrix
+
+
+def process_design(name: str, design, out_dir: str, window_end: date, baseline: dict,
+                   backend: str = "raster") -> tuple:
+    """Render one design and write <name>.png (or .svg) and <name>.plan.json; returns (name, commits planned)."""
+    window = calendar_window(window_end)
+    matrix = design_to_matrix(design, window)
+    _, image = render_commit_graph(matrix, backend=backend)
+    plan = plan_commits(window, window.from_matrix(matrix), window.dict_to_array(baseline)).to_dict()
+
+    with open(os.path.join(out_dir, f"{name}.{'svg' if backend == 'svg' else 'png'}"), "wb") as f:
+        f.write(image)
+    with open(os.path.join(out_dir, f"{name}.plan.json"), "w") as f:
+        json.dump(plan, f)
+    return name, sum(plan.values())
+
+
+def run_batch(source: str, out_dir: str, workers: int, baseline: dict, backend: str = "raster") -> tuple:
+    """Process every design on a process pool, keeping at most 2 x workers designs in flight.
+
+    Returns:
+        tuple: (designs processed, failures, elapsed seconds)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    window_end = current_window().end
+    done = failed = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=TASKS_PER_CHILD) as pool:
+        pending = {}
+        designs = iter_designs(source)
+        while True:
+            for name, design in designs:
+                pending[pool.submit(process_design, name, design, out_dir, window_end, baseline, backend)] = name
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = pending.pop(future)
+                try:
+                    future.result()
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"Failed to process design {name}: {e}", file=sys.stderr)
+
+    return done, failed, time.perf_counter() - start
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of *.json designs, a JSONL file, or - for stdin")
+    parser.add_argument("-o", "--out", default="out", help="output directory for PNGs and commit plans")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--baseline", help="API response or date:count JSON subtracted from every design")
+    parser.add_argument("--backend", choices=RENDER_BACKENDS, default="raster",
+                        help="graph renderer: raster PNG, svg, or matplotlib PNG (default raster)")
+    args = parser.parse_args(argv)
+
+    done, failed, elapsed = run_batch(args.source, args.out, max(1, args.workers), load_baseline(args.baseline),
+                                   args.backend)
+    rate = done / elapsed if elapsed else 0.0
+    print(f"Processed {done} designs ({failed} failed) in {elapsed:.2f}s: {rate:.1f} items/sec")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
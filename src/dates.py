@@ -1,34 +1,128 @@
-from datetime import datetime, timedelta
-import requests
-import pandas as pd
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import IO, Iterable, Iterator
+import codecs
+import json
+import re
+import numpy as np
 import logging
 
+from api_client import default_client
+from timing import timed
+
 logger = logging.getLogger(__name__)
 
-def year_dict() -> dict:
+DAYS_PER_WEEK = 7
+WEEKS = 52
+
+
+def last_saturday(today: date | None = None) -> date:
+    # most recent Saturday, today included, so the window is made of whole Sunday-Saturday weeks
+    today = today or datetime.now().date()
+    return today - timedelta(days=(today.weekday() - 5) % 7)
+
+
+class CalendarWindow:
+    """Run of whole Sunday-Saturday weeks ending on `end`, precomputed once.
+
+    Day i of the window sits at matrix[i % 7, i // 7] (Sunday = row 0), so conversions
+    between the day array and the 7 x weeks matrix are plain reshapes.
+    """
+
+    def __init__(self, end: date, weeks: int = WEEKS):
+        self.end = end
+        self.weeks = weeks
+        self.start = end - timedelta(days=weeks * DAYS_PER_WEEK - 1)
+        self.days = np.arange(np.datetime64(self.start, "D"), np.datetime64(end, "D") + 1)
+        self._keys = None
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def keys(self) -> list:
+        # 'YYYY-MM-DD' strings, only built when a dict boundary needs them
+        if self._keys is None:
+            self._keys = self.days.astype(str).tolist()
+        return self._keys
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            self._index = {key: i for i, key in enumerate(self.keys)}
+        return self._index
+
+    def to_matrix(self, values: np.ndarray) -> np.ndarray:
+        return np.asarray(values).reshape(self.weeks, DAYS_PER_WEEK).T
+
+    def from_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        return np.asarray(matrix).T.reshape(-1)
+
+    @timed("convert.dict_to_array")
+    def dict_to_array(self, date_dict: dict, dtype=int) -> np.ndarray:
+        # dates outside the window are ignored, missing dates stay 0
+        values = np.zeros(len(self.days), dtype=dtype)
+        index = self.index
+        for key, count in date_dict.items():
+            i = index.get(key)
+            if i is not None:
+                values[i] = count
+        return values
+
+    @timed("convert.array_to_dict")
+    def array_to_dict(self, values: np.ndarray) -> dict:
+        return dict(zip(self.keys, np.asarray(values).tolist()))
+
+
+@lru_cache(maxsize=64)
+def calendar_window(end: date, weeks: int = WEEKS) -> CalendarWindow:
+    # shared by every session; roomy enough that ten year tiles never evict the window they tile
+    return CalendarWindow(end, weeks)
+
+
+def current_window() -> CalendarWindow:
+    """Calendar window ending last Saturday; resolve it once per rerun and pass it around so
+    every conversion agrees on the dates even across midnight."""
+    return calendar_window(last_saturday())
+
+
+def window_for_range(start: date, end: date) -> CalendarWindow:
+    """Smallest window of whole Sunday-Saturday weeks covering start..end."""
+    end = end + timedelta(days=(5 - end.weekday()) % 7)  # forward to Saturday
+    start = start - timedelta(days=(start.weekday() + 1) % 7)  # back to Sunday
+    return calendar_window(end, ((end - start).days + 1) // DAYS_PER_WEEK)
+
+
+def window_for_year(year: int) -> CalendarWindow:
+    # a calendar year, as GitHub shows it on the profile year selector
+    return window_for_range(date(year, 1, 1), date(year, 12, 31))
+
+
+def window_years_back(years: int) -> CalendarWindow:
+    # `years` consecutive 52-week tiles ending last Saturday
+    return calendar_window(last_saturday(), WEEKS * years)
+
+
+def year_dict(window: CalendarWindow | None = None) -> dict:
     """
     GitHub-accurate date dictionary:
-    - 364 days = 52 weeks × 7 days
+    - 364 days = 52 weeks × 7 days by default, or every day of the given window
     - Uses the same date range as dict_to_matrix for consistency
     """
-    end_date = datetime.now().date()
-    end_date = pd.Timestamp(end_date).normalize()
-    end_date -= pd.Timedelta(days=(end_date.weekday() + 1) % 7)  # last Saturday
-    start_date = end_date - pd.Timedelta(weeks=52) + pd.Timedelta(days=1)
-
-    date_dict = {}
-    for i in range(364):
-        day = (start_date + pd.Timedelta(days=i)).date()
-        date_dict[day.strftime("%Y-%m-%d")] = 0
+    window = window or current_window()
+    date_dict = dict.fromkeys(window.keys, 0)
 
     logger.debug(f"Generated year_dict with {len(date_dict)} dates")
-    assert len(date_dict) == 364, f"year_dict should have exactly 364 entries, got {len(date_dict)}"
+    assert len(date_dict) == len(window), f"year_dict should have exactly {len(window)} entries, got {len(date_dict)}"
     return date_dict
 
 def github_contribution_api(username: str, year: str = "last") -> dict:
     """API for pulling Github Usernames
      Source repo: https://github.com/grubersjoe/github-contributions-api
 
+    Requests go through the shared pooled client, so repeat lookups are served from its cache.
+
     Args:
         username (str): Github Username
         year (str, optional): One year of github contributions to pull. Defaults to "last".
@@ -36,22 +130,129 @@ def github_contribution_api(username: str, year: str = "last") -> dict:
     Returns:
         dict: date : contribution count
     """
-    # extract data from the GitHub Contributions API
-    try:
-        url = f"https://github-contributions-api.jogruber.de/v4/{username}?y={year}"
-        resp = requests.get(url, timeout=30)
-        return resp.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching data from GitHub Contributions API: {e}")
-        return {}
+    return default_client().fetch(username, year)
+
+
+def github_contribution_years(username: str, years) -> list:
+    """Fetch several calendar years of contributions concurrently through the shared client.
+
+    Returns:
+        list: One API response per year, in the order given.
+    """
+    return list(default_client().fetch_years(username, years).values())
+
+STREAM_CHUNK_SIZE = 64 * 1024
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _valid_contribution(entry) -> bool:
+    # expected shape: {"date": "YYYY-MM-DD", "count": int >= 0, ...}
+    if not isinstance(entry, dict):
+        return False
+    day, count = entry.get("date"), entry.get("count")
+    return (isinstance(day, str) and _ISO_DATE.fullmatch(day) is not None
+            and isinstance(count, int) and not isinstance(count, bool) and count >= 0)
+
+
+def iter_api_contributions(fp: IO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[dict]:
+    """Stream the entries of the "contributions" array from a JSON API body, one object at a time.
+
+    Only the entry being decoded and one read chunk are held in memory, never the whole document.
+    Bytes are decoded incrementally, so a multi-byte character split across chunks is kept whole.
+    ContributionsClient still decodes whole bodies, which it caches as dicts; this is for large
+    saved responses, and bench_api_parse compares the two.
+
+    Args:
+        fp (IO): Text or binary file-like object holding the API response body.
+        chunk_size (int, optional): Bytes/characters read per call. Defaults to 64 KiB.
+
+    Yields:
+        dict: Raw contribution entries, unvalidated.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, eof = "", 0, False
+
+    def read_more() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            utf8.decode(b"", final=True)  # raises on a character cut off by the end of the body
+            return False
+        if isinstance(chunk, bytes):
+            chunk = utf8.decode(chunk)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    # seek to the opening bracket of the contributions array
+    while True:
+        key = buffer.find('"contributions"', pos)
+        if key != -1:
+            bracket = buffer.find("[", key)
+            if bracket != -1:
+                pos = bracket + 1
+                break
+        else:
+            # keep a tail in case the key is split across chunks
+            pos = max(pos, len(buffer) - len('"contributions"'))
+        if not read_more():
+            return
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buffer):
+            if not read_more():
+                return
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            entry, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # object truncated at the chunk boundary, or malformed beyond repair at EOF
+            if eof or not read_more():
+                raise
+            continue
+        pos = end
+        yield entry
+
+
+def contributions_to_dict(entries: Iterable) -> dict:
+    """Collapse contribution entries into date : count, skipping malformed entries."""
+    date_dict = {entry["date"]: entry["count"] for entry in entries if _valid_contribution(entry)}
+    return date_dict
+
+
+def contributions_to_array(entries: Iterable, window: CalendarWindow | None = None) -> np.ndarray:
+    """Scatter contribution entries onto the day array of a calendar window.
+
+    Entries are validated, then placed by vectorized day offsets; dates outside the window are dropped.
+    """
+    window = window or current_window()
+    valid = [entry for entry in entries if _valid_contribution(entry)]
+    values = np.zeros(len(window), dtype=int)
+    if not valid:
+        return values
+    days = np.array([entry["date"] for entry in valid], dtype="datetime64[D]")
+    counts = np.array([entry["count"] for entry in valid], dtype=int)
+    offsets = (days - window.days[0]).astype(int)
+    inside = (offsets >= 0) & (offsets < len(values))
+    values[offsets[inside]] = counts[inside]
+    return values
+
 
+@timed("api.parse")
 def convert_api_response_to_dict(resp: dict) -> dict:
-    # convert API data from response dict -> DataFrame -> formatted dict
-    df = pd.DataFrame(resp['contributions'])
-    date_dict = {}
-    for index, row in df.iterrows():
-        date_dict[row['date']] = row['count']
+    # convert API data from response dict -> formatted dict, skipping malformed entries
+    entries = resp.get("contributions") or []
+    date_dict = contributions_to_dict(entries)
 
+    skipped = len(entries) - len(date_dict)
+    if skipped:
+        logger.debug(f"Skipped {skipped} malformed or duplicate API entries")
     logger.debug(f"Converted API response to dict with {len(date_dict)} dates")
     return date_dict
 
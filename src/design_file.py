@@ -0,0 +1,111 @@
+"""Compact binary design files: 3 bits per day, a date-range header and a CRC-32 checksum.
+
+Layout, little endian:
+
+    offset  size  field
+    0       2     magic b"GD"
+    2       1     format version (1)
+    3       4     end date as a proleptic Gregorian ordinal (date.toordinal)
+    7       2     weeks; the design covers weeks * 7 days ending on the end date (a Saturday)
+    9       n     levels, 3 bits per day, oldest day first, most significant bit first, zero padded
+    9 + n   4     CRC-32 of everything before it
+
+A one-year design (364 days) is 137 bytes of levels and 150 bytes in all.
+"""
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from dates import DAYS_PER_WEEK, CalendarWindow, calendar_window
+
+MAGIC = b"GD"
+VERSION = 1
+BITS_PER_DAY = 3
+MAX_LEVEL = 4
+FILE_EXTENSION = ".gcg"
+
+_HEADER = struct.Struct("<2sBIH")
+_CHECKSUM = struct.Struct("<I")
+_BIT_WEIGHTS = np.array([4, 2, 1], dtype=np.uint8)
+
+
+@dataclass(frozen=True, eq=False)
+class Design:
+    """Levels 0-4 for every day of a calendar window."""
+
+    window: CalendarWindow
+    levels: np.ndarray
+
+    def __post_init__(self):
+        assert len(self.levels) == len(self.window), f"design needs {len(self.window)} levels, got {len(self.levels)}"
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self.window.to_matrix(self.levels)
+
+    @property
+    def total(self) -> int:
+        return int(np.asarray(self.levels).sum(dtype=np.int64))
+
+    def levels_on(self, window: CalendarWindow) -> np.ndarray:
+        """The design's levels placed by date onto another window; days it doesn't cover are 0."""
+        levels = np.zeros(len(window), dtype=np.uint8)
+        offset = int((self.window.days[0] - window.days[0]).astype(int))
+        start, stop = max(0, offset), min(len(window), offset + len(self.levels))
+        if start < stop:
+            levels[start:stop] = self.levels[start - offset:stop - offset]
+        return levels
+
+
+def encode_design(design: Design) -> bytes:
+    """Pack a design into the binary file format.
+
+    Raises:
+        ValueError: A level is outside 0-4.
+    """
+    levels = np.asarray(design.levels)
+    if len(levels) and (levels.min() < 0 or levels.max() > MAX_LEVEL):
+        raise ValueError(f"design levels must be 0-{MAX_LEVEL}")
+    # the low 3 bits of every byte, concatenated into one bit stream
+    bits = np.unpackbits(levels.astype(np.uint8)[:, None], axis=1)[:, 8 - BITS_PER_DAY:]
+    body = _HEADER.pack(MAGIC, VERSION, design.window.end.toordinal(), design.window.weeks) + np.packbits(bits).tobytes()
+    return body + _CHECKSUM.pack(zlib.crc32(body))
+
+
+def decode_design(data: bytes) -> Design:
+    """Unpack a design file, checking its header, length and checksum.
+
+    Raises:
+        ValueError: The data is not a valid design file.
+    """
+    data = bytes(data)
+    if len(data) < _HEADER.size + _CHECKSUM.size:
+        raise ValueError("design file is truncated")
+    magic, version, end, weeks = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a design file")
+    if version != VERSION:
+        raise ValueError(f"unsupported design file version {version}")
+    body, (checksum,) = data[:-_CHECKSUM.size], _CHECKSUM.unpack_from(data, len(data) - _CHECKSUM.size)
+    if zlib.crc32(body) != checksum:
+        raise ValueError("design file checksum mismatch")
+
+    days = weeks * DAYS_PER_WEEK
+    payload = np.frombuffer(body, dtype=np.uint8, offset=_HEADER.size)
+    if len(payload) != -(-days * BITS_PER_DAY // 8):
+        raise ValueError(f"design file should hold {days} days")
+    try:
+        end_date = date.fromordinal(end)
+    except ValueError:
+        raise ValueError("design file has an invalid end date") from None
+    if weeks == 0 or end_date.weekday() != 5:
+        raise ValueError("design file must cover whole Sunday-Saturday weeks")
+
+    bits = np.unpackbits(payload)[:days * BITS_PER_DAY].reshape(days, BITS_PER_DAY)
+    levels = bits @ _BIT_WEIGHTS
+    if levels.max(initial=0) > MAX_LEVEL:
+        raise ValueError(f"design levels must be 0-{MAX_LEVEL}")
+    return Design(calendar_window(end_date, weeks), levels)
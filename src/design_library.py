@@ -0,0 +1,231 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+from dataclasses import dataclass
+from datetime import date
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from design_file import Design, decode_design, encode_design
+from timing import timed
+from writer import COLORS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIBRARY_PATH = os.path.join(os.path.expanduser("~"), ".local", "share", "github-contribution-graph-editor",
+                                    "designs.sqlite3")
+THUMBNAIL_CELL = 3  # pixels per day in a thumbnail
+DEFAULT_LIST_LIMIT = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS designs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    weeks INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS designs_dates ON designs (start_date, end_date);
+CREATE INDEX IF NOT EXISTS designs_updated ON designs (updated_at);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    design_id INTEGER NOT NULL REFERENCES designs (id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, design_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_design ON tags (design_id);
+CREATE TABLE IF NOT EXISTS thumbnails (
+    design_id INTEGER PRIMARY KEY REFERENCES designs (id) ON DELETE CASCADE,
+    png BLOB NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class DesignEntry:
+    """A saved design's metadata, as listed without reading its levels."""
+
+    id: int
+    name: str
+    start: date
+    end: date
+    weeks: int
+    total: int
+    updated_at: float
+    tags: tuple = ()
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.start:%b %d, %Y} – {self.end:%b %d, %Y})"
+
+
+def render_thumbnail(design: Design, cell: int = THUMBNAIL_CELL) -> bytes:
+    """Small palette PNG of a design: one cell x cell square per day in GitHub's colors."""
+    matrix = np.repeat(np.repeat(np.asarray(design.matrix, dtype=np.uint8), cell, axis=0), cell, axis=1)
+    image = Image.fromarray(matrix, mode="P")
+    image.putpalette([channel for color in COLORS for channel in bytes.fromhex(color[1:])])
+    buf = BytesIO()
+    image.save(buf, format="png", optimize=True)
+    return buf.getvalue()
+
+
+class DesignLibrary:
+    """Saved designs in a local SQLite database, with tags and cached thumbnails.
+
+    Each design is stored as its binary design file (see design_file, ~150 bytes a year) next to
+    indexed metadata: a unique name, its date range, its level total and its tags. Listing reads
+    the metadata only and filters through the indexes, so it stays fast with thousands of
+    designs; loading one is a primary key lookup and a 3-bit unpack. Thumbnails are rendered
+    when a design is saved and kept in their own table, out of the way of listings.
+
+    One connection is shared by every thread (Streamlit sessions) behind a lock.
+
+    Args:
+        path (str, optional): Database file, created on first use, or ":memory:".
+            Defaults to $GITHUB_GRAPH_LIBRARY or ~/.local/share/github-contribution-graph-editor/designs.sqlite3.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.environ.get("GITHUB_GRAPH_LIBRARY", DEFAULT_LIBRARY_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if self.path != ":memory:":
+            self._db.execute("PRAGMA journal_mode = WAL")
+        with self._db:
+            self._db.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM designs").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    @timed("library.save")
+    def save(self, name: str, design: Design, tags=(), thumbnail: bytes | None = None) -> int:
+        """Save a design under a name, replacing any design saved under it before.
+
+        Args:
+            name (str): Unique name of the design.
+            design (Design): Levels and window.
+            tags (Iterable[str], optional): Labels to find the design by; blanks and duplicates are dropped.
+            thumbnail (bytes, optional): PNG preview. Defaults to render_thumbnail(design).
+
+        Returns:
+            int: Id of the saved design.
+        """
+        name = name.strip()
+        if not name:
+            raise ValueError("a design needs a name")
+        data = encode_design(design)
+        thumbnail = thumbnail if thumbnail is not None else render_thumbnail(design)
+        tags = sorted({tag.strip().lower() for tag in tags if tag.strip()})
+        window = design.window
+        with self._lock, self._db:
+            design_id = self._db.execute(
+                "INSERT INTO designs (name, start_date, end_date, weeks, total, updated_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET "
+                "start_date = excluded.start_date, end_date = excluded.end_date, weeks = excluded.weeks, "
+                "total = excluded.total, updated_at = excluded.updated_at, data = excluded.data RETURNING id",
+                (name, window.start.isoformat(), window.end.isoformat(), window.weeks, design.total, time.time(), data),
+            ).fetchone()[0]
+            self._db.execute("DELETE FROM tags WHERE design_id = ?", (design_id,))
+            self._db.executemany("INSERT INTO tags (tag, design_id) VALUES (?, ?)", [(tag, design_id) for tag in tags])
+            self._db.execute("INSERT OR REPLACE INTO thumbnails (design_id, png) VALUES (?, ?)", (design_id, thumbnail))
+        logger.info(f"Saved design {name!r} ({len(data)} bytes, tags {tags})")
+        return design_id
+
+    @timed("library.search")
+    def search(self, name: str | None = None, tag: str | None = None, start: date | None = None,
+               end: date | None = None, limit: int = DEFAULT_LIST_LIMIT) -> list:
+        """Saved designs, most recently saved first, without their levels.
+
+        Args:
+            name (str, optional): Only names starting with this.
+            tag (str, optional): Only designs with this tag.
+            start, end (date, optional): Only designs overlapping start..end.
+            limit (int, optional): Most entries returned. Defaults to DEFAULT_LIST_LIMIT.
+
+        Returns:
+            list: DesignEntry per design.
+        """
+        where, params = [], []
+        if name:
+            # a range on the unique index rather than LIKE, which SQLite can't serve from it
+            where.append("d.name >= ? AND d.name < ?")
+            params += [name, name + "\U0010ffff"]
+        if tag:
+            where.append("d.id IN (SELECT design_id FROM tags WHERE tag = ?)")
+            params.append(tag.strip().lower())
+        if start:
+            where.append("d.end_date >= ?")
+            params.append(start.isoformat())
+        if end:
+            where.append("d.start_date <= ?")
+            params.append(end.isoformat())
+        query = ("SELECT d.id, d.name, d.start_date, d.end_date, d.weeks, d.total, d.updated_at, "
+                 "(SELECT group_concat(tag, ',') FROM tags WHERE design_id = d.id) FROM designs d "
+                 f"{'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY d.updated_at DESC LIMIT ?")
+        with self._lock:
+            rows = self._db.execute(query, [*params, limit]).fetchall()
+        return [
+            DesignEntry(id, name, date.fromisoformat(start), date.fromisoformat(end), weeks, total, updated_at,
+                        tuple(tags.split(",")) if tags else ())
+            for id, name, start, end, weeks, total, updated_at, tags in rows
+        ]
+
+    def tags(self) -> list:
+        # every tag in use, alphabetically, straight from the tag index
+        with self._lock:
+            return [tag for (tag,) in self._db.execute("SELECT DISTINCT tag FROM tags ORDER BY tag")]
+
+    @timed("library.load")
+    def load(self, key: int | str) -> Design:
+        """Load a design by id or name.
+
+        Raises:
+            KeyError: No such design.
+        """
+        return decode_design(self.data(key))
+
+    def data(self, key: int | str) -> bytes:
+        # the stored design file, e.g. for download; KeyError when there is no such design
+        column = "id" if isinstance(key, int) else "name"
+        with self._lock:
+            row = self._db.execute(f"SELECT data FROM designs WHERE {column} = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return row[0]
+
+    def thumbnail(self, design_id: int) -> bytes | None:
+        with self._lock:
+            row = self._db.execute("SELECT png FROM thumbnails WHERE design_id = ?", (design_id,)).fetchone()
+        return row[0] if row else None
+
+    def delete(self, key: int | str) -> bool:
+        column = "id" if isinstance(key, int) else "name"
+        with self._lock, self._db:
+            deleted = self._db.execute(f"DELETE FROM designs WHERE {column} = ?", (key,)).rowcount
+        return deleted > 0
+
+
+_default_library = None
+_default_library_lock = threading.Lock()
+
+
+def default_design_library() -> DesignLibrary:
+    # one database connection per process, shared by every session
+    global _default_library
+    with _default_library_lock:
+        if _default_library is None:
+            _default_library = DesignLibrary()
+        return _default_library
@@ -1,97 +1,375 @@
 import os
-from git import Repo
-import tempfile
 import subprocess
-import streamlit as st
-import shutil
 import time
-from tempfile import TemporaryDirectory
 import datetime
+import calendar
+import hashlib
+import json
+import threading
+import logging
+from collections import Counter
+from contextlib import nullcontext
+from typing import Callable, Iterator
 
-def branch_exists(repo_url, branch_name):
-    result = subprocess.run(
-        ["git", "ls-remote", "--heads", repo_url, branch_name],
-        capture_output=True,
+from repo_cache import RepoCache, default_repo_cache
+from timing import span, timed
+
+logger = logging.getLogger(__name__)
+
+COMMIT_MESSAGE = "Automated commit to populate contribution graph"
+INITIAL_COMMIT_MESSAGE = "Initial commit to set up repository"
+ACTIVITY_FILE = "activity.log"
+UPLOAD_BRANCH = "Automation"
+CHECKPOINT_COMMITS = 2000  # commits per fast-import + push chunk, and between checkpoints
+
+
+class UploadCancelled(Exception):
+    """Raised at the next checkpoint after an upload's cancel event was set."""
+
+
+class UploadCheckpoint:
+    """Dates whose commits are already pushed, kept on disk so a retried upload resumes.
+
+    Args:
+        path (str): JSON file holding the completed dates.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.done = set(json.load(f))
+            except (OSError, ValueError):
+                self.done = set()
+
+    def mark(self, dates) -> None:
+        self.done.update(dates)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(sorted(self.done), f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        self.done = set()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BaselineSnapshot:
+    """Automated commits per day a branch had when the first upload against one fetched baseline ran.
+
+    The fetched counts behind a plan already include the branch's automated commits as of the
+    fetch, along with real contributions; the snapshot tells those apart from commits pushed
+    since, so a repeated upload against the same fetch doesn't count its own commits twice.
+
+    Args:
+        path (str): JSON file holding the snapshot, keyed by the baseline (see plan_key).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.counts = None
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.counts = dict(json.load(f))
+            except (OSError, ValueError, TypeError):
+                self.counts = None
+
+    def take(self, counts: dict) -> dict:
+        # the recorded counts, or counts when this is the first upload against the baseline
+        if self.counts is None:
+            self.counts = dict(counts)
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.counts, f)
+            os.replace(tmp_path, self.path)
+        return self.counts
+
+
+def plan_key(commit_date_counts: dict) -> str:
+    # identifies one commit plan, so a checkpoint is only resumed by a retry of the same plan
+    payload = json.dumps(sorted(commit_date_counts.items())).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def date_batches(commit_date_counts: dict, max_commits: int = CHECKPOINT_COMMITS) -> Iterator[dict]:
+    """Split a plan into runs of whole dates of about max_commits commits each, in date order."""
+    batch, size = {}, 0
+    for date, num_commits in commit_date_counts.items():
+        if num_commits <= 0:
+            continue
+        batch[date] = num_commits
+        size += num_commits
+        if size >= max_commits:
+            yield batch
+            batch, size = {}, 0
+    if batch:
+        yield batch
+
+
+def _commit_timestamp(date: str) -> int:
+    # commits are dated at 12:00:00 UTC, matching how GitPython parses "YYYY-MM-DD 12:00:00"
+    day = datetime.datetime.strptime(date, "%Y-%m-%d")
+    return calendar.timegm(day.replace(hour=12).timetuple())
+
+
+def _fast_import_data(payload: str) -> bytes:
+    # fast-import 'data' command: exact byte count followed by the raw payload
+    encoded = payload.encode("utf-8")
+    return b"data %d\n%s\n" % (len(encoded), encoded)
+
+
+def build_fast_import_stream(ref: str, commit_date_counts: dict, GIT_USERNAME: str, GIT_EMAIL: str,
+                             parent: str | None = None, initial_commit: bool = False) -> Iterator[bytes]:
+    """Yield a `git fast-import` stream that builds the dated commit chain for commit_date_counts.
+
+    Each commit rewrites activity.log with a single line for its date, so blobs stay tiny and
+    identical dates share one blob object.
+
+    Args:
+        ref (str): Fully qualified ref to write, e.g. "refs/heads/Automation".
+        commit_date_counts (dict): date string 'YYYY-MM-DD' : number of commits.
+        GIT_USERNAME (str): Author and committer name.
+        GIT_EMAIL (str): Author and committer email.
+        parent (str, optional): Commit sha the chain should start from. Defaults to a root commit.
+        initial_commit (bool, optional): Emit the setup commit used for empty repositories first.
+
+    Yields:
+        bytes: Chunks of the fast-import stream, one per commit.
+    """
+    identity = f"{GIT_USERNAME} <{GIT_EMAIL}>"
+    first = True
+
+    def commit(timestamp: int, message: str, content: str) -> bytes:
+        nonlocal first
+        chunk = (
+            f"commit {ref}\n"
+            f"author {identity} {timestamp} +0000\n"
+            f"committer {identity} {timestamp} +0000\n"
+        ).encode("utf-8") + _fast_import_data(message)
+        if first and parent:
+            chunk += f"from {parent}\n".encode("utf-8")
+        first = False
+        return chunk + f"M 100644 inline {ACTIVITY_FILE}\n".encode("utf-8") + _fast_import_data(content) + b"\n"
+
+    if initial_commit:
+        yield commit(int(time.time()), INITIAL_COMMIT_MESSAGE, "Starting activity log.\n")
+
+    for date, num_commits in commit_date_counts.items():
+        if num_commits > 0:
+            timestamp = _commit_timestamp(date)
+            content = f"Commit on {date} 12:00:00\n"
+            for _ in range(num_commits):
+                yield commit(timestamp, COMMIT_MESSAGE, content)
+
+    yield b"done\n"
+
+
+@timed("upload.scan")
+def branch_commit_counts(repo_dir: str, rev: str = "HEAD") -> dict:
+    """Count the automated commits already on rev per author date, in one streamed `git log` pass.
+
+    Only commits carrying COMMIT_MESSAGE are counted, so real history the branch was started from
+    is left to the Contributions API baseline.
+
+    Returns:
+        dict: date string 'YYYY-MM-DD' : number of automated commits
+    """
+    counts = Counter()
+    process = subprocess.Popen(
+        ["git", "log", "--format=%ad %s", "--date=short", rev],
+        cwd=repo_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
         text=True,
     )
-    return bool(result.stdout.strip())
+    for line in process.stdout:
+        date, _, subject = line.rstrip("\n").partition(" ")
+        if subject == COMMIT_MESSAGE:
+            counts[date] += 1
+    process.wait()
+    return dict(counts)
 
 
-def github_upload_commits(REPO_URL, GIT_USERNAME, GIT_EMAIL, GITHUB_TOKEN, commit_date_counts: dict):
-    # Configuration variables
-    BRANCH = 'Automation'
-    COMMIT_MESSAGE = "Automated commit to populate contribution graph"
+def missing_commit_counts(commit_date_counts: dict, existing: dict, fetched: dict | None = None) -> dict:
+    """Commits still to create per day once the automated commits already on the branch are accounted for.
 
-    # Create temporary directory manually for better control
-    temp_dir = tempfile.mkdtemp()
+    Without fetched, commit_date_counts are the automated commits each day should end up with,
+    so everything on the branch counts towards them. With it, they are additions on top of a
+    fetched baseline, and fetched holds the branch's automated commits per day as of that fetch
+    (BaselineSnapshot): only commits beyond those, i.e. pushed since, count towards the plan.
+    """
+    if fetched is not None:
+        existing = {date: count - fetched.get(date, 0) for date, count in existing.items()}
+    return {date: count - max(0, existing.get(date, 0)) for date, count in commit_date_counts.items()
+            if count - max(0, existing.get(date, 0)) > 0}
+
+
+def fast_import_commits(repo_dir: str, ref: str, commit_date_counts: dict, GIT_USERNAME: str, GIT_EMAIL: str,
+                        parent: str | None = None, initial_commit: bool = False) -> None:
+    """Write the whole dated commit chain to ref in a single `git fast-import` process.
+
+    No working-tree or index writes happen per commit; objects are streamed straight into a pack.
+    """
+    process = subprocess.Popen(
+        ["git", "fast-import", "--quiet", "--done"],
+        cwd=repo_dir,
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
     try:
-        print(f"Cloning {REPO_URL} (branch: {BRANCH}) into {temp_dir}")
+        for chunk in build_fast_import_stream(ref, commit_date_counts, GIT_USERNAME, GIT_EMAIL,
+                                              parent=parent, initial_commit=initial_commit):
+            process.stdin.write(chunk)
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    stderr = process.stderr.read().decode("utf-8", errors="replace")
+    if process.wait() != 0:
+        raise RuntimeError(f"git fast-import failed: {stderr.strip()}")
 
-        # Determine if branch exists before cloning
-        if branch_exists(REPO_URL, BRANCH):
-            repo = Repo.clone_from(REPO_URL, temp_dir, branch=BRANCH)
-        else:
-            repo = Repo.clone_from(REPO_URL, temp_dir)  # default branch
+
+def github_upload_commits(REPO_URL, GIT_USERNAME, GIT_EMAIL, GITHUB_TOKEN, commit_date_counts: dict, bulk: bool = True,
+                          cache: RepoCache | None = None, progress: Callable | None = None,
+                          cancel: threading.Event | None = None, checkpoint: UploadCheckpoint | None = None,
+                          branch: str = UPLOAD_BRANCH, push_slots=None, baseline: dict | None = None):
+    """Bring the Automation branch up to commit_date_counts by appending only the missing commits.
+
+    The branch is scanned once for the automated commits it already has per day; only the
+    difference is created, and it is pushed as fast-forwards in chunks of about CHECKPOINT_COMMITS
+    commits, so repeated uploads never rewrite the branch or count a day twice.
+
+    Args:
+        progress (Callable, optional): Called as progress(phase, done, total) for the "clone",
+            "scan", "commits" and "push" phases. "scan" reports the planned commits already on
+            the branch.
+        cancel (threading.Event, optional): Checked between checkpoints; when set the upload
+            stops with UploadCancelled, keeping everything pushed so far.
+        checkpoint (UploadCheckpoint, optional): Dates already pushed by an earlier attempt are
+            skipped, and every pushed batch of dates is recorded.
+        branch (str, optional): Branch to append to. Defaults to UPLOAD_BRANCH.
+        push_slots (optional): Context manager held around every push, e.g. a semaphore shared by
+            parallel uploads to bound how many push at once.
+        baseline (dict, optional): Fetched date : contribution count the plan was computed against,
+            when commit_date_counts are additions on top of it (GridPipeline.upload_baseline).
+            The branch's automated commits are snapshotted on the first upload against it, and
+            only commits pushed since count towards the plan. Without it commit_date_counts are
+            absolute automated commits per day. See missing_commit_counts.
+    """
+    # Configuration variables
+    BRANCH = branch
+    progress = progress or (lambda phase, done, total: None)
+    push_slots = push_slots if push_slots is not None else nullcontext()
+    done_dates = checkpoint.done if checkpoint else set()
+    commit_date_counts = {date: count for date, count in commit_date_counts.items() if date not in done_dates}
+
+    # Reuse a cached working copy of the branch, fetched incrementally instead of recloned
+    cache = cache or default_repo_cache()
+    progress("clone", 0, 1)
+    with cache.checkout(REPO_URL, BRANCH) as (repo, branch_found):
+        progress("clone", 1, 1)
+        repo_dir = repo.working_tree_dir
+        logger.info(f"Using cached copy of {REPO_URL} (branch: {BRANCH if branch_found else 'default'}) in {repo_dir}")
 
         # Set authenticated remote URL with token (GitHub uses token@ not username:token@)
+        # the token is only passed to push so it never lands in the cached repo config
         authenticated_url = REPO_URL.replace("https://", f"https://{GITHUB_TOKEN}@")
-        repo.git.remote(
-            "set-url",
-            "origin",
-            authenticated_url
-        )
-        
+
         # Disable credential helper to force use of embedded token in URL
         with repo.config_writer() as git_config:
             git_config.set_value("credential", "helper", "").release()
 
-        # Define dummy file path
-        file_path = os.path.join(temp_dir, "activity.log")
-
-        with open(file_path, "w") as f:
-            f.write(f"Starting activity log.\n")
-
-        # Set Git user identity
-        repo.config_writer().set_value("user", "name", GIT_USERNAME).release()
-        repo.config_writer().set_value("user", "email", GIT_EMAIL).release()
-
-        # Ensure at least one commit exists before pushing
-        if not repo.head.is_valid():
-            repo.index.add([file_path])
-            repo.index.commit("Initial commit to set up repository")
-
-        # Generate commits for past DAYS_TO_BACKFILL days
-        # commit_date_counts is a dict of date strings to number of commits
-        # date_dict[day.strftime("%Y-%m-%d")] = value
-        for date in commit_date_counts:
-            commit_date_str = datetime.datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d 12:00:00") # github expects a datetime format, not string date 'YYYY-MM-DD'
-            num_commits = commit_date_counts[date]
-
-            # only submit if commit count > 0
-            if num_commits > 0:
-                print(f"Creating {num_commits} commits on {commit_date_str}")
-                for _ in range(num_commits):
-                    with open(file_path, "a") as f:
-                        f.write(f"Commit on {commit_date_str}\n")
-
-                    repo.index.add([file_path])
-                    repo.index.commit(
-                        COMMIT_MESSAGE, author_date=commit_date_str, commit_date=commit_date_str
-                    )
-
-        # Push changes using direct git command (bypasses credential helpers)
-        try:
-            repo.git.push("origin", f"HEAD:{BRANCH}", "-f")
-            print(f"Pushed changes to {REPO_URL} on branch {BRANCH}")
-        except Exception as e:
-            print(f"Error pushing to repository: {e}")
-            raise
-        
-    finally:
-        # Ensure git releases all locks before cleanup
-        time.sleep(0.5)
-        # Remove temporary directory
-        try:
-            shutil.rmtree(temp_dir, ignore_errors=True)
-        except Exception as e:
-            print(f"Warning: Could not fully clean up temp directory {temp_dir}: {e}")
+        def push(pushed_dates: dict) -> None:
+            # Push changes using direct git command (bypasses credential helpers)
+            # as a fast-forward: the new commits always sit on top of the fetched branch
+            try:
+                progress("push", 0, 1)
+                with push_slots, span("upload.push", commits=sum(pushed_dates.values())):
+                    repo.git.push(authenticated_url, f"HEAD:refs/heads/{BRANCH}")
+                progress("push", 1, 1)
+            except Exception as e:
+                logger.error(f"Error pushing to repository: {e}")
+                raise
+            if checkpoint is not None:
+                checkpoint.mark(pushed_dates)
+
+        # index what the branch already has so only the missing commits are appended
+        requested = sum(count for count in commit_date_counts.values() if count > 0)
+        existing = {}
+        if branch_found:
+            # a shallow copy would hide older automated commits from the scan and they'd be pushed twice
+            cache.unshallow(repo_dir)
+            existing = branch_commit_counts(repo_dir)
+        fetched = None
+        if baseline is not None:
+            snapshot = BaselineSnapshot(cache.checkpoint_path(REPO_URL, BRANCH, f"baseline-{plan_key(baseline)}"))
+            fetched = snapshot.take(existing)
+        commit_date_counts = missing_commit_counts(commit_date_counts, existing, fetched)
+        total = sum(count for count in commit_date_counts.values() if count > 0)
+        progress("scan", requested - total, requested)
+        if requested > total:
+            logger.info(f"{requested - total} of {requested} planned commits are already on {BRANCH}")
+
+        if bulk:
+            # stream the commits through fast-import onto the checked out branch, pushing and
+            # checkpointing every chunk of dates so no pack grows unbounded and a failure or
+            # cancel keeps what was pushed
+            head_ref = repo.git.symbolic_ref("HEAD")
+            logger.info(f"Creating {total} commits on {head_ref} with git fast-import")
+            created = 0
+            for batch in date_batches(commit_date_counts):
+                if cancel is not None and cancel.is_set():
+                    raise UploadCancelled(f"Upload cancelled after {created} of {total} commits")
+                parent = repo.head.commit.hexsha if repo.head.is_valid() else None
+                with span("upload.commits", commits=sum(batch.values())):
+                    fast_import_commits(repo_dir, head_ref, batch, GIT_USERNAME, GIT_EMAIL,
+                                        parent=parent, initial_commit=parent is None)
+                created += sum(batch.values())
+                progress("commits", created, total)
+                push(batch)
+        else:
+            # Define dummy file path
+            file_path = os.path.join(repo_dir, ACTIVITY_FILE)
+
+            with open(file_path, "w") as f:
+                f.write(f"Starting activity log.\n")
+
+            # Set Git user identity
+            repo.config_writer().set_value("user", "name", GIT_USERNAME).release()
+            repo.config_writer().set_value("user", "email", GIT_EMAIL).release()
+
+            # Ensure at least one commit exists before pushing
+            if not repo.head.is_valid():
+                repo.index.add([file_path])
+                repo.index.commit(INITIAL_COMMIT_MESSAGE)
+
+            # Generate commits for past DAYS_TO_BACKFILL days
+            # commit_date_counts is a dict of date strings to number of commits
+            # date_dict[day.strftime("%Y-%m-%d")] = value
+            created = 0
+            for date in commit_date_counts:
+                if cancel is not None and cancel.is_set():
+                    raise UploadCancelled(f"Upload cancelled after {created} of {total} commits")
+                commit_date_str = datetime.datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d 12:00:00") # github expects a datetime format, not string date 'YYYY-MM-DD'
+                num_commits = commit_date_counts[date]
+
+                # only submit if commit count > 0
+                if num_commits > 0:
+                    logger.info(f"Creating {num_commits} commits on {commit_date_str}")
+                    with span("upload.commits", commits=num_commits):
+                        for _ in range(num_commits):
+                            with open(file_path, "a") as f:
+                                f.write(f"Commit on {commit_date_str}\n")
+
+                            repo.index.add([file_path])
+                            repo.index.commit(
+                                COMMIT_MESSAGE, author_date=commit_date_str, commit_date=commit_date_str
+                            )
+                    created += num_commits
+                    progress("commits", created, total)
+
+            push(commit_date_counts)
+        logger.info(f"Pushed changes to {REPO_URL} on branch {BRANCH}")
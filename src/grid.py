@@ -1,51 +1,31 @@
-import numpy as np
-import pandas as pd
-from datetime import datetime
 import logging
 
+from dates import CalendarWindow, current_window
+from timing import timed
+
 logger = logging.getLogger(__name__)
 
 def df_to_matrix(df):
     # convert a DataFrame to a numpy matrix
     matrix = df.values
-    logging.debug(f"Converting DataFrame of shape {df.shape} to matrix")
-    assert len(matrix.shape) == 2 and matrix.shape[0] == 7 and matrix.shape[1] == 52, f"DataFrame should convert to shape (7, 52), got {matrix.shape}"
+    logger.debug(f"Converting DataFrame of shape {df.shape} to matrix")
+    assert len(matrix.shape) == 2 and matrix.shape[0] == 7, f"DataFrame should convert to shape (7, weeks), got {matrix.shape}"
     return matrix
 
 
-def dict_to_matrix(date_dict):
-    # generate an 7x52 matrix from a date:count dict
-    end_date = pd.Timestamp.today().normalize()
-    end_date -= pd.Timedelta(days=(end_date.weekday() + 1) % 7)  # last Saturday
-    start_date = end_date - pd.Timedelta(weeks=52) + pd.Timedelta(days=1)
-
-    # build date index
-    all_dates = pd.date_range(start_date, end_date, freq="D")
-
-    # build empty matrix
-    matrix = np.zeros((7, 52), dtype=int)
+@timed("convert.dict_to_matrix")
+def dict_to_matrix(date_dict, window: CalendarWindow | None = None):
+    # generate a 7 x weeks matrix (7x52 by default) from a date:count dict
+    window = window or current_window()
+    matrix = window.to_matrix(window.dict_to_array(date_dict))
 
-    # fill empty matrix with dictionary values
-    for d in all_dates:
-        week = (d - start_date).days // 7
-        weekday = (d.weekday() + 1) % 7  # Sunday = 0
-        matrix[weekday, week] = date_dict.get(d.date().strftime("%Y-%m-%d"), 0) # althrough this is a datetime dict, everything stored as string
-
-    logging.debug(f"Converting date-dictionary of shape {len(date_dict)} to matrix")
-    assert len(matrix.shape) == 2 and matrix.shape[0] == 7 and matrix.shape[1] == 52, f"DataFrame should convert to shape (7, 52), got {matrix.shape}"
+    logger.debug(f"Converting date-dictionary of shape {len(date_dict)} to matrix")
+    assert matrix.shape == (7, window.weeks), f"DataFrame should convert to shape (7, {window.weeks}), got {matrix.shape}"
     return matrix
 
 
-def matrix_to_dict(matrix):
-    end_date = pd.Timestamp.today().normalize()
-    end_date -= pd.Timedelta(days=(end_date.weekday() + 1) % 7)  # last Saturday
-    start_date = end_date - pd.Timedelta(weeks=52) + pd.Timedelta(days=1)
-    reconstructed_dict = {}
-
-    for week in range(52):
-        for weekday in range(7):
-            d = start_date + pd.Timedelta(days=week * 7 + weekday)
-            reconstructed_dict[d.date().strftime("%Y-%m-%d")] = int(matrix[weekday, week]) # althrough this is a datetime dict, everything stored as string
-
-    return reconstructed_dict
-  
\ No newline at end of file
+@timed("convert.matrix_to_dict")
+def matrix_to_dict(matrix, window: CalendarWindow | None = None):
+    # flatten a 7 x weeks matrix back to date:count, column by column (Sunday first)
+    window = window or current_window()
+    return window.array_to_dict(window.from_matrix(matrix).astype(int))
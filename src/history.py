@@ -0,0 +1,156 @@
+import logging
+import os
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_BYTES = int(os.environ.get("GITHUB_GRAPH_HISTORY_BYTES", 64 * 1024))  # per session
+KEYFRAME_INTERVAL = 32  # deltas between full snapshots
+LEVEL_DTYPE = np.uint8
+
+
+class Delta:
+    """One design change: the days it touched and their levels before and after."""
+
+    __slots__ = ("indices", "old", "new")
+
+    def __init__(self, indices: np.ndarray, old: np.ndarray, new: np.ndarray):
+        self.indices = indices
+        self.old = old
+        self.new = new
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        return self.indices.nbytes + self.old.nbytes + self.new.nbytes
+
+
+class EditHistory:
+    """Undo/redo history of a design as sparse deltas in a ring buffer with a memory cap.
+
+    Each change is stored as the day indices it touched plus their old and new uint8 levels, so a
+    one-cell edit costs a few bytes and a random fill one byte per level and a small index per day.
+    Steps are numbered from the first change ever recorded; once the deltas and keyframes exceed
+    max_bytes the oldest steps are dropped and can no longer be reached. Every keyframe_interval
+    steps a full snapshot is kept, and `restore` starts from whichever of the current state and
+    the two keyframes around the target needs the fewest cell writes, so jumping far back doesn't
+    replay every delta.
+
+    Undo, redo and restore write into the caller's value array in place and return the indices
+    they changed.
+
+    Args:
+        size (int): Days in the design.
+        max_bytes (int, optional): Memory cap of deltas and keyframes. Defaults to DEFAULT_HISTORY_BYTES.
+        keyframe_interval (int, optional): Steps between snapshots. Defaults to KEYFRAME_INTERVAL.
+    """
+
+    def __init__(self, size: int, max_bytes: int = DEFAULT_HISTORY_BYTES, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.keyframe_interval = keyframe_interval
+        self.index_dtype = np.uint16 if size <= np.iinfo(np.uint16).max + 1 else np.uint32
+        self.first = 0  # step of the oldest state still reachable
+        self.step = 0  # step of the current state
+        self.nbytes = 0
+        self._deltas = deque()  # _deltas[i] leads from step first + i to first + i + 1
+        self._keyframes = {}  # step : full levels at that step
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+    @property
+    def last(self) -> int:
+        return self.first + len(self._deltas)
+
+    @property
+    def can_undo(self) -> bool:
+        return self.step > self.first
+
+    @property
+    def can_redo(self) -> bool:
+        return self.step < self.last
+
+    def record(self, indices: np.ndarray, old: np.ndarray, new: np.ndarray, values: np.ndarray) -> None:
+        """Record a change that has just been applied; values is the design after it.
+
+        Anything that could have been redone is discarded, like in any editor.
+        """
+        if len(indices) == 0:
+            return
+        self._truncate(self.step)
+        delta = Delta(np.asarray(indices).astype(self.index_dtype), np.asarray(old).astype(LEVEL_DTYPE),
+                      np.asarray(new).astype(LEVEL_DTYPE))
+        self._deltas.append(delta)
+        self.nbytes += delta.nbytes
+        self.step += 1
+        if self.step % self.keyframe_interval == 0:
+            snapshot = np.asarray(values).astype(LEVEL_DTYPE)
+            self._keyframes[self.step] = snapshot
+            self.nbytes += snapshot.nbytes
+        self._evict()
+
+    def undo(self, values: np.ndarray) -> np.ndarray:
+        return self.restore(values, self.step - 1) if self.can_undo else np.empty(0, dtype=np.int64)
+
+    def redo(self, values: np.ndarray) -> np.ndarray:
+        return self.restore(values, self.step + 1) if self.can_redo else np.empty(0, dtype=np.int64)
+
+    def restore(self, values: np.ndarray, step: int) -> np.ndarray:
+        """Bring values to the state at step (clamped to the reachable range).
+
+        Returns:
+            np.ndarray: Indices of the days that were written.
+        """
+        step = min(max(step, self.first), self.last)
+        start = self.step
+        if abs(step - self.step) > self.keyframe_interval:
+            # only the keyframes either side of the target can beat walking from here
+            cost = self._walk_cost(self.step, step)
+            below = step - step % self.keyframe_interval
+            for keyframe in (below, below + self.keyframe_interval):
+                if keyframe in self._keyframes:
+                    keyframe_cost = self.size + self._walk_cost(keyframe, step)
+                    if keyframe_cost < cost:
+                        start, cost = keyframe, keyframe_cost
+
+        if start == self.step:
+            touched = []
+        else:
+            values[:] = self._keyframes[start]
+            touched = [np.arange(self.size)]
+        for i in range(start, step):
+            delta = self._deltas[i - self.first]
+            values[delta.indices] = delta.new
+            touched.append(delta.indices)
+        for i in range(start - 1, step - 1, -1):
+            delta = self._deltas[i - self.first]
+            values[delta.indices] = delta.old
+            touched.append(delta.indices)
+        logger.debug(f"History moved from step {self.step} to {step} via step {start}")
+        self.step = step
+        return np.unique(np.concatenate(touched)) if touched else np.empty(0, dtype=np.int64)
+
+    def _walk_cost(self, start: int, stop: int) -> int:
+        # cell writes to replay the deltas between two steps
+        low, high = sorted((start, stop))
+        return sum(len(self._deltas[i - self.first]) for i in range(low, high))
+
+    def _truncate(self, step: int) -> None:
+        # drop every step after `step`
+        while self.last > step:
+            self.nbytes -= self._deltas.pop().nbytes
+        for keyframe in [k for k in self._keyframes if k > step]:
+            self.nbytes -= self._keyframes.pop(keyframe).nbytes
+
+    def _evict(self) -> None:
+        # oldest first, always keeping the change just recorded
+        while self.nbytes > self.max_bytes and len(self._deltas) > 1:
+            self.nbytes -= self._deltas.popleft().nbytes
+            self.first += 1
+            for keyframe in [k for k in self._keyframes if k < self.first]:
+                self.nbytes -= self._keyframes.pop(keyframe).nbytes
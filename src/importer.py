@@ -0,0 +1,133 @@
+import logging
+from typing import IO
+
+import numpy as np
+from PIL import Image
+
+from dates import DAYS_PER_WEEK, CalendarWindow
+from grid import matrix_to_dict
+from timing import timed
+
+logger = logging.getLogger(__name__)
+
+MAX_LEVEL = 4  # darkest of the five writer.COLORS shades
+SAMPLES_PER_CELL = 8  # decoded pixels per grid cell along each axis; enough for a fair area average
+
+
+def decode_image(source: str | IO, rows: int, cols: int) -> np.ndarray:
+    """Decode an image to a float luminance array only a few times larger than the target grid.
+
+    JPEGs are decoded straight at a reduced scale with `draft`, and every format is shrunk by an
+    integer factor with `reduce` before any conversion, so a multi-megapixel image never becomes a
+    full resolution float array. Transparent pixels count as white (empty).
+
+    Returns:
+        np.ndarray: Luminance 0 (black) to 255 (white), at least rows x cols pixels.
+    """
+    with Image.open(source) as image:
+        want = (cols * SAMPLES_PER_CELL, rows * SAMPLES_PER_CELL)
+        if image.format == "JPEG":
+            image.draft("L", want)
+        if image.mode not in ("L", "LA", "RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode == "PA" else "RGB")
+        # shrink before any per-pixel work, so compositing and conversion touch few pixels
+        factor = max(1, min(image.width // want[0], image.height // want[1]))
+        if factor > 1:
+            image = image.reduce(factor)
+        if image.mode in ("LA", "RGBA"):
+            rgba = image.convert("RGBA")
+            image = Image.alpha_composite(Image.new("RGBA", rgba.size, "white"), rgba)
+        gray = image.convert("L")
+
+    if gray.width < cols or gray.height < rows:
+        # pixel art smaller than the grid: repeat pixels rather than blur them
+        gray = gray.resize((max(cols, gray.width), max(rows, gray.height)), Image.NEAREST)
+    return np.asarray(gray, dtype=np.float32)
+
+
+def area_downsample(pixels: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Average pixels over a rows x cols grid of boxes in two vectorized reductions.
+
+    Box edges are rounded to whole pixels, so every pixel lands in exactly one cell.
+    """
+    height, width = pixels.shape
+    assert height >= rows and width >= cols, f"image of {width}x{height} is smaller than the {cols}x{rows} grid"
+    row_edges = np.linspace(0, height, rows + 1).round().astype(int)
+    col_edges = np.linspace(0, width, cols + 1).round().astype(int)
+    sums = np.add.reduceat(np.add.reduceat(pixels, row_edges[:-1], axis=0), col_edges[:-1], axis=1)
+    return sums / np.outer(np.diff(row_edges), np.diff(col_edges))
+
+
+def floyd_steinberg(intensity: np.ndarray, levels: int = MAX_LEVEL) -> np.ndarray:
+    """Quantize 0-1 intensities to 0..levels with Floyd-Steinberg error diffusion.
+
+    Error diffusion is sequential by nature, but the grid is only 7 rows of a few hundred cells,
+    so a plain loop stays in the low milliseconds.
+    """
+    scaled = intensity.astype(np.float64) * levels
+    out = np.zeros(scaled.shape, dtype=np.int64)
+    rows, cols = scaled.shape
+    for y in range(rows):
+        row = scaled[y]
+        for x in range(cols):
+            out[y, x] = min(max(round(row[x]), 0), levels)
+            error = row[x] - out[y, x]
+            if x + 1 < cols:
+                row[x + 1] += error * 7 / 16
+            if y + 1 < rows:
+                below = scaled[y + 1]
+                if x > 0:
+                    below[x - 1] += error * 3 / 16
+                below[x] += error * 5 / 16
+                if x + 1 < cols:
+                    below[x + 1] += error * 1 / 16
+    return out
+
+
+@timed("import.image")
+def image_to_grid(source: str | IO, weeks: int = 52, dither: bool = False, invert: bool = False,
+                  keep_aspect: bool = True) -> np.ndarray:
+    """Convert an image (logo, pixel art) into a 7 x weeks grid of contribution levels 0-4.
+
+    Darker pixels become darker shades. The image is scaled to the 7 rows; with keep_aspect its
+    width follows the aspect ratio (up to the full canvas) and it is centered, otherwise it is
+    stretched over every week.
+
+    Args:
+        source (str | IO): Path or binary file object of any format PIL reads.
+        weeks (int, optional): Columns of the canvas. Defaults to 52.
+        dither (bool, optional): Floyd-Steinberg dithering instead of nearest-level rounding.
+        invert (bool, optional): Treat light pixels as dark, e.g. for logos on a dark background.
+        keep_aspect (bool, optional): Keep the image's aspect ratio. Defaults to True.
+
+    Returns:
+        np.ndarray: 7 x weeks integer matrix of levels 0-4.
+    """
+    with Image.open(source) as probe:
+        width, height = probe.size
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    cols = weeks
+    if keep_aspect:
+        cols = int(min(weeks, max(1, round(DAYS_PER_WEEK * width / height))))
+    pixels = decode_image(source, DAYS_PER_WEEK, cols)
+    intensity = area_downsample(pixels, DAYS_PER_WEEK, cols) / 255.0
+    if not invert:
+        intensity = 1.0 - intensity
+
+    if dither:
+        levels = floyd_steinberg(intensity)
+    else:
+        levels = np.clip(np.rint(intensity * MAX_LEVEL), 0, MAX_LEVEL).astype(np.int64)
+
+    grid = np.zeros((DAYS_PER_WEEK, weeks), dtype=np.int64)
+    left = (weeks - cols) // 2
+    grid[:, left:left + cols] = levels
+    logger.debug(f"Imported {width}x{height} image into a 7x{weeks} grid ({cols} weeks wide)")
+    return grid
+
+
+def image_to_dict(source: str | IO, window: CalendarWindow, **options) -> dict:
+    # an image as a date:level dict over the window, through the usual matrix_to_dict path
+    return matrix_to_dict(image_to_grid(source, window.weeks, **options), window)
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def get_letter_map():
     """
     Returns a dictionary mapping letters and digits to their ASCII art representations.
@@ -50,3 +53,39 @@ def get_letter_map():
     }
 
     return LETTER_MAP
+
+
+GLYPH_HEIGHT = 5
+GLYPH_WIDTH = 5
+
+
+def compile_glyphs(letter_map: dict) -> dict:
+    """
+    Compiles ASCII art letters into boolean numpy glyph arrays.
+
+    Every glyph is padded to GLYPH_HEIGHT x GLYPH_WIDTH so they can be stamped with slice assignment.
+
+    Args:
+        letter_map (dict): Characters mapped to lists of "#"/" " row strings.
+
+    Returns:
+        dict: A dictionary mapping characters to read-only boolean arrays of shape (5, 5).
+    """
+    glyphs = {}
+    for char, rows in letter_map.items():
+        glyph = np.zeros((GLYPH_HEIGHT, GLYPH_WIDTH), dtype=bool)
+        for r, row in enumerate(rows[:GLYPH_HEIGHT]):
+            glyph[r, :len(row[:GLYPH_WIDTH])] = [c == "#" for c in row[:GLYPH_WIDTH]]
+        glyph.flags.writeable = False
+        glyphs[char] = glyph
+    return glyphs
+
+
+GLYPHS = compile_glyphs(get_letter_map())  # compiled once at import
+
+# stacked glyphs plus an ASCII lookup, so whole strings can be rasterized with fancy indexing;
+# id 0 is reserved for characters missing from the font
+GLYPH_CHARS = list(GLYPHS)
+GLYPH_TABLE = np.stack([np.zeros((GLYPH_HEIGHT, GLYPH_WIDTH), dtype=bool)] + [GLYPHS[c] for c in GLYPH_CHARS])
+CHAR_TO_GLYPH = np.zeros(128, dtype=np.intp)
+CHAR_TO_GLYPH[[ord(c) for c in GLYPH_CHARS]] = np.arange(1, len(GLYPH_CHARS) + 1)
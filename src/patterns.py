@@ -0,0 +1,229 @@
+"""Seeded, vectorized pattern generators that fill a calendar window with levels 0-4.
+
+Every generator writes a batch of candidates at once into a (count, days) uint8 array laid out
+like CalendarWindow's day array: day i sits on weekday i % 7 (Sunday = 0) of week i // 7, so a
+candidate becomes the editor matrix with window.to_matrix and a batch of them stays one array.
+The per-day work is numpy arithmetic over the whole batch; only the cellular automaton steps
+week by week, over every row and candidate at once.
+
+    levels = generate("noise", window, count=24, seed=7)   # 24 candidates
+    matrix = window.to_matrix(levels[0])
+"""
+import logging
+
+import numpy as np
+
+from dates import DAYS_PER_WEEK, CalendarWindow
+from planner import MAX_LEVEL, count_levels, year_slices
+from timing import timed
+
+logger = logging.getLogger(__name__)
+
+LEVELS = MAX_LEVEL + 1
+AUTOMATON_RULES = (30, 45, 73, 90, 105, 110, 150)  # elementary rules that neither die out nor freeze
+# level odds per weekday (Sunday first) when there is no history to sample: busy weekdays, quiet weekends
+DEFAULT_ACTIVITY = np.array([
+    [0.70, 0.20, 0.07, 0.02, 0.01],
+    [0.20, 0.25, 0.25, 0.18, 0.12],
+    [0.15, 0.25, 0.25, 0.20, 0.15],
+    [0.15, 0.25, 0.25, 0.20, 0.15],
+    [0.15, 0.25, 0.25, 0.20, 0.15],
+    [0.25, 0.30, 0.22, 0.15, 0.08],
+    [0.70, 0.20, 0.07, 0.02, 0.01],
+])
+
+
+def _grid(days: int) -> tuple:
+    # weekday row and week column of every day
+    i = np.arange(days)
+    return i % DAYS_PER_WEEK, i // DAYS_PER_WEEK
+
+
+def _normalize(field: np.ndarray) -> np.ndarray:
+    # stretch every candidate's field to 0..1
+    low = field.min(axis=1, keepdims=True)
+    span = field.max(axis=1, keepdims=True) - low
+    return (field - low) / np.where(span > 0, span, 1)
+
+
+def _quantize(field: np.ndarray, out: np.ndarray) -> np.ndarray:
+    # equal bands of a 0..1 field become levels 0-4
+    np.minimum(field * LEVELS, MAX_LEVEL, out=field)
+    out[:] = field
+    return out
+
+
+def _quantize_evenly(field: np.ndarray, out: np.ndarray) -> np.ndarray:
+    # per-candidate quantiles as cut points, so every level covers about a fifth of the days
+    cuts = np.quantile(field, np.arange(1, LEVELS) / LEVELS, axis=1).T  # count x 4
+    out[:] = (field[..., None] > cuts[:, None, :]).sum(axis=-1)
+    return out
+
+
+def random_levels(rng: np.random.Generator, out: np.ndarray) -> np.ndarray:
+    """Independent uniform levels 0-4 on every day."""
+    out[:] = rng.integers(0, LEVELS, out.shape, dtype=np.uint8)
+    return out
+
+
+def gradient(rng: np.random.Generator, out: np.ndarray, angle: float | None = None, bands: int = 1) -> np.ndarray:
+    """Linear ramps from level 0 to 4 across the grid.
+
+    Args:
+        angle (float, optional): Direction in degrees; 0 runs left to right, 90 Sunday to Saturday.
+            Random per candidate by default.
+        bands (int, optional): Times the ramp repeats. Defaults to 1.
+    """
+    count, days = out.shape
+    rows, weeks = _grid(days)
+    degrees = rng.uniform(0, 360, (count, 1)) if angle is None else np.full((count, 1), float(angle))
+    theta = np.radians(degrees)
+    # rows are stretched to the grid's width so that 45 degrees runs corner to corner
+    stretch = max(1, days // DAYS_PER_WEEK - 1) / (DAYS_PER_WEEK - 1)
+    field = _normalize(np.cos(theta) * weeks + np.sin(theta) * rows * stretch)
+    if bands > 1:
+        field = _normalize(field * bands % 1.0)
+    return _quantize(field, out)
+
+
+def noise(rng: np.random.Generator, out: np.ndarray, scale: float = 4.0, octaves: int = 2) -> np.ndarray:
+    """Smooth value noise: random lattice values blended across the grid, finer octaves added on top.
+
+    Args:
+        scale (float, optional): Cells between lattice points of the coarsest octave. Defaults to 4.
+        octaves (int, optional): Layers, each at half the scale and half the weight. Defaults to 2.
+    """
+    count, days = out.shape
+    rows, weeks = _grid(days)
+    field = np.zeros(out.shape)
+    for octave in range(octaves):
+        step = max(1.0, scale / 2 ** octave)
+        y, x = rows / step, weeks / step
+        y0, x0 = y.astype(int), x.astype(int)
+        ty, tx = y - y0, x - x0
+        ty, tx = ty * ty * (3 - 2 * ty), tx * tx * (3 - 2 * tx)  # smoothstep, no creases at lattice lines
+        lattice = rng.random((count, y0.max() + 2, x0.max() + 2))
+        top = lattice[:, y0, x0] * (1 - tx) + lattice[:, y0, x0 + 1] * tx
+        bottom = lattice[:, y0 + 1, x0] * (1 - tx) + lattice[:, y0 + 1, x0 + 1] * tx
+        field += (top * (1 - ty) + bottom * ty) / 2 ** octave
+    return _quantize_evenly(field, out)
+
+
+def activity_odds(history: np.ndarray | None) -> np.ndarray:
+    """Odds of each level on each weekday in a fetched history, as a 7 x 5 array.
+
+    Counts are shaded per displayed year the way GitHub does (planner.count_levels). Days are
+    weighted equally and a small prior keeps every level possible; without any contributions
+    the odds are DEFAULT_ACTIVITY.
+    """
+    if history is None or not np.any(history):
+        return DEFAULT_ACTIVITY
+    history = np.asarray(history)
+    levels = np.zeros(len(history), dtype=np.int64)
+    for year in year_slices(len(history)):
+        levels[year] = count_levels(history[year])
+    rows, _ = _grid(len(history))
+    tally = np.zeros((DAYS_PER_WEEK, LEVELS))
+    np.add.at(tally, (rows, levels), 1)
+    tally += 0.5
+    return tally / tally.sum(axis=1, keepdims=True)
+
+
+def activity(rng: np.random.Generator, out: np.ndarray, history: np.ndarray | None = None) -> np.ndarray:
+    """Realistic activity: every day's level drawn from the odds of its weekday in the user's history.
+
+    Args:
+        history (np.ndarray, optional): Fetched daily counts over a window of whole weeks, like
+            GridPipeline.baseline.values. Weekday-heavy DEFAULT_ACTIVITY odds when None or empty.
+    """
+    rows, _ = _grid(out.shape[1])
+    thresholds = np.cumsum(activity_odds(history), axis=1)[:, :-1]  # 7 x 4
+    draws = rng.random(out.shape)
+    out[:] = (draws[..., None] >= thresholds[rows]).sum(axis=-1)
+    return out
+
+
+def automaton(rng: np.random.Generator, out: np.ndarray, rule: int | None = None) -> np.ndarray:
+    """Elementary cellular automaton: each week is the next generation of the 7 weekday cells.
+
+    Rows wrap around, and a cell's level is how many of the last 4 generations it was alive in,
+    so live cells leave a fading trail behind them.
+
+    Args:
+        rule (int, optional): Wolfram rule 0-255. Random per candidate from AUTOMATON_RULES by default.
+    """
+    count, days = out.shape
+    weeks = days // DAYS_PER_WEEK
+    rules = rng.choice(AUTOMATON_RULES, count) if rule is None else np.full(count, rule)
+    table = (rules[:, None] >> np.arange(8)) & 1  # next state of each 3-cell neighbourhood
+    candidate = np.arange(count)[:, None]
+    alive = np.zeros((count, weeks + 1, DAYS_PER_WEEK), dtype=np.uint8)
+    state = rng.integers(0, 2, (count, DAYS_PER_WEEK), dtype=np.uint8)
+    for week in range(weeks):
+        alive[:, week + 1] = state
+        neighbourhood = np.roll(state, 1, axis=1) * 4 + state * 2 + np.roll(state, -1, axis=1)
+        state = table[candidate, neighbourhood].astype(np.uint8)
+    # live generations in a sliding 4-week window, from a running total
+    total = np.cumsum(alive, axis=1, dtype=np.int16)
+    trail = total[:, 1:] - total[:, np.maximum(np.arange(weeks) + 1 - MAX_LEVEL, 0)]
+    out[:] = trail.reshape(count, days)
+    return out
+
+
+def wave(rng: np.random.Generator, out: np.ndarray, period: float | None = None, tilt: float | None = None,
+         animate: bool = False) -> np.ndarray:
+    """Travelling sine waves across the weeks.
+
+    Args:
+        period (float, optional): Weeks per wave. Random 6-26 per candidate by default.
+        tilt (float, optional): Phase shift in waves per row, slanting the crests. Random by default.
+        animate (bool, optional): Share period and tilt across the batch and step the phase evenly
+            through one cycle, so the candidates are the frames of a looping animation.
+    """
+    count, days = out.shape
+    rows, weeks = _grid(days)
+    shared = 1 if animate else count
+    period = rng.uniform(6, 26, (shared, 1)) if period is None else np.full((shared, 1), float(period))
+    tilt = rng.uniform(-0.15, 0.15, (shared, 1)) if tilt is None else np.full((shared, 1), float(tilt))
+    if animate:
+        phase = np.arange(count)[:, None] / count
+    else:
+        phase = rng.random((count, 1))
+    field = np.sin(2 * np.pi * (weeks / period + rows * tilt + phase))
+    out[:] = np.rint((field + 1) * (MAX_LEVEL / 2))
+    return out
+
+
+PATTERNS = {
+    "random": random_levels,
+    "gradient": gradient,
+    "noise": noise,
+    "activity": activity,
+    "automaton": automaton,
+    "wave": wave,
+}
+
+
+@timed("patterns.generate")
+def generate(pattern: str, window: CalendarWindow, count: int = 1, seed: int | None = None,
+             out: np.ndarray | None = None, **params) -> np.ndarray:
+    """Generate `count` candidates of a pattern over a calendar window.
+
+    Args:
+        pattern (str): One of PATTERNS.
+        window (CalendarWindow): Window the levels are laid out on.
+        count (int, optional): Candidates generated at once. Defaults to 1.
+        seed (int, optional): Seed for reproducible candidates. Fresh entropy when None.
+        out (np.ndarray, optional): (count, days) uint8 array to write into instead of a new one.
+        **params: Options of the generator, e.g. history= for "activity" or animate= for "wave".
+
+    Returns:
+        np.ndarray: (count, days) uint8 levels 0-4.
+    """
+    assert pattern in PATTERNS, f"unknown pattern {pattern!r}, expected one of {tuple(PATTERNS)}"
+    if out is None:
+        out = np.empty((count, len(window)), dtype=np.uint8)
+    assert out.shape == (count, len(window)), f"out should have shape {(count, len(window))}, got {out.shape}"
+    PATTERNS[pattern](np.random.default_rng(seed), out, **params)
+    logger.debug(f"Generated {count} {pattern} candidates over {len(window)} days")
+    return out
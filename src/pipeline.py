@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from canvas import COUNT_DTYPE, ContributionCanvas
+from dates import CalendarWindow, current_window
+from history import EditHistory
+from planner import MAX_LEVEL, CommitPlan, count_levels, plan_commits, year_slices
+from timing import timed
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SAMPLES = 200  # rerun timings kept per interaction type
+
+
+class GridPipeline:
+    """Incremental editor state: the design canvas, the fetched baseline and derived totals.
+
+    The design holds target levels 0-4. `update` compares a new matrix against the current design
+    and only applies the cells that changed; totals move by the delta of those cells and `version`
+    bumps whenever anything did. The commit plan is compiled from the levels and the fetched
+    history once per version, and date strings are only built for the upload. Every change to
+    the design is recorded in `history` as a sparse delta, so it can be undone and redone.
+
+    Args:
+        window (CalendarWindow, optional): Calendar window the design covers.
+    """
+
+    def __init__(self, window: CalendarWindow | None = None):
+        self.window = window or current_window()
+        self.canvas = ContributionCanvas(self.window)
+        self.baseline = ContributionCanvas(self.window)
+        self.total = 0
+        self.version = 0
+        self.history = EditHistory(len(self.window))
+        self._plan = None
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.canvas.values
+
+    @property
+    def matrix(self) -> np.ndarray:
+        # a copy, so DataFrames built from it never alias the live values
+        return self.canvas.matrix.copy()
+
+    @property
+    def baseline_total(self) -> int:
+        return self.baseline.total
+
+    @property
+    def plan(self) -> CommitPlan:
+        # fewest commits that shade every design day at its level on top of the fetched history
+        if self._plan is None or self._plan[0] != self.version:
+            self._plan = (self.version, plan_commits(self.window, self.values, self.baseline.values))
+        return self._plan[1]
+
+    @property
+    def submit_commit_date_count(self) -> dict:
+        # commits to upload, non-zero days only
+        return self.plan.to_dict()
+
+    @property
+    def upload_baseline(self) -> dict:
+        # every fetched count the plan is measured on top of, so uploads of any design against the
+        # same fetch share one BaselineSnapshot
+        keys = self.window.keys
+        return {keys[i]: int(self.baseline.values[i]) for i in np.flatnonzero(self.baseline.values)}
+
+    def _rebuild(self) -> None:
+        self.total = self.canvas.total
+        self.version += 1
+
+    @timed("pipeline.update")
+    def update(self, matrix) -> int:
+        """Bring the pipeline in line with an edited 7 x weeks matrix.
+
+        Returns:
+            int: Number of cells that changed.
+        """
+        new_values = self.window.from_matrix(np.nan_to_num(np.asarray(matrix, dtype=float)))
+        new_values = np.clip(new_values, 0, MAX_LEVEL).astype(COUNT_DTYPE)
+        changed = np.flatnonzero(new_values != self.values)
+        if len(changed) == 0:
+            return 0
+        old_values = self.values[changed]
+        delta = int(new_values[changed].sum(dtype=np.int64) - old_values.sum(dtype=np.int64))
+        self.values[changed] = new_values[changed]
+        self.history.record(changed, old_values, new_values[changed], self.values)
+        self.total += delta
+        self.version += 1
+        logger.debug(f"Pipeline updated {len(changed)} cells, version {self.version}")
+        return len(changed)
+
+    def load(self, date_dict: dict) -> None:
+        # replace the design with a date:count dict, starting a fresh history
+        self.canvas = ContributionCanvas.from_dict(date_dict, self.window)
+        self.history = EditHistory(len(self.window))
+        self._rebuild()
+
+    def undo(self) -> int:
+        """Step the design back one change; returns the number of days it touched."""
+        return self._moved(self.history.undo(self.values))
+
+    def redo(self) -> int:
+        return self._moved(self.history.redo(self.values))
+
+    def restore(self, step: int) -> int:
+        # jump to any reachable history step
+        return self._moved(self.history.restore(self.values, step))
+
+    def _moved(self, touched: np.ndarray) -> int:
+        if len(touched):
+            self._rebuild()
+        return len(touched)
+
+    def set_baseline(self, api_date_dict: dict) -> None:
+        # the fetched history the upload diff is measured against
+        self.baseline = ContributionCanvas.from_dict(api_date_dict, self.window)
+        self._rebuild()
+
+    def merge_history(self, history: ContributionCanvas) -> None:
+        """Adopt fetched history as the baseline and copy its levels into the design.
+
+        The history canvas is kept by reference, so sessions showing the same user share one
+        read-only copy (see canvas.history_canvas). Levels are shaded per displayed year, the same
+        way the commit planner judges them.
+        """
+        assert (history.window.start, history.window.end) == (self.window.start, self.window.end), \
+            "history must cover the pipeline's window"
+        self.baseline = history
+        levels = np.zeros(len(self.window), dtype=COUNT_DTYPE)
+        for year in year_slices(len(self.window)):
+            levels[year] = count_levels(history.values[year])
+        changed = np.flatnonzero(levels != self.values)
+        old_values = self.values[changed]
+        self.values[changed] = levels[changed]
+        self.history.record(changed, old_values, levels[changed], self.values)
+        self._rebuild()
+
+
+class RerunTimer:
+    """Rolling per-interaction rerun latencies for the app's diagnostics panel.
+
+    The app shares one timer across sessions (default_rerun_timer) and times each rerun with a
+    local start time passed to `record`; `start`/`stop` suit a single caller such as a benchmark.
+    """
+
+    def __init__(self, max_samples: int = LATENCY_SAMPLES):
+        self.max_samples = max_samples
+        self.samples = {}
+        self._start = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+
+    def stop(self, interaction: str) -> float:
+        return self.record(interaction, (time.perf_counter() - self._start) * 1000)
+
+    def record(self, interaction: str, elapsed_ms: float) -> float:
+        with self._lock:
+            self.samples.setdefault(interaction, deque(maxlen=self.max_samples)).append(elapsed_ms)
+        return elapsed_ms
+
+    def summary(self) -> dict:
+        """interaction : {"n", "p50", "p95"} in milliseconds"""
+        with self._lock:
+            samples = {interaction: list(values) for interaction, values in self.samples.items() if values}
+        return {
+            interaction: {
+                "n": len(values),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+            }
+            for interaction, values in samples.items()
+        }
+
+
+_default_rerun_timer = None
+
+
+def default_rerun_timer() -> RerunTimer:
+    # one latency history per process: the percentiles describe the server, not a single tab
+    global _default_rerun_timer
+    if _default_rerun_timer is None:
+        _default_rerun_timer = RerunTimer()
+    return _default_rerun_timer
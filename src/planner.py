@@ -0,0 +1,181 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+from dates import DAYS_PER_WEEK, WEEKS, CalendarWindow
+from timing import timed
+
+logger = logging.getLogger(__name__)
+
+MAX_LEVEL = 4  # darkest shade in writer.COLORS
+LEVEL_PERCENTILES = (25, 50, 75)  # quartiles of the non-zero days split levels 1-4
+DEFAULT_THRESHOLDS = np.array([1.0, 2.0, 3.0])  # used while a year has no contributions at all
+PLAN_ITERATIONS = 16
+OBJECTS_PER_DAY = 2  # every commit on a day shares one activity.log blob and one tree
+ADDITION_DTYPE = np.uint16  # days are only raised, never past the largest count a canvas holds
+LEVEL_DTYPE = np.uint8  # a plan lives in every session, so both arrays are stored compactly
+
+
+def level_thresholds(counts: np.ndarray) -> np.ndarray:
+    """Count quartiles that separate levels 1-4, from the non-zero days of one displayed year.
+
+    This mirrors how GitHub shades the graph: a day is level 1 up to the first quartile of the
+    year's non-zero daily counts, level 2 up to the median, level 3 up to the third quartile and
+    level 4 above it. The exact boundaries GitHub uses are not published, so treat it as a model.
+    """
+    nonzero = counts[counts > 0]
+    if len(nonzero) == 0:
+        return DEFAULT_THRESHOLDS
+    return np.percentile(nonzero, LEVEL_PERCENTILES)
+
+
+def count_levels(counts: np.ndarray, thresholds: np.ndarray | None = None) -> np.ndarray:
+    """Shade level 0-4 of every day's count."""
+    counts = np.asarray(counts)
+    thresholds = level_thresholds(counts) if thresholds is None else thresholds
+    levels = 1 + (counts[:, None] > thresholds).sum(axis=1)
+    return np.where(counts > 0, levels, 0)
+
+
+def level_minimums(thresholds: np.ndarray) -> np.ndarray:
+    # smallest daily count that reaches each level 0-4
+    return np.concatenate(([0, 1], np.floor(thresholds).astype(np.int64) + 1))
+
+
+def year_slices(days: int, tile_days: int = WEEKS * DAYS_PER_WEEK) -> list:
+    """Slices of year-sized runs of days ending on the last day, matching ContributionCanvas.tiles."""
+    return [slice(max(0, stop - tile_days), stop) for stop in range(days, 0, -tile_days)][::-1]
+
+
+@dataclass
+class CommitPlan:
+    """Commits to add per day so a target level grid shows up on top of the existing history.
+
+    Attributes:
+        additions (np.ndarray): Commits to add on each day of the window.
+        levels (np.ndarray): Level every day is expected to show after the upload.
+        unreachable (int): Target days the plan could not shade exactly, e.g. when the history
+            already puts a day above its target or too many days ask for the darkest shade.
+    """
+
+    window: CalendarWindow
+    additions: np.ndarray
+    levels: np.ndarray
+    unreachable: int
+
+    @property
+    def commits(self) -> int:
+        return int(self.additions.sum(dtype=np.int64))
+
+    @property
+    def days(self) -> int:
+        return int(np.count_nonzero(self.additions))
+
+    @property
+    def objects(self) -> int:
+        # git objects the push sends: one commit each, plus a blob and a tree per touched day
+        return self.commits + OBJECTS_PER_DAY * self.days
+
+    def to_dict(self) -> dict:
+        """date : commits to add, non-zero days only"""
+        keys = self.window.keys
+        return {keys[i]: int(self.additions[i]) for i in np.flatnonzero(self.additions)}
+
+
+def level_ladder(target: np.ndarray, history: np.ndarray) -> np.ndarray:
+    """Daily counts that rank the target days by level, for plan_year to start from.
+
+    Shades follow the rank of a day among the year's non-zero days, so the target days are sorted
+    by level and given counts that step up by one wherever the level changes, and wherever a
+    quartile of the target days falls inside a darker level's run. A level with fewer days than
+    a quarter of the target then leaves the bottom of the next run one shade light, instead of
+    the whole run. Counts never drop below the history.
+    """
+    final = history.copy()
+    days = np.flatnonzero(target > 0)
+    if len(days) == 0:
+        return final
+    order = days[np.lexsort((history[days], target[days]))]
+    levels = target[order]
+    step = np.zeros(len(order), dtype=np.int64)
+    step[1:] = np.diff(levels) > 0
+    cuts = np.floor(np.array(LEVEL_PERCENTILES) / 100 * (len(order) - 1)).astype(np.int64) + 1
+    for level, cut in enumerate(cuts, start=1):
+        if cut >= len(order) or levels[cut] != level + 1:
+            continue
+        # split the run only when most of it keeps its shade; otherwise it stays one shade too light
+        start, stop = np.searchsorted(levels, level + 1), np.searchsorted(levels, level + 1, side="right")
+        if stop - cut >= cut - start:
+            step[cut] = 1
+    # count i is max(history i, count i-1 + step i), starting from 1
+    rise = np.cumsum(step)
+    final[order] = rise + np.maximum.accumulate(np.maximum(history[order] - rise, 1))
+    return final
+
+
+def plan_year(target: np.ndarray, history: np.ndarray, iterations: int = PLAN_ITERATIONS) -> tuple:
+    """Fewest commits per day that bring one year of history to the target levels.
+
+    Levels depend on where a day's count ranks among the year's non-zero days, so candidates are
+    scored on the final shades: the total distance from the target levels, then the commits
+    added. Every candidate gives every target day at least one commit. The candidates are the
+    target days lifted to one commit, level_ladder, and rounds of raising each day to the minimum
+    count of its target level under the current boundaries, recomputed from the result until they
+    stop moving. Days are only ever raised, since existing commits can't be taken away.
+
+    Returns:
+        tuple: (final daily counts, expected levels)
+    """
+    target = np.clip(target, 0, MAX_LEVEL)
+    wanted = target > 0
+    best = None
+
+    def consider(final: np.ndarray) -> np.ndarray:
+        nonlocal best
+        thresholds = level_thresholds(final)
+        levels = count_levels(final, thresholds)
+        score = (np.abs(levels - target)[wanted].sum(), (final - history).sum(dtype=np.int64))
+        if best is None or score < best[0]:
+            best = (score, final, levels)
+        return thresholds
+
+    consider(np.maximum(history, wanted))  # the lightest plan that shows every target day
+    consider(level_ladder(target, history))
+    thresholds = level_thresholds(history)
+    for _ in range(iterations):
+        # quartile boundaries can chase the raised days upwards forever, so keep the closest match
+        new_thresholds = consider(np.maximum(history, level_minimums(thresholds)[target]))
+        if np.array_equal(new_thresholds, thresholds):
+            break
+        thresholds = new_thresholds
+    return best[1], best[2]
+
+
+@timed("plan.compile")
+def plan_commits(window: CalendarWindow, target_levels: np.ndarray, history: np.ndarray) -> CommitPlan:
+    """Compile a target level grid into the minimum commits per day, one displayed year at a time.
+
+    Args:
+        window (CalendarWindow): Window the day arrays cover.
+        target_levels (np.ndarray): Desired level 0-4 per day. Days at 0 get no commits.
+        history (np.ndarray): Existing contribution count per day, e.g. from the Contributions API.
+
+    Returns:
+        CommitPlan: Commits to add per day, the expected levels and the days that can't be matched.
+    """
+    target = np.asarray(target_levels, dtype=np.int64)
+    history = np.asarray(history, dtype=np.int64)
+    additions = np.zeros(len(window), dtype=ADDITION_DTYPE)
+    levels = np.zeros(len(window), dtype=LEVEL_DTYPE)
+
+    for year in year_slices(len(window)):
+        final, levels[year] = plan_year(target[year], history[year])
+        additions[year] = final - history[year]
+
+    # only days with a target are judged; untouched days keep whatever shade their history has
+    wanted = target > 0
+    unreachable = int(np.count_nonzero(levels[wanted] != np.clip(target[wanted], 0, MAX_LEVEL)))
+    plan = CommitPlan(window, additions, levels, unreachable)
+    logger.debug(f"Planned {plan.commits} commits over {plan.days} days, {unreachable} days unreachable")
+    return plan
@@ -0,0 +1,177 @@
+import os
+import shutil
+import hashlib
+import subprocess
+import threading
+import logging
+from contextlib import contextmanager
+
+from timing import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "github-contribution-graph-editor", "repos")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MiB across all cached working copies
+LAST_USED_FILE = os.path.join(".git", "last_used")
+
+_locks: dict = {}
+_locks_guard = threading.Lock()
+
+
+def _path_lock(path: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def _git(args: list, cwd: str | None = None) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class RepoCache:
+    """Reusable on-disk working copies, one per (repo url, branch), fetched incrementally.
+
+    Args:
+        root (str, optional): Directory holding the cached working copies.
+            Defaults to $GITHUB_GRAPH_CACHE_DIR or ~/.cache/github-contribution-graph-editor/repos.
+        max_bytes (int, optional): Disk budget; least recently used copies are evicted beyond it.
+        depth (int, optional): Shallow clone/fetch depth. Defaults to full history. An upload to an
+            existing branch still fetches the rest (see unshallow), since it scans the whole branch.
+        filter (str, optional): Partial clone filter passed to git, e.g. "blob:none".
+    """
+
+    def __init__(self, root: str | None = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 depth: int | None = None, filter: str | None = None):
+        self.root = root or os.environ.get("GITHUB_GRAPH_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.depth = depth
+        self.filter = filter
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, repo_url: str, branch: str) -> str:
+        key = hashlib.sha1(f"{repo_url}#{branch}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.root, key)
+
+    def checkpoint_path(self, repo_url: str, branch: str, key: str) -> str:
+        # upload checkpoints sit next to the working copy as files, so eviction leaves them alone
+        return f"{self.path_for(repo_url, branch)}.{key}.checkpoint.json"
+
+    def _transfer_args(self) -> list:
+        args = []
+        if self.depth:
+            args.append(f"--depth={self.depth}")
+        if self.filter:
+            args.append(f"--filter={self.filter}")
+        return args
+
+    def _sync(self, repo_url: str, path: str) -> None:
+        # clone once, afterwards only fetch what changed on the remote
+        if os.path.isdir(os.path.join(path, ".git")):
+            result = _git(["fetch", "--prune", *self._transfer_args(), "origin"], cwd=path)
+            if result.returncode == 0:
+                return
+            logger.warning(f"Fetch failed for cached copy {path}, recloning: {result.stderr.strip()}")
+            shutil.rmtree(path, ignore_errors=True)
+
+        logger.info(f"Cloning {repo_url} into cache {path}")
+        result = _git(["clone", "--no-checkout", "--no-single-branch", *self._transfer_args(), repo_url, path])
+        if result.returncode != 0:
+            shutil.rmtree(path, ignore_errors=True)
+            raise RuntimeError(f"git clone failed: {result.stderr.strip()}")
+
+    def _reset_to(self, path: str, branch: str) -> bool:
+        # the fetched remote refs answer whether the branch exists, no separate ls-remote needed
+        branch_found = _git(["rev-parse", "--verify", "--quiet", f"refs/remotes/origin/{branch}"], cwd=path).returncode == 0
+        if branch_found:
+            start = f"origin/{branch}"
+        else:
+            if _git(["rev-parse", "--verify", "--quiet", "refs/remotes/origin/HEAD"], cwd=path).returncode != 0:
+                _git(["remote", "set-head", "origin", "--auto"], cwd=path)
+            has_default = _git(["rev-parse", "--verify", "--quiet", "refs/remotes/origin/HEAD"], cwd=path).returncode == 0
+            start = "origin/HEAD" if has_default else None
+
+        if start:
+            result = _git(["checkout", "--force", "-B", branch, start], cwd=path)
+            if result.returncode != 0:
+                raise RuntimeError(f"git checkout failed: {result.stderr.strip()}")
+        else:
+            # empty remote: leave an unborn branch so the first commit becomes the root
+            _git(["symbolic-ref", "HEAD", f"refs/heads/{branch}"], cwd=path)
+            _git(["update-ref", "-d", f"refs/heads/{branch}"], cwd=path)
+            _git(["read-tree", "--empty"], cwd=path)
+        _git(["clean", "-ffdxq"], cwd=path)
+        return branch_found
+
+    def unshallow(self, path: str) -> None:
+        """Fetch the full history into a shallow working copy (see `depth`), so a log of the branch is complete.
+
+        Raises:
+            RuntimeError: The missing history couldn't be fetched.
+        """
+        if not os.path.exists(os.path.join(path, ".git", "shallow")):
+            return
+        logger.info(f"Fetching full history into shallow copy {path}")
+        result = _git(["fetch", "--unshallow", "origin"], cwd=path)
+        if result.returncode != 0:
+            raise RuntimeError(f"git fetch --unshallow failed: {result.stderr.strip()}")
+
+    @contextmanager
+    def checkout(self, repo_url: str, branch: str):
+        """Yield (Repo, branch_found) for a clean working copy of branch, or of the default branch
+        checked out under the name `branch` when it doesn't exist on the remote yet."""
+        from git import Repo  # GitPython is only loaded once an upload actually needs it
+
+        path = self.path_for(repo_url, branch)
+        with _path_lock(path):
+            with span("upload.clone"):
+                self._sync(repo_url, path)
+                branch_found = self._reset_to(path, branch)
+            repo = Repo(path)
+            try:
+                yield repo, branch_found
+            finally:
+                repo.close()
+                with open(os.path.join(path, LAST_USED_FILE), "w"):
+                    pass
+        self.evict(keep=path)
+
+    def evict(self, keep: str | None = None) -> None:
+        """Remove least recently used working copies until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(path):
+                continue
+            marker = os.path.join(path, LAST_USED_FILE)
+            last_used = os.path.getmtime(marker) if os.path.exists(marker) else 0
+            entries.append((last_used, path, _dir_size(path)))
+
+        total = sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep or _path_lock(path).locked():
+                continue
+            logger.debug(f"Evicting cached working copy {path} ({size} bytes)")
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+_default_cache = None
+
+
+def default_repo_cache() -> RepoCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RepoCache()
+    return _default_cache
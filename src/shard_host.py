@@ -0,0 +1,44 @@
+"""Process that runs a sharded upload's worker pool; sharded_upload starts it as a script.
+
+Its __main__ is this file, so the spawned workers re-run nothing but these imports. The parent
+writes one pickled job, the arguments of sharded_upload.upload_shards, to stdin and later a byte
+to cancel; the host answers on stdout with pickled ("progress", event) messages and finally
+("done", results) or ("error", exception).
+"""
+import os
+import sys
+import pickle
+import threading
+
+from sharded_upload import upload_shards
+
+
+def main() -> None:
+    # messages go out on the original stdout; anything else printed there lands on stderr
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    job = pickle.load(sys.stdin.buffer)
+    cancel = threading.Event()
+
+    def send(message: tuple) -> None:
+        pickle.dump(message, out)
+        out.flush()
+
+    def watch_parent() -> None:
+        # a cancel byte, or the end of stdin when the parent is gone
+        sys.stdin.buffer.read(1)
+        cancel.set()
+
+    watcher = threading.Thread(target=watch_parent)
+    watcher.start()
+    try:
+        results = upload_shards(**job, progress=lambda *event: send(("progress", event)), cancel=cancel)
+    except Exception as e:
+        send(("error", e))
+    else:
+        send(("done", results))
+    watcher.join()  # the parent closes stdin once it has the answer
+
+
+if __name__ == "__main__":
+    main()
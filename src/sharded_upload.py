@@ -0,0 +1,277 @@
+import os
+import sys
+import time
+import pickle
+import logging
+import threading
+import subprocess
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from queue import Empty
+from typing import Callable
+
+from github_interaction import UPLOAD_BRANCH, UploadCancelled, UploadCheckpoint, github_upload_commits, plan_key
+from repo_cache import RepoCache
+
+logger = logging.getLogger(__name__)
+
+SHARD_MODES = ("volume", "date")
+DEFAULT_MAX_PUSHES = 2  # pushes in flight at once across all shards
+MAX_SHARD_WORKERS = 8  # shards mostly wait on git and the network, so this isn't tied to the CPU count
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY = 2.0  # seconds before the first retry, doubled for every further one
+SHARD_HOST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "shard_host.py")
+
+# set in every worker process by _init_worker
+_push_slots = None
+_cancel = None
+_events = None
+
+
+@dataclass(frozen=True)
+class UploadTarget:
+    """One repository branch a shard of the plan is pushed to."""
+
+    repo_url: str
+    branch: str = UPLOAD_BRANCH
+
+    @classmethod
+    def parse(cls, text: str) -> "UploadTarget":
+        # "https://github.com/me/graph-1.git" or "https://github.com/me/graph-1.git#Automation"
+        repo_url, _, branch = text.strip().partition("#")
+        return cls(repo_url, branch or UPLOAD_BRANCH)
+
+    def __str__(self) -> str:
+        return f"{self.repo_url}#{self.branch}"
+
+
+@dataclass
+class ShardResult:
+    """Outcome of one shard: what it covered and how many attempts it took."""
+
+    index: int
+    target: str
+    first_date: str | None
+    last_date: str | None
+    commits: int
+    status: str = "pending"  # done, failed, cancelled or empty
+    attempts: int = 0
+    errors: list = field(default_factory=list)  # one message per failed attempt
+    seconds: float = 0.0
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "retries": self.retries}
+
+
+def shard_plan(commit_date_counts: dict, shards: int, by: str = "volume") -> list:
+    """Split a plan into `shards` runs of whole, consecutive dates.
+
+    by="volume" balances commits, so a dense stretch gets a shard of its own; by="date" gives each
+    shard an equal span of calendar days, e.g. one year each for a multi-year plan. A shard can
+    come out empty when the plan has fewer busy days than shards.
+
+    Returns:
+        list: One date : count dict per shard, in date order.
+    """
+    assert by in SHARD_MODES, f"unknown shard mode {by!r}, expected one of {SHARD_MODES}"
+    days = sorted((day, count) for day, count in commit_date_counts.items() if count > 0)
+    parts = [{} for _ in range(shards)]
+    if not days:
+        return parts
+
+    if by == "date":
+        first = date.fromisoformat(days[0][0])
+        span_days = (date.fromisoformat(days[-1][0]) - first).days + 1
+        for day, count in days:
+            parts[(date.fromisoformat(day) - first).days * shards // span_days][day] = count
+    else:
+        total, before = sum(count for _, count in days), 0
+        for day, count in days:
+            # a day goes to the shard its middle commit falls in
+            parts[min(shards - 1, (2 * before + count) * shards // (2 * total))][day] = count
+            before += count
+    return parts
+
+
+def _init_worker(push_slots, cancel, events) -> None:
+    global _push_slots, _cancel, _events
+    _push_slots, _cancel, _events = push_slots, cancel, events
+
+
+def _run_shard(index: int, target: UploadTarget, plan: dict, GIT_USERNAME: str, GIT_EMAIL: str, GITHUB_TOKEN: str,
+               cache_root: str | None, max_attempts: int, retry_delay: float,
+               baseline: dict | None = None) -> ShardResult:
+    # one shard in a worker process, retried with backoff; its checkpoint makes a retry resume
+    days = sorted(plan)
+    result = ShardResult(index, str(target), days[0] if days else None, days[-1] if days else None, sum(plan.values()))
+    if not plan:
+        result.status = "empty"
+        return result
+
+    cache = RepoCache(root=cache_root)
+    checkpoint = UploadCheckpoint(cache.checkpoint_path(target.repo_url, target.branch, plan_key(plan)))
+    started = time.perf_counter()
+
+    def progress(phase: str, done: int, total: int) -> None:
+        if _events is not None:
+            _events.put((index, phase, done, total))
+
+    while result.attempts < max_attempts:
+        result.attempts += 1
+        try:
+            github_upload_commits(target.repo_url, GIT_USERNAME, GIT_EMAIL, GITHUB_TOKEN, plan, cache=cache,
+                                  progress=progress, cancel=_cancel, checkpoint=checkpoint, branch=target.branch,
+                                  push_slots=_push_slots, baseline=baseline)
+            checkpoint.clear()
+            result.status = "done"
+            break
+        except UploadCancelled:
+            result.status = "cancelled"
+            break
+        except Exception as e:
+            message = " ".join(str(e).split())  # git errors span lines; keep the report one line per attempt
+            if GITHUB_TOKEN:
+                message = message.replace(GITHUB_TOKEN, "***")
+            result.errors.append(message)
+            result.status = "failed"
+            logger.warning(f"Shard {index} to {target} failed on attempt {result.attempts}/{max_attempts}: {message}")
+            if result.attempts < max_attempts:
+                time.sleep(retry_delay * 2 ** (result.attempts - 1))
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def sharded_upload(targets: list, GIT_USERNAME: str, GIT_EMAIL: str, GITHUB_TOKEN: str, commit_date_counts: dict,
+                   by: str = "volume", max_workers: int | None = None, max_pushes: int = DEFAULT_MAX_PUSHES,
+                   max_attempts: int = DEFAULT_MAX_ATTEMPTS, retry_delay: float = DEFAULT_RETRY_DELAY,
+                   cache_root: str | None = None, progress: Callable | None = None, cancel=None,
+                   baseline: dict | None = None) -> list:
+    """Upload one plan split across several repositories/branches, building and pushing the shards
+    concurrently in a process pool.
+
+    Every target gets one shard (see shard_plan) and its own working copy, commit chain and
+    fast-forward pushes, so no single clone, chain or push carries the whole plan. Shards run in
+    worker processes spawned by a shard_host process; a semaphore shared by all of them bounds the
+    pushes in flight, and a failed shard is retried with exponential backoff, resuming from its
+    checkpoint.
+
+    Args:
+        targets (list): UploadTarget or "repo_url[#branch]" strings, each used once.
+        by (str, optional): "volume" or "date", see shard_plan. Defaults to "volume".
+        max_workers (int, optional): Worker processes. Defaults to one per target, up to MAX_SHARD_WORKERS.
+        max_pushes (int, optional): Pushes in flight at once. Defaults to DEFAULT_MAX_PUSHES.
+        max_attempts (int, optional): Attempts per shard. Defaults to DEFAULT_MAX_ATTEMPTS.
+        retry_delay (float, optional): Seconds before the first retry, doubled for each further one.
+        cache_root (str, optional): RepoCache root for the working copies and checkpoints.
+        progress (Callable, optional): Called as progress(shard index, phase, done, total) with the
+            same phases as github_upload_commits.
+        cancel (optional): Event checked by the caller's thread; once set, every shard stops at its
+            next checkpoint.
+        baseline (dict, optional): Fetched counts the plan adds to, see github_upload_commits.
+
+    Returns:
+        list: One ShardResult per target, in target order.
+    """
+    targets = [t if isinstance(t, UploadTarget) else UploadTarget.parse(t) for t in targets]
+    if len(set(targets)) != len(targets):
+        raise ValueError("every upload target must be a distinct repository branch")
+    plans = shard_plan(commit_date_counts, len(targets), by=by)
+    max_workers = max_workers or min(len(targets), MAX_SHARD_WORKERS)
+    logger.info(f"Uploading {sum(sum(p.values()) for p in plans)} commits as {len(plans)} shards by {by} "
+                f"on {max_workers} processes, at most {max_pushes} pushes at once")
+
+    # The pool is started from shard_host rather than from here: spawned workers re-run their
+    # parent's __main__, which under Streamlit is the app script. The host's own __main__ does
+    # nothing on import. Messages come back pickled on its stdout, a byte on its stdin cancels.
+    job = dict(targets=targets, plans=plans, GIT_USERNAME=GIT_USERNAME, GIT_EMAIL=GIT_EMAIL,
+               GITHUB_TOKEN=GITHUB_TOKEN, max_workers=max_workers, max_pushes=max_pushes,
+               max_attempts=max_attempts, retry_delay=retry_delay, cache_root=cache_root, baseline=baseline)
+    with subprocess.Popen([sys.executable, SHARD_HOST], stdin=subprocess.PIPE, stdout=subprocess.PIPE) as host:
+        pickle.dump(job, host.stdin)
+        host.stdin.flush()
+        if cancel is not None:
+            threading.Thread(target=_forward_cancel, args=(host, cancel), daemon=True).start()
+        while True:
+            try:
+                kind, payload = pickle.load(host.stdout)
+            except EOFError:
+                raise RuntimeError(f"shard host exited with code {host.wait()} before reporting") from None
+            if kind == "progress":
+                if progress is not None:
+                    progress(*payload)
+            elif kind == "error":
+                raise payload
+            else:
+                return payload
+
+
+def _forward_cancel(host: subprocess.Popen, cancel) -> None:
+    # pass the caller's cancel event on to the shard host
+    while host.poll() is None:
+        if cancel.wait(0.2):
+            try:
+                host.stdin.write(b"c")
+                host.stdin.flush()
+            except (OSError, ValueError):  # the host is already done
+                pass
+            return
+
+
+def upload_shards(targets: list, plans: list, GIT_USERNAME: str, GIT_EMAIL: str, GITHUB_TOKEN: str,
+                  max_workers: int, max_pushes: int, max_attempts: int, retry_delay: float,
+                  cache_root: str | None, baseline: dict | None = None, progress: Callable | None = None,
+                  cancel=None) -> list:
+    """Run one shard per target in a process pool started by this process.
+
+    This is sharded_upload's work after the plan is split; sharded_upload runs it in shard_host.
+
+    Returns:
+        list: One ShardResult per target, in target order.
+    """
+    # spawn rather than fork: this process runs threads that fork can't copy safely
+    context = multiprocessing.get_context("spawn")
+    push_slots, shard_cancel, events = context.Semaphore(max_pushes), context.Event(), context.Queue()
+
+    def drain() -> None:
+        while True:
+            try:
+                event = events.get_nowait()
+            except Empty:
+                return
+            if progress is not None:
+                progress(*event)
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_worker,
+                             initargs=(push_slots, shard_cancel, events)) as pool:
+        pending = {
+            pool.submit(_run_shard, index, target, plan, GIT_USERNAME, GIT_EMAIL, GITHUB_TOKEN, cache_root,
+                        max_attempts, retry_delay, baseline): index
+            for index, (target, plan) in enumerate(zip(targets, plans))
+        }
+        results = {}
+        while pending:
+            finished, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results[pending.pop(future)] = future.result()
+            if cancel is not None and cancel.is_set():
+                shard_cancel.set()
+            drain()
+        drain()
+    return [results[index] for index in range(len(targets))]
+
+
+def retry_report(results: list) -> str:
+    """Human readable per-shard outcome, including every failed attempt."""
+    lines = []
+    for r in results:
+        dates = f"{r.first_date}..{r.last_date}" if r.first_date else "no dates"
+        lines.append(f"shard {r.index} -> {r.target} ({dates}, {r.commits} commits): {r.status} "
+                     f"after {r.attempts} attempt{'s' if r.attempts != 1 else ''}, {r.seconds:.1f}s")
+        lines += [f"    attempt {n}: {error}" for n, error in enumerate(r.errors, start=1)]
+    return "\n".join(lines)
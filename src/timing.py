@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import threading
+import logging
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+_enabled = os.environ.get("GITHUB_GRAPH_TIMING", "") not in ("", "0")
+_log_path = os.environ.get("GITHUB_GRAPH_TIMING_LOG")  # JSON lines file, one record per span
+_log_lock = threading.Lock()
+_collector: ContextVar = ContextVar("timing_collector", default=None)
+_NULL_SPAN = nullcontext()
+
+
+def set_enabled(enabled: bool, log_path: str | None = None) -> None:
+    """Turn span recording on or off for the whole process, optionally writing JSON lines to log_path.
+
+    For one rerun or job only, use a recording SpanCollector instead.
+    """
+    global _enabled, _log_path
+    _enabled = enabled
+    if log_path is not None:
+        _log_path = log_path
+
+
+def is_enabled() -> bool:
+    # recording for the whole process, or for the collector active in the current context
+    if _enabled:
+        return True
+    collector = _collector.get()
+    return collector is not None and collector.enabled
+
+
+class Span:
+    """Times one stage and records it as {"span", "ms", "ts", **fields} when it exits."""
+
+    __slots__ = ("name", "fields", "_start")
+
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = {"span": self.name, "ms": (time.perf_counter() - self._start) * 1000, "ts": time.time(), **self.fields}
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        _record(record)
+        return False
+
+
+def span(name: str, **fields):
+    """Context manager timing a stage. When recording is off, for the process and the current
+    context's collector, this returns a shared no-op context, so instrumented code pays a flag
+    check and a context lookup.
+
+    Args:
+        name (str): Dotted stage name, e.g. "upload.push".
+        **fields: Extra JSON-serializable values stored with the record, e.g. commits=1200.
+    """
+    if not is_enabled():
+        return _NULL_SPAN
+    return Span(name, fields)
+
+
+def timed(name: str | None = None):
+    """Decorator form of span; the name defaults to module.function."""
+
+    def decorator(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return fn(*args, **kwargs)
+            with Span(label, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class SpanCollector:
+    """Gathers the spans recorded in the current context (a rerun, an upload job) between start
+    and stop. Usable as a context manager.
+
+    Args:
+        enabled (bool, optional): Record spans in this context even while recording is off for
+            the process, so one session can time its reruns without slowing down the others.
+            Defaults to False: only collect what the process records anyway.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.records = []
+        self._token = None
+
+    def start(self) -> "SpanCollector":
+        self._token = _collector.set(self)
+        return self
+
+    def stop(self) -> list:
+        if self._token is not None:
+            _collector.reset(self._token)
+            self._token = None
+        return self.records
+
+    def __enter__(self) -> "SpanCollector":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def summary(self) -> dict:
+        return summarize(self.records)
+
+
+def summarize(records: list) -> dict:
+    """span name : {"count", "total_ms", "max_ms"}, in first-seen order"""
+    stats = {}
+    for record in records:
+        entry = stats.setdefault(record["span"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += record["ms"]
+        entry["max_ms"] = max(entry["max_ms"], record["ms"])
+    return stats
+
+
+def _record(record: dict) -> None:
+    collector = _collector.get()
+    if collector is not None:
+        collector.records.append(record)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps(record))
+    if _log_path:
+        line = json.dumps(record) + "\n"
+        with _log_lock, open(_log_path, "a") as f:
+            f.write(line)
@@ -0,0 +1,197 @@
+import time
+import uuid
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from github_interaction import UPLOAD_BRANCH, UploadCancelled, UploadCheckpoint, github_upload_commits, plan_key
+from repo_cache import RepoCache, default_repo_cache
+from sharded_upload import UploadTarget, shard_plan, sharded_upload
+from timing import SpanCollector
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_PHASES = ("queued", "clone", "scan", "commits", "push", "done")
+DEFAULT_UPLOAD_WORKERS = 2
+MAX_FINISHED_JOBS = 64  # finished jobs kept around for status lookups
+
+
+@dataclass
+class UploadJob:
+    """State of one background upload, updated by the worker thread and read by the app."""
+
+    id: str
+    total: int
+    status: str = "queued"  # queued, running, done, failed or cancelled
+    phase: str = "queued"
+    phase_done: int = 0
+    phase_total: int = 0
+    committed: int = 0
+    resumed: int = 0  # commits already pushed by an earlier attempt of the same plan
+    present: int = 0  # commits the branch already had before this attempt
+    error: str | None = None
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    future: Future | None = field(default=None, repr=False)
+    spans: SpanCollector = field(default_factory=SpanCollector, repr=False)  # stage timings of the run
+    shards: list = field(default_factory=list, repr=False)  # ShardResult per target of a sharded upload
+    shard_progress: dict = field(default_factory=dict, repr=False)  # shard index : (present, created)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def fraction(self) -> float:
+        # overall progress, weighting the commit phase by commits created
+        if self.status == "done":
+            return 1.0
+        if self.total == 0:
+            return 0.0
+        return min(self.committed / self.total, 1.0)
+
+    def report(self, phase: str, done: int, total: int) -> None:
+        self.phase, self.phase_done, self.phase_total = phase, done, total
+        if phase == "scan":
+            self.present = done
+            self.committed = self.resumed + done
+        elif phase == "commits":
+            self.committed = self.resumed + self.present + done
+
+    def report_shard(self, index: int, phase: str, done: int, total: int) -> None:
+        # every shard reports like a single upload; the job's commit count sums them
+        present, created = self.shard_progress.get(index, (0, 0))
+        if phase == "scan":
+            present, created = done, 0
+        elif phase == "commits":
+            created = done
+        self.shard_progress[index] = (present, created)
+        self.phase, self.phase_done, self.phase_total = phase, done, total
+        self.present = sum(p for p, _ in self.shard_progress.values())
+        self.committed = self.resumed + sum(p + c for p, c in self.shard_progress.values())
+
+
+class UploadManager:
+    """Runs github_upload_commits on a small thread pool so the Streamlit script never blocks.
+
+    The git work happens in subprocesses, so threads are enough and let the app read progress and
+    signal cancellation through the shared UploadJob. Each upload checkpoints the dates it has
+    pushed; submitting the same plan again after a failure or cancel resumes from there.
+
+    Args:
+        max_workers (int, optional): Uploads running at the same time.
+        cache (RepoCache, optional): Working copy cache; also holds the checkpoints.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_UPLOAD_WORKERS, cache: RepoCache | None = None):
+        self.cache = cache or default_repo_cache()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+        self.jobs: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, REPO_URL, GIT_USERNAME, GIT_EMAIL, GITHUB_TOKEN, commit_date_counts: dict,
+               baseline: dict | None = None, record_timings: bool = False) -> str:
+        """Queue an upload and return its job id; baseline is passed on to github_upload_commits.
+        record_timings records the job's stage timings even while recording is off process-wide."""
+        checkpoint = UploadCheckpoint(self.cache.checkpoint_path(REPO_URL, UPLOAD_BRANCH, plan_key(commit_date_counts)))
+        job = UploadJob(id=uuid.uuid4().hex[:12], total=sum(c for c in commit_date_counts.values() if c > 0),
+                        spans=SpanCollector(enabled=record_timings))
+        job.resumed = sum(commit_date_counts.get(date, 0) for date in checkpoint.done)
+        job.committed = job.resumed
+
+        def run():
+            job.status = "running"
+            job.spans.start()
+            try:
+                github_upload_commits(REPO_URL, GIT_USERNAME, GIT_EMAIL, GITHUB_TOKEN, commit_date_counts,
+                                      cache=self.cache, progress=job.report, cancel=job.cancel_event,
+                                      checkpoint=checkpoint, baseline=baseline)
+                checkpoint.clear()
+                job.status, job.phase = "done", "done"
+            except UploadCancelled as e:
+                job.status = "cancelled"
+                logger.info(f"Upload {job.id}: {e}")
+            except Exception as e:
+                job.status, job.error = "failed", str(e)
+                logger.warning(f"Upload {job.id} failed: {e}")
+            finally:
+                job.spans.stop()
+                job.finished_at = time.time()
+
+        with self._lock:
+            self.jobs[job.id] = job
+            self._prune()
+        job.future = self.pool.submit(run)
+        logger.info(f"Queued upload {job.id}: {job.total} commits ({job.resumed} already pushed)")
+        return job.id
+
+    def submit_sharded(self, targets: list, GIT_USERNAME, GIT_EMAIL, GITHUB_TOKEN, commit_date_counts: dict,
+                       by: str = "volume", baseline: dict | None = None, record_timings: bool = False) -> str:
+        """Queue an upload of the plan split across several repositories/branches (see
+        sharded_upload.sharded_upload) and return its job id. The job's `shards` holds the per-shard
+        results and retries once it finished."""
+        targets = [t if isinstance(t, UploadTarget) else UploadTarget.parse(t) for t in targets]
+        job = UploadJob(id=uuid.uuid4().hex[:12], total=sum(c for c in commit_date_counts.values() if c > 0),
+                        spans=SpanCollector(enabled=record_timings))
+        for target, plan in zip(targets, shard_plan(commit_date_counts, len(targets), by=by)):
+            checkpoint = UploadCheckpoint(self.cache.checkpoint_path(target.repo_url, target.branch, plan_key(plan)))
+            job.resumed += sum(plan.get(date, 0) for date in checkpoint.done)
+        job.committed = job.resumed
+
+        def run():
+            job.status = "running"
+            job.spans.start()
+            try:
+                job.shards = sharded_upload(targets, GIT_USERNAME, GIT_EMAIL, GITHUB_TOKEN, commit_date_counts, by=by,
+                                            cache_root=self.cache.root, progress=job.report_shard,
+                                            cancel=job.cancel_event, baseline=baseline)
+                failed = [r for r in job.shards if r.status == "failed"]
+                if failed:
+                    job.status, job.error = "failed", f"{len(failed)} of {len(job.shards)} shards failed"
+                elif any(r.status == "cancelled" for r in job.shards):
+                    job.status = "cancelled"
+                else:
+                    job.status, job.phase = "done", "done"
+            except Exception as e:
+                job.status, job.error = "failed", str(e)
+                logger.warning(f"Sharded upload {job.id} failed: {e}")
+            finally:
+                job.spans.stop()
+                job.finished_at = time.time()
+
+        with self._lock:
+            self.jobs[job.id] = job
+            self._prune()
+        job.future = self.pool.submit(run)
+        logger.info(f"Queued sharded upload {job.id}: {job.total} commits to {len(targets)} targets by {by}")
+        return job.id
+
+    def get(self, job_id: str | None) -> UploadJob | None:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a job to stop at its next checkpoint; returns False when it already finished."""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_event.set()
+        return True
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+
+_default_manager = None
+
+
+def default_upload_manager() -> UploadManager:
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = UploadManager()
+    return _default_manager
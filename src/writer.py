@@ -1,126 +1,285 @@
+import os
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
+from PIL import Image
 import calendar
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from io import BytesIO
+import hashlib
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
-from map import get_letter_map
+from dates import current_window
+from map import CHAR_TO_GLYPH, GLYPH_CHARS, GLYPH_TABLE, GLYPH_WIDTH
+from patterns import generate
+from timing import span
 
 # Define commit color shades (lighter means fewer commits)
 COLORS = ["#ebedf0", "#9be9a8", "#40c463", "#30a14e", "#216e39"]
 
-LETTER_MAP = get_letter_map()  # Load or define the letter map
-# Define a simple 5x5 pixel font for letters A-Z
-# LETTER_MAP = {
-#     " ": ["     ", "     ", "     ", "     ", "     "],
-#     "A": ["  #  ", " # # ", "#####", "#   #", "#   #"],
-#     "B": ["#### ", "#   #", "#### ", "#   #", "#### "],
-#     "C": [" ####", "#    ", "#    ", "#    ", " ####"],
-#     "D": ["###  ", "#  # ", "#   #", "#  # ", "###  "],
-#     "E": ["#####", "#    ", "#####", "#    ", "#####"],
-#     "F": ["#####", "#    ", "#####", "#    ", "#    "],
-# }
+def generate_commit_data(window=None, pattern="random", seed=None, **params):
+    """Generate commit activity levels as a 7 x weeks grid of a calendar window.
 
+    Args:
+        window (CalendarWindow, optional): Window to fill. Defaults to the current year.
+        pattern (str, optional): One of patterns.PATTERNS. Defaults to "random".
+        seed (int, optional): Seed for a reproducible grid.
 
-def generate_commit_data():
-    """Generate random commit activity levels for a 7x52 grid"""
-    return np.random.randint(0, 1, (8, 52))
+    Returns:
+        np.ndarray: (7, weeks) levels 0-4.
+    """
+    window = window or current_window()
+    return window.to_matrix(generate(pattern, window, seed=seed, **params)[0])
+
+
+def text_mask(text, shape=(7, 52), x=0, y=1, spacing=1, kerning=None):
+    """Rasterize text into a boolean mask of the given canvas shape.
+
+    All glyph pixels are placed in one vectorized scatter and clipped to the canvas, so text can run
+    across a canvas of any number of weeks or partly off its edges.
+
+    Args:
+        text (str): Text to render; characters missing from the font are skipped.
+        shape (tuple, optional): (rows, weeks) of the canvas. Defaults to (7, 52).
+        x (int, optional): Column of the first glyph. May be negative. Defaults to 0.
+        y (int, optional): Row of the glyph tops. Defaults to 1.
+        spacing (int, optional): Blank columns between glyphs. Defaults to 1.
+        kerning (dict, optional): Extra advance for uppercase character pairs, e.g. {"AV": -1}.
+
+    Returns:
+        np.ndarray: Boolean mask, True where a glyph pixel lands.
+    """
+    rows, cols = shape
+    mask = np.zeros(shape, dtype=bool)
+    codes = np.frombuffer(text.upper().encode("ascii", errors="replace"), dtype=np.uint8)
+    ids = CHAR_TO_GLYPH[codes[codes < 128]]
+    ids = ids[ids > 0]
+    if len(ids) == 0:
+        return mask
+
+    # left edge of every glyph: a fixed advance plus any kerning for each consecutive pair
+    advances = np.full(len(ids) - 1, GLYPH_WIDTH + spacing)
+    if kerning:
+        pairs = zip(ids[:-1].tolist(), ids[1:].tolist())
+        advances += [kerning.get(GLYPH_CHARS[a - 1] + GLYPH_CHARS[b - 1], 0) for a, b in pairs]
+    lefts = x + np.concatenate(([0], np.cumsum(advances)))
+
+    # scatter every lit glyph pixel at once, clipped to the canvas
+    glyph, gy, gx = np.nonzero(GLYPH_TABLE[ids])
+    ys, xs = gy + y, gx + lefts[glyph]
+    inside = (ys >= 0) & (ys < rows) & (xs >= 0) & (xs < cols)
+    mask[ys[inside], xs[inside]] = True
+    return mask
+
+
+def stamp_text(grid, text, x=0, y=1, level=4, add=False, spacing=1, kerning=None):
+    """Stamp text onto a commit grid in place, either setting or raising cell levels.
+
+    Args:
+        grid (np.ndarray): (7, weeks) grid of levels.
+        text (str): Text to render.
+        level (int, optional): Level written (or added when add=True). Defaults to 4.
+        add (bool, optional): Add level to existing cells instead of overwriting. Defaults to False.
+
+    Returns:
+        np.ndarray: The same grid, for chaining.
+    """
+    mask = text_mask(text, grid.shape, x=x, y=y, spacing=spacing, kerning=kerning)
+    if add:
+        grid[mask] = np.maximum(grid[mask] + level, 0)
+    else:
+        grid[mask] = level
+    return grid
 
 
 def apply_letter_overlay(grid, text):
     """Overlay letters onto the commit grid by reducing intensity"""
-    start_x, start_y = 2, 2  # Positioning letters within grid
-
-    for letter in text.upper():
-        if letter in LETTER_MAP:
-            letter_grid = LETTER_MAP[letter]
-            for row in range(len(letter_grid)):
-                for col in range(len(letter_grid[row])):
-                    if letter_grid[row][col] == "#":
-                        x, y = start_x + col, start_y + row
-                        if 0 <= x < 52 and 0 <= y < 7:
-                            grid[y, x] = max(0, grid[y, x] + 2)  # Make it lighter
-            start_x += 6  # Move to next letter position
+    return stamp_text(grid, text, x=2, y=2, level=2, add=True)  # Positioning letters within grid
 
-    return grid
 
+RENDER_CACHE_SIZE = 32  # rendered images kept in memory, keyed on grid contents and options
+RENDER_BACKENDS = ("raster", "svg", "matplotlib")
+DEFAULT_BACKEND = os.environ.get("GITHUB_GRAPH_RENDER_BACKEND", "raster")
 
-def plot_commit_graph(grid):
-    print("Plotting commit graph")
-    logger.debug(f"Generated year_dict with {grid.shape} dates")
-    assert len(grid.shape) == 2 and grid.shape[0] == 7 and grid.shape[1] == 52
 
-    """Plot the commit graph with text overlay"""
-    fig, ax = plt.subplots(figsize=(13, 3))
-
-    # Plot each grid cell
-    for y in range(grid.shape[0]+1): # 0-7 plus one for zero row
-        for x in range(grid.shape[1]):
-            # Safely map grid value to a color index to avoid IndexError
-            try:
-                val = int(grid[y-1, x])
-            except Exception:
-                val = 0
-            idx = min(max(val, 0), len(COLORS) - 1)
-            ax.add_patch(
-                Rectangle((x, -y), 1, 1, ec="white", lw=2, color=COLORS[idx])
-            )  # type: ignore
-
-    # Plot legend: place one square per defined color
-    legend_start_x = 47
-    for i, color in enumerate(COLORS):
-        x_pos = legend_start_x + i
-        ax.add_patch(Rectangle((x_pos, -8), 1, 1, ec="white", lw=2, color=color))  # type: ignore
-    ax.text(legend_start_x - 1, -8, "Less", ha="center", va="bottom", fontsize=10, color="black")
-    ax.text(legend_start_x + len(COLORS) + 1, -8, "More", ha="center", va="bottom", fontsize=10, color="black")
-
-    # Add Y-axis labels (Mon, Wed, Fri)
-    day_labels = {1.5: "Mon", 3.5: "Wed", 5.5: "Fri"}
-    for y in day_labels:
-        ax.text(
-            -1, -y, day_labels[y], va="center", ha="right", fontsize=10, color="black"
-        )
-
-    # Add X-axis labels (Months)
-    current_month = datetime.now().month  # Get the current month
-
-    month_labels = []
-    month_starts = []
-
-    # Estimate month divisions based on 52 weeks
+def _month_labels(current_month: int) -> list:
+    # Estimate month divisions based on 52 weeks, starting from the current month
     weeks_per_month = 4.33  # Approximate average
-    weeks_passed = 0
-
+    labels = []
     for i in range(12):
-        month = (
-            current_month + i - 1
-        ) % 12 + 1  # Cycle through months starting from the current one
-        month_labels.append(calendar.month_abbr[month])
-        month_starts.append(int(weeks_passed))
-        weeks_passed += weeks_per_month
-
-    for i, month in enumerate(month_labels):
-        if month_starts[i] < 53:  # Prevent overflow beyond 52 weeks
-            ax.text(
-                month_starts[i] + 1.5,
-                0.5,
-                month,
-                ha="center",
-                va="bottom",
-                fontsize=10,
-                color="black",
-            )
-
-    ax.set_xlim(0, 55)
-    ax.set_ylim(-9, 0)
-    ax.set_xticks([])
-    ax.set_yticks([])
-    ax.set_frame_on(False)
-    ax.set_aspect("equal")
-
-    #plt.show()
-    return fig
+        month = (current_month + i - 1) % 12 + 1
+        week = int(i * weeks_per_month)
+        if week < 53:  # Prevent overflow beyond 52 weeks
+            labels.append((week + 1.5, calendar.month_abbr[month]))
+    return labels
+
+
+def _grid_levels(grid) -> np.ndarray:
+    # map grid values to color indices, treating missing/invalid cells as 0
+    levels = np.nan_to_num(np.asarray(grid, dtype=float), nan=0.0)
+    return np.clip(levels.astype(int), 0, len(COLORS) - 1)
+
+
+class CommitGraphRenderer:
+    """Reusable commit graph figure: the grid is a single QuadMesh whose colors are swapped per call."""
+
+    def __init__(self, figsize=(13, 3), dpi=100):
+        # matplotlib is only imported once this backend is actually used
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import BoundaryNorm, ListedColormap
+
+        self.options = (tuple(figsize), dpi)
+        self.fig, self.ax = plt.subplots(figsize=figsize, dpi=dpi)
+        ax = self.ax
+        cmap = ListedColormap(COLORS)
+        norm = BoundaryNorm(np.arange(len(COLORS) + 1) - 0.5, len(COLORS))
+
+        # grid row r (Sunday = 0) spans y in [-(r+1), -r], week x spans [x, x+1]
+        self.mesh = ax.pcolormesh(np.arange(53), -np.arange(8), np.zeros((7, 52)),
+                                  cmap=cmap, norm=norm, edgecolors="white", linewidth=2)
+
+        # Plot legend: place one square per defined color
+        legend_start_x = 47
+        ax.pcolormesh(np.arange(legend_start_x, legend_start_x + len(COLORS) + 1), [-8, -7],
+                      [np.arange(len(COLORS))], cmap=cmap, norm=norm, edgecolors="white", linewidth=2)
+        ax.text(legend_start_x - 1, -8, "Less", ha="center", va="bottom", fontsize=10, color="black")
+        ax.text(legend_start_x + len(COLORS) + 1, -8, "More", ha="center", va="bottom", fontsize=10, color="black")
+
+        # Add Y-axis labels (Mon, Wed, Fri)
+        day_labels = {1.5: "Mon", 3.5: "Wed", 5.5: "Fri"}
+        for y in day_labels:
+            ax.text(-1, -y, day_labels[y], va="center", ha="right", fontsize=10, color="black")
+
+        self.month_texts = []
+        self.current_month = None
+        self._background = None
+
+        ax.set_xlim(0, 55)
+        ax.set_ylim(-9, 0)
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.set_frame_on(False)
+        ax.set_aspect("equal")
+
+    def draw(self, grid, current_month: int):
+        self.mesh.set_array(_grid_levels(grid))
+        if current_month != self.current_month:
+            for text in self.month_texts:
+                text.remove()
+            self.month_texts = [
+                self.ax.text(x, 0.5, month, ha="center", va="bottom", fontsize=10, color="black")
+                for x, month in _month_labels(current_month)
+            ]
+            self.current_month = current_month
+            self._background = None
+        return self.fig
+
+    def png(self) -> bytes:
+        """Encode the current figure, redrawing only the grid mesh over a cached static background"""
+        canvas = self.fig.canvas
+        if not hasattr(canvas, "copy_from_bbox"):
+            buf = BytesIO()
+            self.fig.savefig(buf, format="png")
+            return buf.getvalue()
+
+        if self._background is None:
+            self.mesh.set_visible(False)
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+            self.mesh.set_visible(True)
+        canvas.restore_region(self._background)
+        self.ax.draw_artist(self.mesh)
+
+        buf = BytesIO()
+        Image.fromarray(np.asarray(canvas.buffer_rgba())).save(buf, format="png", compress_level=1)
+        return buf.getvalue()
+
+    def close(self):
+        import matplotlib.pyplot as plt
+
+        plt.close(self.fig)
+
+
+_renderer = None
+_render_cache = OrderedDict()
+_render_lock = threading.Lock()
+
+
+def _get_renderer(figsize, dpi) -> CommitGraphRenderer:
+    # one shared figure; building one with different options closes the one it replaces
+    global _renderer
+    if _renderer is None or _renderer.options != (tuple(figsize), dpi):
+        if _renderer is not None:
+            _renderer.close()
+        _renderer = CommitGraphRenderer(figsize=figsize, dpi=dpi)
+    return _renderer
+
+
+def plot_commit_graph(grid, figsize=(13, 3), dpi=100, first_month=None):
+    """Plot one 7x52 tile of the commit graph onto the shared, reused figure"""
+    logger.debug(f"Plotting commit graph of shape {grid.shape}")
+    assert len(grid.shape) == 2 and grid.shape[0] == 7 and grid.shape[1] == 52
+
+    with _render_lock:
+        return _get_renderer(figsize, dpi).draw(grid, first_month or datetime.now().month)
+
+
+def render_commit_graph(grid, figsize=(13, 3), dpi=100, first_month=None, backend=None) -> tuple:
+    """Render the commit graph, reusing cached bytes for a grid already rendered.
+
+    Args:
+        grid (np.ndarray): 7x52 tile of contribution levels.
+        figsize (tuple, optional): Figure size in inches. Defaults to (13, 3).
+        dpi (int, optional): Figure and PNG resolution. Defaults to 100.
+        first_month (int, optional): Month labelled on the first week. Defaults to the current month.
+        backend (str, optional): "raster" (numpy buffer to PNG), "svg" (SVG document) or
+            "matplotlib" (the figure, blitted to PNG). Defaults to DEFAULT_BACKEND.
+
+    Returns:
+        tuple: (figure, image bytes); the figure is None for the matplotlib-free backends.
+    """
+    assert len(grid.shape) == 2 and grid.shape[0] == 7 and grid.shape[1] == 52
+    backend = backend or DEFAULT_BACKEND
+    assert backend in RENDER_BACKENDS, f"unknown render backend {backend!r}, expected one of {RENDER_BACKENDS}"
+    levels = _grid_levels(grid).astype(np.uint8)
+    current_month = first_month or datetime.now().month
+    key = hashlib.blake2b(
+        levels.tobytes() + repr((tuple(figsize), dpi, current_month, backend)).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+    if backend != "matplotlib":
+        import raster
+
+        with _render_lock:
+            data = _render_cache.get(key)
+            if data is not None:
+                _render_cache.move_to_end(key)
+                return None, data
+        with span(f"render.{backend}"):
+            if backend == "svg":
+                data = raster.render_svg(levels, figsize, dpi, current_month).encode("utf-8")
+            else:
+                data = raster.render_png(levels, figsize, dpi, current_month)
+        with _render_lock:
+            _render_cache[key] = data
+            if len(_render_cache) > RENDER_CACHE_SIZE:
+                _render_cache.popitem(last=False)
+        return None, data
+
+    with _render_lock:
+        with span("render.draw"):
+            fig = _get_renderer(figsize, dpi).draw(levels, current_month)
+        png = _render_cache.get(key)
+        if png is not None:
+            _render_cache.move_to_end(key)
+            return fig, png
 
+        logger.debug("Rendering commit graph PNG")
+        with span("render.savefig"):
+            png = _renderer.png()
+        _render_cache[key] = png
+        if len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    return fig, png
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, SRC)
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The Streamlit app under AppTest, with its design library in a temporary directory."""
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.setenv("GITHUB_GRAPH_LIBRARY", str(tmp_path / "designs.sqlite3"))
+    monkeypatch.chdir(SRC)
+    return AppTest.from_file(os.path.join(SRC, "app.py"), default_timeout=60).run()
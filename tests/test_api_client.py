@@ -0,0 +1,135 @@
+"""ContributionsClient against a local stand-in for the Contributions API."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from api_client import ContributionsClient
+
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+class StandIn:
+    """Serves {"user": ..., "year": ...} per request, revalidates by ETag and records what it saw."""
+
+    def __init__(self):
+        self.requests = []  # (path, If-None-Match, If-Modified-Since, status answered)
+        self.failures = {}  # username : status to answer with, and no ETag
+        self.latency = 0.0
+        self.hang_up = False  # close connections without answering, as a network failure
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def handle(self, handler: BaseHTTPRequestHandler) -> None:
+        if self.hang_up:
+            handler.close_connection = True
+            return
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            url = urlparse(handler.path)
+            user, year = url.path.rsplit("/", 1)[-1], parse_qs(url.query)["y"][0]
+            etag = f'"{user}-{year}"'
+            if user in self.failures:
+                status, headers, body = self.failures[user], {}, {"error": "unavailable"}
+            elif handler.headers.get("If-None-Match") == etag:
+                status, headers, body = 304, {"ETag": etag}, None
+            else:
+                status, headers, body = 200, {"ETag": etag, "Last-Modified": LAST_MODIFIED}, {"user": user, "year": year}
+            with self._lock:
+                self.requests.append((handler.path, handler.headers.get("If-None-Match"),
+                                      handler.headers.get("If-Modified-Since"), status))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+@pytest.fixture
+def stand_in():
+    state = StandIn()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            state.handle(self)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.url = f"http://127.0.0.1:{server.server_port}/v4"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_fresh_response_is_served_from_cache(stand_in):
+    client = ContributionsClient(stand_in.url, ttl=60)
+    assert client.fetch("octocat", "2024") == {"user": "octocat", "year": "2024"}
+    assert client.fetch("octocat", "2024") == {"user": "octocat", "year": "2024"}
+    assert len(stand_in.requests) == 1
+
+
+def test_stale_response_is_revalidated(stand_in):
+    client = ContributionsClient(stand_in.url, ttl=0)
+    first = client.fetch("octocat", "2024")
+    assert client.fetch("octocat", "2024") == first
+    assert stand_in.requests == [("/v4/octocat?y=2024", None, None, 200),
+                                 ("/v4/octocat?y=2024", '"octocat-2024"', LAST_MODIFIED, 304)]
+
+
+def test_error_responses_are_not_cached(stand_in):
+    client = ContributionsClient(stand_in.url, ttl=60)
+    stand_in.failures["octocat"] = 500
+    assert client.fetch("octocat", "2024") == {"error": "unavailable"}
+    del stand_in.failures["octocat"]
+    assert client.fetch("octocat", "2024") == {"user": "octocat", "year": "2024"}
+    # the retry went out unconditionally, as there was nothing cached to revalidate
+    assert [request[1:] for request in stand_in.requests] == [(None, None, 500), (None, None, 200)]
+
+
+def test_unreachable_api_returns_empty():
+    client = ContributionsClient("http://127.0.0.1:9/v4", timeout=2)
+    assert client.fetch("octocat", "2024") == {}
+
+
+def test_unreachable_api_serves_the_stale_cached_response(stand_in, caplog):
+    client = ContributionsClient(stand_in.url, ttl=0)
+    first = client.fetch("octocat", "2024")
+    stand_in.hang_up = True
+    with caplog.at_level("WARNING", logger="api_client"):
+        assert client.fetch("octocat", "2024") == first
+    assert "cached" in caplog.text
+    assert len(stand_in.requests) == 1  # the revalidation never got an answer
+
+
+def test_disk_cache_is_shared_between_clients(stand_in, tmp_path):
+    ContributionsClient(stand_in.url, cache_dir=str(tmp_path)).fetch("octocat", "2024")
+    assert ContributionsClient(stand_in.url, cache_dir=str(tmp_path)).fetch("octocat", "2024")["year"] == "2024"
+    assert len(stand_in.requests) == 1
+
+
+def test_fetch_many_keeps_its_fan_out_bounded(stand_in):
+    stand_in.latency = 0.05
+    client = ContributionsClient(stand_in.url, max_workers=3)
+    years = [str(year) for year in range(2015, 2025)]
+    results = client.fetch_years("octocat", years + years[:2])  # duplicates are fetched once
+    assert results == {year: {"user": "octocat", "year": year} for year in years}
+    assert len(stand_in.requests) == len(years)
+    assert stand_in.max_in_flight == 3
@@ -0,0 +1,40 @@
+"""The grid editor against the pipeline: replacing the starting grid must drop pending cell edits."""
+
+
+def edit_cell(at, row: int, week: int, level: int):
+    # what the browser sends for a cell edit; AppTest has no data editor interactions of its own
+    key = f"contribution_grid_{at.session_state.editor_version}"
+    at.session_state[key] = {"edited_rows": {row: {str(week): level}}, "added_rows": [], "deleted_rows": []}
+    return at.run()
+
+
+def click(at, label: str):
+    return next(b for b in at.button if b.label == label).click().run()
+
+
+def test_cell_edit_reaches_the_design(app):
+    edit_cell(app, 1, 3, 2)
+    assert not app.exception
+    assert app.session_state.pipeline.matrix[1, 3] == 2
+
+
+def test_reset_drops_pending_cell_edits(app):
+    edit_cell(app, 1, 3, 2)
+    click(app, "Reset Contributions")
+    assert not app.exception
+    assert app.session_state.pipeline.values.sum() == 0
+    click(app, "Reset Contributions")  # a rerun after reset keeps it blank
+    assert app.session_state.pipeline.values.sum() == 0
+
+
+def test_undo_of_a_cell_edit_sticks(app):
+    before = app.session_state.pipeline.matrix
+    edit_cell(app, 1, 3, 2)
+    click(app, "Undo")
+    assert not app.exception
+    assert (app.session_state.pipeline.matrix == before).all()
+    assert app.session_state.pipeline.history.can_redo
+    click(app, "Undo")  # nothing left to undo, and the edit must not be replayed
+    assert (app.session_state.pipeline.matrix == before).all()
+    click(app, "Redo")
+    assert app.session_state.pipeline.matrix[1, 3] == 2
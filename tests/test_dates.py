@@ -0,0 +1,35 @@
+"""Streaming the contributions array out of an API body."""
+import io
+import json
+
+import pytest
+
+from dates import contributions_to_dict, iter_api_contributions
+
+BODY = {
+    "total": {"2024": 5},
+    "note": "héllo wörld ✓",  # multi-byte characters ahead of the array
+    "contributions": [
+        {"date": "2024-01-01", "count": 2, "level": 1, "who": "Zoë 😀"},
+        {"date": "2024-01-02", "count": 3, "level": 2, "who": "日本"},
+    ],
+}
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 40))
+def test_multi_byte_characters_split_across_chunks(chunk_size):
+    raw = json.dumps(BODY, ensure_ascii=False).encode("utf-8")
+    entries = list(iter_api_contributions(io.BytesIO(raw), chunk_size=chunk_size))
+    assert entries == BODY["contributions"]
+
+
+def test_text_streams_are_read_as_is():
+    entries = iter_api_contributions(io.StringIO(json.dumps(BODY)), chunk_size=7)
+    assert contributions_to_dict(entries) == {"2024-01-01": 2, "2024-01-02": 3}
+
+
+def test_body_cut_inside_a_character_raises():
+    raw = json.dumps(BODY, ensure_ascii=False).encode("utf-8")
+    cut = raw.index("Zoë".encode("utf-8")) + 3  # between the two bytes of ë
+    with pytest.raises(ValueError):
+        list(iter_api_contributions(io.BytesIO(raw[:cut]), chunk_size=8))
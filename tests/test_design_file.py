@@ -0,0 +1,68 @@
+"""The 3-bit .gcg design file format."""
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from dates import window_years_back
+from design_file import Design, decode_design, encode_design
+
+
+@pytest.fixture
+def design():
+    window = window_years_back(1)
+    return Design(window, np.random.default_rng(3).integers(0, 5, len(window)).astype(np.uint8))
+
+
+def resealed(data: bytes) -> bytes:
+    # recompute the trailing CRC-32 after editing the body
+    body = data[:-4]
+    return body + struct.pack("<I", zlib.crc32(body))
+
+
+def test_round_trip(design):
+    data = encode_design(design)
+    assert len(data) == 150
+    loaded = decode_design(data)
+    assert (loaded.window.start, loaded.window.end) == (design.window.start, design.window.end)
+    np.testing.assert_array_equal(loaded.levels, design.levels)
+
+
+@pytest.mark.parametrize("level", [0, 4])
+def test_uniform_designs_at_the_level_bounds_round_trip(design, level):
+    uniform = Design(design.window, np.full(len(design.window), level, dtype=np.uint8))
+    np.testing.assert_array_equal(decode_design(encode_design(uniform)).levels, uniform.levels)
+
+
+@pytest.mark.parametrize("level", [5, 7, -1])
+def test_levels_outside_0_to_4_are_not_encoded(design, level):
+    levels = design.levels.astype(np.int64)
+    levels[10] = level
+    with pytest.raises(ValueError):
+        encode_design(Design(design.window, levels))
+
+
+def test_stored_level_7_is_rejected(design):
+    data = bytearray(encode_design(Design(design.window, np.zeros(len(design.window), dtype=np.uint8))))
+    data[9] = 0b111_00000  # the first day's 3 bits all set
+    with pytest.raises(ValueError, match="levels"):
+        decode_design(resealed(bytes(data)))
+
+
+@pytest.mark.parametrize("cut", [0, 5, 9, 100, 149])
+def test_truncated_file_is_rejected(design, cut):
+    with pytest.raises(ValueError):
+        decode_design(encode_design(design)[:cut])
+
+
+def test_corrupt_file_is_rejected(design):
+    data = bytearray(encode_design(design))
+    data[40] ^= 0xFF
+    with pytest.raises(ValueError, match="checksum"):
+        decode_design(bytes(data))
+
+
+def test_foreign_file_is_rejected(design):
+    with pytest.raises(ValueError, match="not a design file"):
+        decode_design(resealed(b"PK" + encode_design(design)[2:]))
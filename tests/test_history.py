@@ -0,0 +1,76 @@
+"""EditHistory: sparse-delta undo/redo with keyframes."""
+import numpy as np
+import pytest
+
+from history import EditHistory
+
+SIZE = 364
+
+
+def edit(history: EditHistory, values: np.ndarray, rng: np.random.Generator, cells: int = 5) -> None:
+    indices = np.unique(rng.integers(0, SIZE, cells))
+    old, new = values[indices].copy(), rng.integers(0, 5, len(indices)).astype(np.uint8)
+    values[indices] = new
+    history.record(indices, old, new, values)
+
+
+@pytest.fixture
+def edited():
+    # 20 edits with a keyframe every 4 steps; states[i] is the design after step i. The edits are
+    # large enough that a far jump is cheaper from a keyframe than by walking the deltas
+    rng = np.random.default_rng(11)
+    history, values = EditHistory(SIZE, max_bytes=1 << 20, keyframe_interval=4), np.zeros(SIZE, dtype=np.uint8)
+    states = [values.copy()]
+    for _ in range(20):
+        edit(history, values, rng, cells=120)
+        states.append(values.copy())
+    return history, values, states, rng
+
+
+def test_undo_and_redo_step_across_keyframes(edited):
+    history, values, states, _ = edited
+    for step in range(19, 5, -1):  # back over the keyframes at 16, 12 and 8
+        history.undo(values)
+        np.testing.assert_array_equal(values, states[step])
+    for step in range(7, 21):
+        history.redo(values)
+        np.testing.assert_array_equal(values, states[step])
+    assert not history.can_redo
+
+
+@pytest.mark.parametrize("target", [0, 3, 4, 5, 11, 17])
+def test_restore_far_back_goes_through_a_keyframe(edited, target):
+    history, values, states, _ = edited
+    touched = history.restore(values, target)
+    np.testing.assert_array_equal(values, states[target])
+    assert history.step == target
+    # everything that changed is reported as written; a keyframe rewrites every day
+    assert np.all(np.isin(np.flatnonzero(states[20] != states[target]), touched))
+    assert (len(touched) == SIZE) == (20 - target > history.keyframe_interval)
+
+
+def test_new_edit_truncates_redo(edited):
+    history, values, states, rng = edited
+    for _ in range(6):
+        history.undo(values)
+    edit(history, values, rng)
+    after_edit = values.copy()
+    assert history.step == history.last == 15
+    assert not history.can_redo
+    assert len(history.redo(values)) == 0
+    np.testing.assert_array_equal(values, after_edit)
+    # the keyframe at step 16 belonged to the dropped branch
+    history.undo(values)
+    np.testing.assert_array_equal(values, states[14])
+    history.restore(values, 15)
+    np.testing.assert_array_equal(values, after_edit)
+
+
+def test_memory_cap_drops_the_oldest_steps():
+    rng = np.random.default_rng(5)
+    history, values = EditHistory(SIZE, max_bytes=400, keyframe_interval=4), np.zeros(SIZE, dtype=np.uint8)
+    for _ in range(30):
+        edit(history, values, rng)
+    assert history.nbytes <= 400 and history.first > 0
+    history.restore(values, 0)  # clamped to the oldest reachable step
+    assert history.step == history.first and not history.can_undo
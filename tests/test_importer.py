@@ -0,0 +1,79 @@
+"""Image import: any PIL mode to a 7 x weeks grid of levels 0-4."""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from importer import image_to_grid
+
+
+def png(image: Image.Image, **params) -> io.BytesIO:
+    buf = io.BytesIO()
+    image.save(buf, format=params.pop("format", "PNG"), **params)
+    buf.seek(0)
+    return buf
+
+
+def bar(mode: str, dark, light, size=(104, 14)) -> Image.Image:
+    # left half dark, right half light
+    image = Image.new(mode, size, light)
+    image.paste(dark, (0, 0, size[0] // 2, size[1]))
+    return image
+
+
+@pytest.mark.parametrize("mode, dark, light", [
+    ("RGB", (0, 0, 0), (255, 255, 255)),
+    ("L", 0, 255),
+    ("1", 0, 1),
+    ("I;16", 0, 65535),
+    ("CMYK", (0, 0, 0, 255), (0, 0, 0, 0)),
+])
+def test_modes_import_to_levels(mode, dark, light):
+    image = bar(mode, dark, light)
+    source = png(image, format="TIFF") if mode == "CMYK" else png(image)
+    grid = image_to_grid(source, weeks=14, keep_aspect=False)
+    assert grid.shape == (7, 14) and grid.dtype == np.int64
+    assert grid.min() >= 0 and grid.max() <= 4
+    assert (grid[:, :7] == 4).all() and (grid[:, 7:] == 0).all()
+
+
+def test_palette_image():
+    image = bar("RGB", (0, 0, 0), (255, 255, 255)).convert("P", palette=Image.ADAPTIVE, colors=4)
+    assert (image_to_grid(png(image), weeks=14, keep_aspect=False)[:, :7] == 4).all()
+
+
+def test_transparent_pixels_are_empty():
+    image = Image.new("RGBA", (104, 14), (0, 0, 0, 0))  # black, but fully transparent
+    image.paste((0, 0, 0, 255), (0, 0, 52, 14))
+    grid = image_to_grid(png(image), weeks=14, keep_aspect=False)
+    assert (grid[:, :7] == 4).all() and (grid[:, 7:] == 0).all()
+
+
+def test_transparent_palette_image_is_empty():
+    image = Image.new("P", (14, 7), 0)
+    image.putpalette([0, 0, 0, 255, 255, 255])
+    grid = image_to_grid(png(image, transparency=0), weeks=14, keep_aspect=False)
+    assert not grid.any()
+
+
+def test_grey_levels_and_inversion():
+    # five vertical bands from black to white
+    pixels = np.repeat(np.repeat(np.array([0, 64, 128, 191, 255], dtype=np.uint8)[None], 7, axis=0), 4, axis=1)
+    source = png(Image.fromarray(pixels, mode="L"))
+    assert image_to_grid(source, weeks=20, keep_aspect=False)[0, ::4].tolist() == [4, 3, 2, 1, 0]
+    source.seek(0)
+    assert image_to_grid(source, weeks=20, keep_aspect=False, invert=True)[0, ::4].tolist() == [0, 1, 2, 3, 4]
+
+
+def test_aspect_ratio_is_kept_and_centered():
+    grid = image_to_grid(png(Image.new("L", (70, 70), 0)), weeks=52)
+    assert grid.shape == (7, 52)
+    assert np.flatnonzero(grid.any(axis=0)).tolist() == list(range(22, 29))
+
+
+def test_dithering_stays_in_range():
+    pixels = np.linspace(0, 255, 7 * 52 * 16).reshape(7 * 4, 52 * 4).astype(np.uint8)
+    grid = image_to_grid(png(Image.fromarray(pixels, mode="L")), dither=True, keep_aspect=False)
+    assert grid.shape == (7, 52) and grid.min() >= 0 and grid.max() <= 4
+    assert len(np.unique(grid)) == 5
@@ -0,0 +1,58 @@
+"""Pattern generators: batch shape, level range, seeding."""
+import numpy as np
+import pytest
+
+from dates import window_years_back
+from patterns import PATTERNS, generate
+
+
+@pytest.fixture(scope="module")
+def window():
+    return window_years_back(1)
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_batch_shape_dtype_and_levels(window, pattern):
+    levels = generate(pattern, window, count=6, seed=1)
+    assert levels.shape == (6, len(window)) and levels.dtype == np.uint8
+    assert levels.max() <= 4
+    # candidates in a batch differ from each other
+    assert len({candidate.tobytes() for candidate in levels}) > 1
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_same_seed_same_candidates(window, pattern):
+    np.testing.assert_array_equal(generate(pattern, window, count=3, seed=42),
+                                  generate(pattern, window, count=3, seed=42))
+
+
+def test_writes_into_out(window):
+    out = np.full((2, len(window)), 9, dtype=np.uint8)
+    assert generate("noise", window, count=2, seed=0, out=out) is out
+    assert out.max() <= 4
+
+
+def test_left_to_right_gradient_snapshot(window):
+    matrix = window.to_matrix(generate("gradient", window, seed=0, angle=0)[0])
+    expected = [0] * 11 + [1] * 10 + [2] * 10 + [3] * 10 + [4] * 11
+    assert (matrix == expected).all()
+
+
+def test_noise_spreads_evenly_over_levels(window):
+    counts = np.bincount(generate("noise", window, seed=3)[0], minlength=5)
+    assert counts.min() > len(window) // 5 - 10
+
+
+def test_activity_follows_the_history_weekdays(window):
+    # all history on Mondays: Mondays come out active, the other weekdays mostly empty
+    history = np.zeros(len(window), dtype=np.int64)
+    history[1::7] = 5
+    active = window.to_matrix(generate("activity", window, seed=0, history=history)[0]) > 0
+    assert active[1].mean() > 0.8
+    assert active[[0, 2, 3, 4, 5, 6]].mean() < 0.2
+
+
+def test_animated_wave_frames_share_period_and_tilt(window):
+    frames = generate("wave", window, count=4, seed=0, animate=True)
+    # a quarter-cycle phase step per frame: frame 2 is frame 0 mirrored around level 2
+    np.testing.assert_array_equal(frames[2].astype(int), 4 - frames[0].astype(int))
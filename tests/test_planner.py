@@ -0,0 +1,60 @@
+"""Commit plans for designs on an empty history: every target day shows, and shades follow the design."""
+import numpy as np
+import pytest
+
+from dates import window_years_back
+from planner import plan_commits
+from writer import stamp_text
+
+
+@pytest.fixture
+def window():
+    return window_years_back(1)
+
+
+def plan_on_empty(window, target):
+    plan = plan_commits(window, target, np.zeros(len(window), dtype=np.int64))
+    wanted = target > 0
+    assert np.all(plan.additions[wanted] > 0), "a target day was left without commits"
+    assert not np.any(plan.additions[~wanted]), "a day outside the design got commits"
+    return plan
+
+
+def test_single_darkest_day_gets_a_commit(window):
+    target = np.zeros(len(window), dtype=np.int64)
+    target[100] = 4
+    plan = plan_on_empty(window, target)
+    # a lone day is the whole year's activity, so it can only show the lightest shade
+    assert plan.commits == 1 and plan.levels[100] == 1
+
+
+def test_uniform_design_stays_one_shade(window):
+    plan = plan_on_empty(window, np.full(len(window), 4))
+    assert set(plan.levels) == {1}
+    assert plan.commits == len(window)
+
+
+def stamped(window, level):
+    return window.from_matrix(stamp_text(np.zeros((7, window.weeks), dtype=np.int64), "HELLO", level=level))
+
+
+def test_darkest_text_shows_in_one_shade(window):
+    target = stamped(window, 4)
+    plan = plan_on_empty(window, target)
+    assert set(plan.levels[target > 0]) == {1}
+
+
+def test_mid_shade_text_mostly_keeps_its_shade(window):
+    target = stamped(window, 2)
+    plan = plan_on_empty(window, target)
+    shades = plan.levels[target > 0]
+    # the days below the year's first quartile can only show level 1
+    assert set(shades) == {1, 2}
+    assert np.count_nonzero(shades == 2) > 2 * np.count_nonzero(shades == 1)
+
+
+def test_random_design_reaches_most_days(window):
+    target = np.random.default_rng(0).integers(0, 5, len(window))
+    plan = plan_on_empty(window, target)
+    assert plan.unreachable < np.count_nonzero(target) // 5
+    assert set(plan.levels[target > 0]) == {1, 2, 3, 4}
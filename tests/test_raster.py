@@ -0,0 +1,78 @@
+"""Raster and SVG backends: output matches the grid, PNG matches paint(), render caches hit and miss."""
+import re
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import raster
+from writer import COLORS, render_commit_graph
+
+
+@pytest.fixture
+def levels():
+    return np.random.default_rng(0).integers(0, 5, size=(7, 52)).astype(np.uint8)
+
+
+def decode(data: bytes) -> Image.Image:
+    image = Image.open(BytesIO(data))
+    image.load()
+    return image
+
+
+def cell_center(row: int, week: int, figsize=(13, 3), dpi=100) -> tuple:
+    x0, y0, x1, y1 = raster.graph_layout(figsize, dpi).box(week, -row)
+    return (x0 + x1) // 2, (y0 + y1) // 2
+
+
+@pytest.mark.parametrize("figsize, dpi, first_month", [((13, 3), 100, 1), ((8, 2), 150, 7), ((13, 3), 72, 12)])
+def test_png_decodes_to_painted_pixels(levels, figsize, dpi, first_month):
+    layout = raster.graph_layout(figsize, dpi)
+    image = decode(raster.render_png(levels, figsize, dpi, first_month))
+    assert image.mode == "P" and image.size == (layout.width, layout.height)
+    assert np.array_equal(np.asarray(image), raster.paint(levels, figsize, dpi, first_month))
+
+
+@pytest.mark.parametrize("fill", [0, 4])
+def test_png_of_a_uniform_grid(fill):
+    levels = np.full((7, 52), fill, dtype=np.uint8)
+    assert np.array_equal(np.asarray(decode(raster.render_png(levels))), raster.paint(levels))
+
+
+def test_png_cell_colors_match_the_grid(levels):
+    image = decode(raster.render_png(levels)).convert("RGB")
+    for row, week in [(0, 0), (3, 17), (6, 51), (2, 40)]:
+        expected = raster._hex_rgb(COLORS[levels[row, week]])
+        assert image.getpixel(cell_center(row, week)) == expected
+
+
+def test_svg_cell_classes_match_the_grid(levels):
+    svg = raster.render_svg(levels)
+    classes = re.findall(r'<rect x="\d+" y="\d+" width="\d+" height="\d+" class="l(\d)"/>', svg)
+    # the legend squares come first, then one rect per cell in row-major order
+    assert [int(level) for level in classes] == list(range(len(COLORS))) + levels.ravel().tolist()
+    x0, y0, x1, y1 = raster.graph_layout().box(17, -3)
+    assert f'<rect x="{x0}" y="{y0}" width="{x1 - x0}" height="{y1 - y0}" class="l{levels[3, 17]}"/>' in svg
+
+
+def test_background_is_built_once_per_size_and_month(levels):
+    raster._background.cache_clear()
+    raster._png_parts.cache_clear()
+    raster.render_png(levels, first_month=3)
+    raster.render_png(np.zeros((7, 52), dtype=np.uint8), first_month=3)
+    assert raster._png_parts.cache_info().misses == 1 and raster._png_parts.cache_info().hits == 1
+    raster.render_png(levels, first_month=4)
+    assert raster._png_parts.cache_info().misses == 2
+    assert raster._background.cache_info().misses == 2
+
+
+@pytest.mark.parametrize("backend", ["raster", "svg"])
+def test_render_cache_hits_on_an_unchanged_grid(levels, backend):
+    _, first = render_commit_graph(levels, first_month=5, backend=backend)
+    _, again = render_commit_graph(levels.copy(), first_month=5, backend=backend)
+    assert again is first
+    changed = levels.copy()
+    changed[0, 0] = (changed[0, 0] + 1) % 5
+    _, other = render_commit_graph(changed, first_month=5, backend=backend)
+    assert other is not first and other != first
@@ -0,0 +1,39 @@
+"""Sharded uploads against local bare repositories, started the way the app starts them."""
+import subprocess
+import sys
+import threading
+import types
+from collections import Counter
+
+from github_interaction import UPLOAD_BRANCH, branch_commit_counts
+from sharded_upload import UploadTarget, sharded_upload
+
+
+def test_workers_do_not_rerun_the_callers_main(tmp_path, monkeypatch):
+    # under Streamlit __main__ is the app script; a worker that re-ran it would leave the marker
+    marker = tmp_path / "main-ran"
+    script = tmp_path / "app_script.py"
+    script.write_text(f"open({str(marker)!r}, 'w').close()\n")
+    main = types.ModuleType("__main__")
+    main.__file__ = str(script)
+    monkeypatch.setitem(sys.modules, "__main__", main)
+
+    repos = [tmp_path / f"shard-{n}.git" for n in range(2)]
+    for path in repos:
+        subprocess.run(["git", "init", "--bare", "-q", str(path)], check=True)
+    plan = {"2024-01-01": 2, "2024-01-02": 1, "2024-01-03": 3}
+    results, events = [], []
+    upload = threading.Thread(target=lambda: results.extend(sharded_upload(
+        [UploadTarget(f"file://{path}") for path in repos], "test", "test@example.com", "", plan,
+        cache_root=str(tmp_path / "cache"), progress=lambda *event: events.append(event))))
+    upload.start()
+    seen = set()
+    while upload.is_alive():  # what Streamlit's script threads would see meanwhile
+        seen.add(sys.modules["__main__"] is main)
+    upload.join()
+
+    assert [r.status for r in results] == ["done", "done"]
+    assert sum((Counter(branch_commit_counts(str(path), UPLOAD_BRANCH)) for path in repos), Counter()) == plan
+    assert {index for index, *_ in events} == {0, 1}
+    assert not marker.exists()
+    assert seen == {True}
@@ -0,0 +1,38 @@
+"""Span recording: per collector, without turning it on for the whole process."""
+import threading
+
+import timing
+from timing import SpanCollector, span, timed
+
+
+@timed("test.work")
+def work():
+    return 1
+
+
+def test_spans_are_not_recorded_while_disabled():
+    with SpanCollector() as collector:
+        with span("test.stage"):
+            work()
+    assert collector.records == []
+
+
+def test_recording_collector_only_records_its_own_context():
+    other = []
+
+    def other_session():
+        with SpanCollector() as collector:
+            with span("test.other"):
+                pass
+        other.extend(collector.records)
+
+    with SpanCollector(enabled=True) as collector:
+        with span("test.stage", cells=3):
+            work()
+        thread = threading.Thread(target=other_session)
+        thread.start()
+        thread.join()
+    assert [r["span"] for r in collector.records] == ["test.work", "test.stage"]
+    assert collector.records[1]["cells"] == 3
+    assert other == []
+    assert not timing.is_enabled()
@@ -0,0 +1,82 @@
+"""Uploads against local bare repositories: only the missing automated commits are appended."""
+import subprocess
+
+import pytest
+
+from github_interaction import (COMMIT_MESSAGE, UPLOAD_BRANCH, branch_commit_counts, github_upload_commits,
+                                missing_commit_counts)
+from repo_cache import RepoCache
+
+
+@pytest.fixture
+def remote(tmp_path):
+    path = tmp_path / "remote.git"
+    subprocess.run(["git", "init", "--bare", "-q", str(path)], check=True)
+    return path
+
+
+def upload(remote, tmp_path, plan, baseline=None, depth=None):
+    github_upload_commits(f"file://{remote}", "test", "test@example.com", "", plan, baseline=baseline,
+                          cache=RepoCache(root=str(tmp_path / "cache"), depth=depth))
+    return branch_commit_counts(str(remote), UPLOAD_BRANCH)
+
+
+def test_missing_commit_counts_without_baseline_treats_plan_as_absolute():
+    assert missing_commit_counts({"2024-01-01": 3, "2024-01-02": 1}, {"2024-01-01": 2, "2024-01-02": 4}) == {"2024-01-01": 1}
+
+
+def test_missing_commit_counts_only_subtracts_commits_pushed_since_the_fetch():
+    plan, branch = {"2024-01-01": 3, "2024-01-02": 3}, {"2024-01-01": 2, "2024-01-02": 5}
+    # day 1: both branch commits were there at the fetch; day 2: 3 were pushed since
+    assert missing_commit_counts(plan, branch, {"2024-01-01": 2, "2024-01-02": 2}) == {"2024-01-01": 3}
+
+
+def test_plan_on_top_of_fetched_history_is_pushed_in_full(remote, tmp_path):
+    assert upload(remote, tmp_path, {"2024-01-01": 2}) == {"2024-01-01": 2}
+    # the fetched history now shows those 2 commits and the design asks for 3 more
+    assert upload(remote, tmp_path, {"2024-01-01": 3}, baseline={"2024-01-01": 2}) == {"2024-01-01": 5}
+
+
+def test_repeated_upload_against_a_stale_baseline_adds_nothing(remote, tmp_path):
+    upload(remote, tmp_path, {"2024-01-01": 3}, baseline={"2024-01-01": 0})
+    assert upload(remote, tmp_path, {"2024-01-01": 3}, baseline={"2024-01-01": 0}) == {"2024-01-01": 3}
+
+
+def test_shallow_cache_scans_the_whole_branch(remote, tmp_path):
+    upload(remote, tmp_path, {"2024-01-01": 2, "2024-01-02": 1})
+    plan = {"2024-01-01": 2, "2024-01-02": 1}
+    assert upload(remote, tmp_path / "shallow", plan, depth=1) == plan
+
+
+def test_repeated_upload_on_a_day_with_real_contributions_adds_nothing(remote, tmp_path):
+    # the fetched 3 are real contributions, none of them on the branch
+    for _ in range(3):
+        assert upload(remote, tmp_path, {"2024-01-01": 2}, baseline={"2024-01-01": 3}) == {"2024-01-01": 2}
+
+
+def test_second_design_against_the_same_fetch_tops_up_the_first(remote, tmp_path):
+    baseline = {"2024-01-01": 3, "2024-01-02": 1}
+    upload(remote, tmp_path, {"2024-01-01": 2}, baseline=baseline)
+    # the second design wants 4 more on the first day than was fetched; 2 of them are already pushed
+    assert upload(remote, tmp_path, {"2024-01-01": 4, "2024-01-02": 1}, baseline=baseline) == {
+        "2024-01-01": 4, "2024-01-02": 1}
+
+
+def automated_log(remote) -> list:
+    log = subprocess.run(["git", "log", "--format=%ad %cd %an <%ae> %s", "--date=raw", UPLOAD_BRANCH],
+                         cwd=remote, capture_output=True, text=True, check=True).stdout.splitlines()
+    return [line for line in log if line.endswith(COMMIT_MESSAGE)]
+
+
+def test_fast_import_matches_per_commit_upload(tmp_path):
+    plan = {"2024-01-01": 2, "2024-02-29": 1, "2024-12-31": 3}
+    logs, counts = [], []
+    for bulk in (True, False):
+        remote = tmp_path / f"remote-{bulk}.git"
+        subprocess.run(["git", "init", "--bare", "-q", str(remote)], check=True)
+        github_upload_commits(f"file://{remote}", "test", "test@example.com", "", plan, bulk=bulk,
+                              cache=RepoCache(root=str(tmp_path / f"cache-{bulk}")))
+        logs.append(automated_log(remote))
+        counts.append(branch_commit_counts(str(remote), UPLOAD_BRANCH))
+    assert logs[0] == logs[1]
+    assert counts[0] == counts[1] == plan